@@ -1,6 +1,7 @@
 from django.contrib import admin
 from apps.base import models as base_models
 from django.contrib.auth.models import User, Group
+from django.utils import timezone
 
 # Register your models here.
 @admin.register(base_models.Settings)
@@ -27,5 +28,18 @@ class BannerAdmin(admin.ModelAdmin):
     search_fields = ('title', 'subtitle')
     list_filter = ('title',)
 
+@admin.register(base_models.ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ('source', 'status', 'attempts', 'available_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('source',)
+    readonly_fields = ('source', 'model', 'field', 'attempts', 'error', 'created_at')
+    actions = ('retry',)
+
+    @admin.action(description="Повторить обработку")
+    def retry(self, request, queryset):
+        updated = queryset.update(status=base_models.ImageJob.PENDING, attempts=0, available_at=timezone.now())
+        self.message_user(request, f"Поставлено в очередь: {updated}")
+
 admin.site.unregister(User)
 admin.site.unregister(Group)
@@ -5,3 +5,6 @@ class BaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.base'
     verbose_name = "1) Основные параметры сайта"
+
+    def ready(self):
+        from apps.base import signals  # noqa: F401
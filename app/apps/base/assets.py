@@ -0,0 +1,133 @@
+import functools
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import brotli
+import rcssmin
+import rjsmin
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+from django.templatetags.static import static
+
+# -------------------------------
+# Бандлы CSS/JS
+# -------------------------------
+# Исходники из static (ASSET_BUNDLES) склеиваются, минифицируются и
+# пишутся в ASSET_ROOT под именем с хэшем содержимого (site.3f2a9c1b04de.css)
+# вместе с готовыми .gz и .br. manifest.json связывает имя бандла с
+# файлом. Имя меняется вместе с содержимым, поэтому файл отдаётся с
+# Cache-Control на год и immutable. Файлы прошлой сборки не удаляются
+# сразу: на них ещё ссылаются страницы в кэше и у клиентов.
+MANIFEST_NAME = "manifest.json"
+
+MINIFIERS = {
+    "css": rcssmin.cssmin,
+    "js": rjsmin.jsmin,
+}
+
+# Сжатые копии: расширение -> функция
+COMPRESSORS = {
+    ".br": lambda data: brotli.compress(data, quality=11),
+    # mtime=0 — одинаковое содержимое даёт одинаковый .gz
+    ".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+}
+
+
+def _kind(name):
+    kind = name.rsplit(".", 1)[-1]
+    if kind not in MINIFIERS:
+        raise ImproperlyConfigured(f"Бандл {name}: поддерживаются только .css и .js")
+    return kind
+
+
+def _source_text(path):
+    found = finders.find(path)
+    if not found:
+        raise ImproperlyConfigured(f"Исходник бандла не найден в static: {path}")
+    return Path(found).read_text(encoding="utf-8")
+
+
+def bundle_content(name):
+    """Склеенное и минифицированное содержимое бандла name."""
+    kind = _kind(name)
+    text = "\n".join(_source_text(path) for path in settings.ASSET_BUNDLES[name])
+    return MINIFIERS[kind](text).strip().encode() + b"\n"
+
+
+def hashed_name(name, content):
+    stem, ext = name.rsplit(".", 1)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}.{ext}"
+
+
+def _write(path, data):
+    # Через временный файл: воркеры не увидят файл наполовину записанным
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def read_manifest(root=None):
+    try:
+        with open(Path(root or settings.ASSET_ROOT) / MANIFEST_NAME) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_bundles(root=None):
+    """
+    Собирает все бандлы в root (по умолчанию ASSET_ROOT) и возвращает
+    новый манифест {бандл: файл}. Неизменившиеся бандлы не перезаписываются.
+    """
+    root = Path(root or settings.ASSET_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = read_manifest(root)
+
+    manifest = {}
+    for name in settings.ASSET_BUNDLES:
+        content = bundle_content(name)
+        filename = hashed_name(name, content)
+        path = root / filename
+        if not path.exists():
+            for suffix, compress in COMPRESSORS.items():
+                _write(path.with_name(filename + suffix), compress(content))
+            # Несжатый файл — последним: его наличие значит, что сборка полная
+            _write(path, content)
+        manifest[name] = filename
+
+    _write(root / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    # Остаются текущая и предыдущая сборки
+    keep = set(manifest.values()) | set(previous.values())
+    for path in root.iterdir():
+        if path.name == MANIFEST_NAME:
+            continue
+        base = path.name
+        for suffix in COMPRESSORS:
+            base = base.removesuffix(suffix)
+        if base not in keep:
+            path.unlink()
+    return manifest
+
+
+@functools.lru_cache(maxsize=None)
+def current_manifest():
+    """Манифест, прочитанный один раз за жизнь процесса (сборка идёт до старта)."""
+    return read_manifest()
+
+
+def bundle_urls(name):
+    """
+    URL для подключения бандла: один файл из сборки или, если сборки нет
+    или бандлы выключены, исходники из static по отдельности.
+    """
+    if name not in settings.ASSET_BUNDLES:
+        raise ImproperlyConfigured(f"Неизвестный бандл: {name}")
+    filename = current_manifest().get(name) if settings.ASSET_BUNDLES_ENABLED else None
+    if filename:
+        return [settings.ASSET_URL + filename]
+    return [static(path) for path in settings.ASSET_BUNDLES[name]]
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+from apps.base.assets import read_manifest
+
+# -------------------------------
+# Старт контейнера
+# -------------------------------
+# python manage.py boot (scripts/entrypoint.sh) готовит окружение перед
+# запуском gunicorn: ждёт БД, применяет миграции, собирает статику и
+# бандлы CSS/JS (apps/base/assets.py) — только если есть что применять и
+# собирать. Повторный старт без новых миграций и статики занимает доли
+# секунды.
+
+# Файл в STATIC_ROOT: отпечаток исходников статики последнего collectstatic
+STATIC_FINGERPRINT_FILE = ".collectstatic-fingerprint"
+
+# Ключ advisory-блокировки Postgres: несколько контейнеров, стартующих
+# одновременно, не применяют миграции и не собирают статику параллельно
+BOOT_LOCK_ID = 724_617_001
+
+
+def probe_database(alias=DEFAULT_DB_ALIAS, timeout=5):
+    """
+    Одно отдельное подключение к БД в обход пула. Возвращает None, если БД
+    принимает соединения, иначе текст ошибки.
+    """
+    connection = connections[alias]
+    params = connection.get_connection_params()
+    if connection.vendor == "postgresql":
+        params["connect_timeout"] = timeout
+    try:
+        connection.Database.connect(**params).close()
+    except connection.Database.Error as error:
+        return str(error).strip() or error.__class__.__name__
+    return None
+
+
+def wait_for_database(alias=DEFAULT_DB_ALIAS, timeout=60, delay=0.2, max_delay=5):
+    """
+    Ждёт, пока БД начнёт принимать соединения: пауза между попытками
+    удваивается от delay до max_delay. Возвращает число попыток;
+    TimeoutError — если БД не поднялась за timeout секунд.
+    """
+    deadline = time.monotonic() + timeout
+    attempts = 0
+    while True:
+        attempts += 1
+        error = probe_database(alias, timeout=max(1, int(max_delay)))
+        if error is None:
+            return attempts
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise TimeoutError(f"БД недоступна {timeout} с ({attempts} попыток): {error}")
+        time.sleep(min(delay, left))
+        delay = min(delay * 2, max_delay)
+
+
+def pending_migrations(alias=DEFAULT_DB_ALIAS):
+    """
+    Миграции, которые migrate применил бы сейчас: граф миграций с диска
+    против таблицы django_migrations (один запрос).
+    """
+    executor = MigrationExecutor(connections[alias])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+@contextmanager
+def boot_lock(alias=DEFAULT_DB_ALIAS):
+    """Сессионная advisory-блокировка на время миграций и сборки статики."""
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [BOOT_LOCK_ID])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [BOOT_LOCK_ID])
+
+
+def static_fingerprint():
+    """
+    Отпечаток исходников статики: пути, размеры и время изменения всех
+    файлов, которые нашёл бы collectstatic, хранилище STATIC_ROOT и состав
+    бандлов. Содержимое файлов не читается.
+    """
+    digest = hashlib.sha256()
+    digest.update(settings.STORAGES["staticfiles"]["BACKEND"].encode())
+    digest.update(json.dumps(settings.ASSET_BUNDLES, sort_keys=True).encode())
+    files = {}
+    for finder in finders.get_finders():
+        for path, storage in finder.list(["CVS", ".*", "*~"]):
+            prefix = getattr(storage, "prefix", None) or ""
+            name = os.path.join(prefix, path)
+            # Как и collectstatic, берём первый найденный файл с таким именем
+            if name not in files:
+                stat = os.stat(storage.path(path))
+                files[name] = f"{stat.st_size}:{stat.st_mtime_ns}"
+    for name in sorted(files):
+        digest.update(f"{name}\0{files[name]}\n".encode())
+    return digest.hexdigest()
+
+
+def _fingerprint_path():
+    return os.path.join(settings.STATIC_ROOT, STATIC_FINGERPRINT_FILE)
+
+
+def static_is_current(fingerprint):
+    """STATIC_ROOT и бандлы собраны из тех же исходников, что и сейчас на диске."""
+    if not read_manifest():
+        return False
+    try:
+        with open(_fingerprint_path()) as file:
+            return json.load(file).get("fingerprint") == fingerprint
+    except (OSError, ValueError):
+        return False
+
+
+def save_static_fingerprint(fingerprint):
+    os.makedirs(settings.STATIC_ROOT, exist_ok=True)
+    with open(_fingerprint_path(), "w") as file:
+        json.dump({"fingerprint": fingerprint}, file)
@@ -0,0 +1,185 @@
+import functools
+import hashlib
+import os
+import time
+from functools import wraps
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag, urlencode
+
+from apps.base.assets import MANIFEST_NAME
+
+# -------------------------------
+# Версии контента
+# -------------------------------
+# Каждая область (scope) контента имеет версию в общем кэше (Redis):
+#   "chrome"          — настройки, баннеры, меню категорий (есть на всех страницах)
+#   "category:<pk>"   — категория и список её услуг
+#   "service:<slug>"  — услуга и все её разделы
+#   "catalog"         — весь каталог целиком (подсказки поиска, Telegram-бот)
+# Версия — метка времени в наносекундах, поэтому она монотонно растёт
+# и переживает перезапуск процессов.
+CHROME = "chrome"
+CATALOG = "catalog"
+
+VERSION_KEY = "content-version:{}"
+PAGE_KEY = "page:{}:{}"
+
+
+def category_scope(pk):
+    return f"category:{pk}"
+
+
+def service_scope(slug):
+    return f"service:{slug}"
+
+
+def get_versions(*scopes):
+    """Текущие версии областей; отсутствующие инициализируются текущим временем."""
+    keys = {VERSION_KEY.format(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump_versions(*scopes):
+    """Сразу делает устаревшим всё, что было построено по этим областям."""
+    now = time.time_ns()
+    cache.set_many({VERSION_KEY.format(scope): now for scope in scopes}, timeout=None)
+
+
+def bump_on_commit(*scopes):
+    """Поднимает версии после фиксации транзакции, чтобы кэш не опередил БД."""
+    scopes = tuple(scope for scope in scopes if scope)
+    if scopes:
+        transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+@functools.lru_cache(maxsize=None)
+def release():
+    """
+    (идентификатор, время в нс) текущей выкладки шаблонов и кода.
+
+    Новый деплой меняет HTML без правок контента, поэтому выкладка входит
+    и в ключ страницы, и в ETag/Last-Modified. RELEASE_ID из окружения
+    (например, git sha) имеет приоритет над хэшем файлов.
+    """
+    digest = hashlib.md5()
+    latest = 0
+    roots = [Path(d) for d in settings.TEMPLATES[0]["DIRS"]]
+    roots.append(Path(apps.get_app_config("base").path).parent)
+    for root in roots:
+        for path in sorted(root.rglob("*")):
+            if path.suffix in (".html", ".py"):
+                stat = path.stat()
+                digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+                latest = max(latest, stat.st_mtime_ns)
+    # Новая сборка бандлов меняет ссылки на CSS/JS в HTML
+    manifest = Path(settings.ASSET_ROOT) / MANIFEST_NAME
+    if manifest.exists():
+        digest.update(manifest.read_bytes())
+        latest = max(latest, manifest.stat().st_mtime_ns)
+    return os.getenv("RELEASE_ID") or digest.hexdigest()[:12], latest
+
+
+def content_validators(scopes, versions=None):
+    """ETag (без кавычек) и Last-Modified (unix-время) для набора областей."""
+    versions = versions or get_versions(*scopes)
+    release_id, release_mtime = release()
+    etag = hashlib.md5(
+        ":".join([release_id] + [f"{scope}={versions[scope]}" for scope in scopes]).encode()
+    ).hexdigest()
+    last_modified = max(max(versions.values()), release_mtime) // 1_000_000_000
+    return etag, last_modified
+
+
+# -------------------------------
+# Кэш готовых страниц
+# -------------------------------
+def _page_path(request, query_params, vary_on_host):
+    """Адрес страницы для ключа: путь и только те параметры, которые читает view."""
+    path = request.build_absolute_uri(request.path) if vary_on_host else request.path
+    query = urlencode([(name, value) for name in query_params for value in request.GET.getlist(name)])
+    return f"{path}?{query}" if query else path
+
+
+def cached_page(scopes_func=None, vary_on_host=False, query_params=()):
+    """
+    Кэширует готовый ответ публичной страницы целиком и отвечает на
+    условные запросы (If-None-Match / If-Modified-Since) кодом 304.
+
+    Ключ и ETag строятся из версий областей, от которых зависит
+    страница: "chrome" плюс то, что вернёт scopes_func(**view_kwargs).
+    Версии читаются до обращения к БД, поэтому правка, зафиксированная
+    во время рендера, не может попасть в кэш под новой версией.
+    vary_on_host — ответ содержит абсолютные URL и зависит от домена.
+    query_params — GET-параметры, от которых зависит ответ; остальные
+    (utm-метки, ?nocache=<случайное>) в ключ не входят и не плодят копии.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            scopes = [CHROME]
+            if scopes_func is not None:
+                scopes.extend(scopes_func(**kwargs))
+            versions = get_versions(*scopes)
+            etag, last_modified = content_validators(scopes, versions)
+
+            # Копия клиента актуальна — не трогаем ни кэш страниц, ни БД
+            not_modified = get_conditional_response(
+                request, etag=quote_etag(etag), last_modified=last_modified
+            )
+            if not_modified is not None:
+                return not_modified
+
+            path = _page_path(request, query_params, vary_on_host)
+            path_hash = hashlib.md5(path.encode()).hexdigest()
+            key = PAGE_KEY.format(path_hash, etag)
+
+            entry = cache.get(key)
+            if entry is not None:
+                status, headers, content = entry
+                response = HttpResponse(content, status=status)
+                for header, value in headers:
+                    response[header] = value
+                return response
+
+            # Обвязка рендерится по той же версии "chrome", что и в ключе
+            request.chrome_version = versions[CHROME]
+            response = view(request, *args, **kwargs)
+            if (
+                request.method == "GET"
+                and response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+            ):
+                if hasattr(response, "render") and callable(response.render):
+                    response.render()
+                response["ETag"] = quote_etag(etag)
+                response["Last-Modified"] = http_date(last_modified)
+                # Браузер хранит страницу, но перепроверяет её при каждом заходе
+                patch_cache_control(response, public=True, no_cache=True)
+                cache.set(
+                    key,
+                    (response.status_code, list(response.items()), response.content),
+                    settings.PAGE_CACHE_TIMEOUT,
+                )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,79 @@
+import time
+
+from django.conf import settings as django_settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.base import models as base_models
+from apps.base.cache import CHROME, get_versions
+from apps.base.images import image_names, load_responsive_images
+from apps.cms import models as cms_models
+
+# -------------------------------
+# "Обвязка" сайта: настройки, баннеры, меню категорий
+# -------------------------------
+# Хранится в памяти процесса вместе с версией "chrome", по которой
+# была собрана. Раз в SITE_CHROME_TTL секунд версия сверяется с общим
+# кэшем; если её подняли (правка в админке) — данные и готовые
+# шапка/подвал собираются заново. Страница из cached_page сверяет версию
+# сразу (request.chrome_version).
+_chrome = None
+
+
+def reset_site_chrome():
+    global _chrome
+    _chrome = None
+
+
+def _build_site_chrome(version):
+    data = {
+        "settings": base_models.Settings.objects.first(),
+        "banners": list(base_models.Banner.objects.all()),
+        "categories": list(cms_models.CategoryOrganization.objects.filter(is_active=True)),
+    }
+    objects = [data["settings"], *data["banners"], *data["categories"]]
+    data["responsive_images"] = load_responsive_images(image_names(filter(None, objects)))
+    # Шапка и подвал зависят только от этих данных — рендерим их один раз на версию
+    data["site_header"] = render_to_string("include/header.html", data)
+    data["site_footer"] = render_to_string("include/footer.html", data)
+    return {
+        "version": version,
+        "year": timezone.localdate().year,
+        "checked_at": time.monotonic(),
+        "data": data,
+    }
+
+
+def get_site_chrome(version=None):
+    """
+    version — версия "chrome", под которой cached_page положит страницу в
+    кэш. Если обвязка процесса собрана по более старой версии, она
+    пересобирается сразу, не дожидаясь SITE_CHROME_TTL: иначе под ключом
+    новой версии на сутки закэшировалась бы старая шапка.
+    """
+    global _chrome
+    chrome = _chrome
+    now = time.monotonic()
+    if (
+        chrome is not None
+        and (version is None or chrome["version"] >= version)
+        and now - chrome["checked_at"] < django_settings.SITE_CHROME_TTL
+    ):
+        return chrome["data"]
+
+    if version is None:
+        version = get_versions(CHROME)[CHROME]
+    if (
+        chrome is not None
+        and chrome["version"] >= version
+        and chrome["year"] == timezone.localdate().year
+    ):
+        chrome["checked_at"] = now
+        return chrome["data"]
+
+    _chrome = _build_site_chrome(version)
+    return _chrome["data"]
+
+
+def site_chrome(request):
+    return get_site_chrome(getattr(request, "chrome_version", None))
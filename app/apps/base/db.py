@@ -0,0 +1,60 @@
+import os
+
+from django.db import connections
+
+# -------------------------------
+# Соединения с PostgreSQL
+# -------------------------------
+# При DB_POOL у каждого процесса свой пул psycopg (соединения не
+# закрываются после запроса, а возвращаются в пул). Без пула
+# соединение живёт CONN_MAX_AGE секунд. В обоих случаях
+# CONN_HEALTH_CHECKS отбрасывает соединения, умершие после рестарта БД.
+
+
+def _pools():
+    """(alias, пул) уже созданных пулов; свойство connection.pool создало бы новый."""
+    for connection in connections.all(initialized_only=True):
+        pool = getattr(connection, "_connection_pools", {}).get(connection.alias)
+        if pool is not None:
+            yield connection, pool
+
+
+def close_connections():
+    """
+    Закрывает соединения и пулы текущего процесса. Вызывается перед fork
+    (gunicorn с preload_app, export_static), чтобы дочерние процессы не
+    унаследовали открытые сокеты родителя.
+    """
+    connections.close_all()
+    for connection, _pool in list(_pools()):
+        connection.close_pool()
+
+
+def pool_stats():
+    """
+    Статистика пулов текущего процесса: {alias: {...}}. wait_ms_avg —
+    среднее ожидание свободного соединения, utilization — доля занятых
+    соединений от max_size.
+    """
+    stats = {}
+    for connection, pool in _pools():
+        raw = pool.get_stats()
+        size = raw.get("pool_size", 0)
+        available = raw.get("pool_available", 0)
+        requests = raw.get("requests_num", 0)
+        stats[connection.alias] = {
+            "pid": os.getpid(),
+            "min_size": raw.get("pool_min"),
+            "max_size": raw.get("pool_max"),
+            "size": size,
+            "available": available,
+            "utilization": round((size - available) / raw["pool_max"], 3) if raw.get("pool_max") else 0,
+            "requests": requests,
+            "requests_waiting": raw.get("requests_waiting", 0),
+            "requests_queued": raw.get("requests_queued", 0),
+            "requests_errors": raw.get("requests_errors", 0),
+            "wait_ms_avg": round(raw.get("requests_wait_ms", 0) / requests, 2) if requests else 0,
+            "connections_lost": raw.get("connections_lost", 0),
+            "returns_bad": raw.get("returns_bad", 0),
+        }
+    return stats
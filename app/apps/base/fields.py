@@ -0,0 +1,38 @@
+import posixpath
+
+from django.conf import settings
+from django.db.models.fields.files import ImageFieldFile
+from django_resized import ResizedImageField
+from django_resized.forms import ResizedImageFieldFile
+
+# Каталог внутри upload_to, куда кладутся загрузки до обработки
+RAW_DIR = "raw"
+
+
+def is_raw(name):
+    """Файл ещё не обработан воркером (лежит в <upload_to>/raw/)."""
+    return bool(name) and posixpath.basename(posixpath.dirname(name)) == RAW_DIR
+
+
+class DeferredResizedImageFieldFile(ResizedImageFieldFile):
+    def save(self, name, content, save=True):
+        if not settings.IMAGE_PROCESSING_DEFERRED:
+            return super().save(name, content, save)
+        # Сохраняем как есть — уменьшение и конвертацию сделает process_images
+        ImageFieldFile.save(self, posixpath.join(RAW_DIR, posixpath.basename(name)), content, save)
+
+    def process(self, name, content):
+        """Обработка по параметрам поля (размер, качество, формат) — вызывает воркер."""
+        ResizedImageFieldFile.save(self, name, content, save=False)
+
+
+class DeferredResizedImageField(ResizedImageField):
+    """
+    ResizedImageField, который не пережимает картинку в запросе админки.
+
+    Загрузка сохраняется в <upload_to>/raw/ и ставится в очередь
+    (apps.base.models.ImageJob); воркер process_images приводит её к
+    size/quality/force_format поля и подменяет ссылки на готовый файл.
+    """
+
+    attr_class = DeferredResizedImageFieldFile
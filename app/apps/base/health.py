@@ -0,0 +1,70 @@
+import logging
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Проверки для оркестратора
+# -------------------------------
+# /healthz — процесс жив и отвечает (без БД и кэша).
+# /readyz  — можно пускать трафик: БД и кэш отвечают.
+# Middleware стоит первым в MIDDLEWARE: проверки не проходят через сессии,
+# редирект на HTTPS и проверку ALLOWED_HOSTS (оркестратор ходит по IP).
+HEALTH_PATH = "/healthz"
+READY_PATH = "/readyz"
+
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+def check_cache():
+    # get отсутствующего ключа — один круг до Redis, ничего не пишет
+    cache.get("readyz")
+
+
+READY_CHECKS = {
+    "database": check_database,
+    "cache": check_cache,
+}
+
+
+def readiness():
+    """{проверка: "ok" | текст ошибки} и общий итог."""
+    results = {}
+    for name, check in READY_CHECKS.items():
+        try:
+            check()
+        # Ошибки Redis не наследуют ConnectionError, поэтому ловим всё
+        except Exception as error:
+            logger.warning("readyz: %s недоступен: %s", name, error)
+            results[name] = str(error).strip() or error.__class__.__name__
+        else:
+            results[name] = "ok"
+    return all(result == "ok" for result in results.values()), results
+
+
+def _response(data, status=200):
+    response = JsonResponse(data, status=status)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+class HealthCheckMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == HEALTH_PATH:
+            return _response({"status": "ok"})
+        if request.path == READY_PATH:
+            ready, checks = readiness()
+            return _response(
+                {"status": "ok" if ready else "unavailable", "checks": checks},
+                status=200 if ready else 503,
+            )
+        return self.get_response(request)
@@ -0,0 +1,147 @@
+import logging
+import posixpath
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from apps.base.fields import DeferredResizedImageField, is_raw
+from apps.base.images import delete_variants, generate_variants, image_fields
+from apps.base.models import ImageJob
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Очередь обработки изображений
+# -------------------------------
+# Очередь — таблица ImageJob в той же БД: отдельный брокер не нужен.
+# Админка сохраняет загрузку как есть (DeferredResizedImageField) и
+# ставит задачу; воркер process_images забирает задачи через
+# SELECT ... FOR UPDATE SKIP LOCKED, поэтому воркеров может быть
+# несколько. Забранная задача откладывается на IMAGE_JOB_LEASE секунд:
+# если воркер упал посреди обработки, по истечении срока её возьмёт
+# другой. Файл пережимается вне транзакции, строки, которые ссылаются
+# на него, блокируются только на время подмены имени.
+
+
+def enqueue_images(instance):
+    """Ставит в очередь необработанные файлы объекта (вызывается из post_save)."""
+    for field in instance._meta.concrete_fields:
+        if not isinstance(field, DeferredResizedImageField):
+            continue
+        name = getattr(instance, field.attname)
+        name = getattr(name, "name", name)
+        if is_raw(name):
+            ImageJob.objects.get_or_create(
+                source=name,
+                defaults={"model": instance._meta.label, "field": field.name},
+            )
+
+
+def _claim_job():
+    """Следующая готовая задача, отложенная на время обработки; None, если таких нет."""
+    with transaction.atomic():
+        job = (
+            ImageJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ImageJob.PENDING, available_at__lte=timezone.now())
+            .order_by("available_at", "pk")
+            .first()
+        )
+        if job is not None:
+            job.available_at = timezone.now() + timedelta(seconds=settings.IMAGE_JOB_LEASE)
+            job.save(update_fields=["available_at"])
+    return job
+
+
+def process_next_job():
+    """
+    Обрабатывает одну задачу из очереди. Возвращает False, если готовых
+    к обработке задач нет.
+    """
+    job = _claim_job()
+    if job is None:
+        return False
+    try:
+        _process(job)
+    except Exception as e:
+        # Битый файл не должен останавливать воркер — задача уходит на повтор
+        logger.warning("Не удалось обработать %s: %s", job.source, e)
+        job.attempts += 1
+        job.error = str(e)
+        if job.attempts >= settings.IMAGE_JOB_MAX_ATTEMPTS:
+            job.status = ImageJob.FAILED
+        else:
+            # Повтор с нарастающей паузой: 1, 2, 4, 8... минут
+            job.available_at = timezone.now() + timedelta(minutes=2 ** (job.attempts - 1))
+        job.save(update_fields=["attempts", "error", "status", "available_at"])
+    return True
+
+
+def _references(source, lock=False):
+    """Объекты, которые ссылаются на файл (lock — с блокировкой строк)."""
+    for model, field in image_fields():
+        queryset = model._base_manager.filter(**{field.attname: source})
+        for obj in queryset.select_for_update() if lock else queryset:
+            yield obj, field
+
+
+def _discard(job):
+    """Файл успели заменить или объект удалён — обрабатывать нечего."""
+    source = job.source
+    with transaction.atomic():
+        job.delete()
+        transaction.on_commit(lambda: default_storage.delete(source))
+
+
+def _process(job):
+    if next(_references(job.source), None) is None:
+        _discard(job)
+        return
+
+    # Долгая часть — без транзакции и блокировок: пережатие по параметрам
+    # поля временного объекта нужной модели и варианты для srcset
+    field_file = getattr(apps.get_model(job.model)(), job.field)
+    with default_storage.open(job.source) as f:
+        content = ContentFile(f.read())
+    field_file.process(posixpath.basename(job.source), content)
+    new_name = field_file.name
+    try:
+        generate_variants(new_name)
+    except (OSError, Image.UnidentifiedImageError) as e:
+        logger.warning("Не удалось создать варианты для %s: %s", new_name, e)
+
+    try:
+        with transaction.atomic():
+            # Только строки, которые всё ещё ссылаются на исходный файл
+            references = list(_references(job.source, lock=True))
+            # save(), а не update(): сигналы сбросят кэш страниц и пересоберут снимки
+            for obj, field in references:
+                setattr(obj, field.attname, new_name)
+                update_fields = [field.attname]
+                if any(f.name == "updated_at" for f in obj._meta.concrete_fields):
+                    update_fields.append("updated_at")
+                obj.save(update_fields=update_fields)
+            job.delete()
+            source = job.source
+            transaction.on_commit(lambda: default_storage.delete(source))
+    except Exception:
+        _delete_processed(new_name)
+        raise
+    if not references:
+        # Пока файл пережимался, ссылки на него заменили
+        _delete_processed(new_name)
+
+
+def _delete_processed(name):
+    delete_variants(name)
+    default_storage.delete(name)
+
+
+def pending_count():
+    return ImageJob.objects.filter(status=ImageJob.PENDING).count()
+
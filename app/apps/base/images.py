@@ -0,0 +1,197 @@
+import hashlib
+import logging
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from PIL import Image, ImageOps
+
+try:
+    # Регистрирует AVIF в Pillow, если у сборки нет своего кодека
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+from apps.base.fields import is_raw
+from apps.base.models import ResponsiveImage
+
+logger = logging.getLogger(__name__)
+
+IMAGE_APPS = ("base", "cms")
+VARIANTS_DIR = "variants"
+FORMAT_EXTENSIONS = {"AVIF": "avif", "WEBP": "webp"}
+CACHE_KEY = "responsive-image:{}"
+
+
+# -------------------------------
+# Поля с изображениями
+# -------------------------------
+def image_fields():
+    """Пары (модель, поле) для всех ImageField в apps.base и apps.cms."""
+    for app_label in IMAGE_APPS:
+        for model in apps.get_app_config(app_label).get_models():
+            for field in model._meta.concrete_fields:
+                if isinstance(field, models.ImageField):
+                    yield model, field
+
+
+def image_references():
+    """
+    Все используемые файлы изображений: {имя файла: [(модель, поле), ...]}.
+    Один файл может встречаться в нескольких полях (копии услуг делят файлы).
+    """
+    references = {}
+    for model, field in image_fields():
+        names = (
+            model._default_manager.exclude(**{field.name: ""})
+            .exclude(**{f"{field.name}__isnull": True})
+            .order_by()
+            .values_list(field.name, flat=True)
+            .distinct()
+        )
+        for name in names:
+            references.setdefault(name, []).append((model, field))
+    return references
+
+
+def image_names(objects):
+    """Имена файлов во всех ImageField переданных объектов."""
+    names = set()
+    for obj in objects:
+        for field in obj._meta.concrete_fields:
+            if isinstance(field, models.ImageField):
+                value = getattr(obj, field.attname)
+                if value:
+                    names.add(value.name)
+    return names
+
+
+# -------------------------------
+# Генерация вариантов
+# -------------------------------
+def supported_formats():
+    """Форматы из RESPONSIVE_IMAGE_FORMATS, которые Pillow умеет сохранять."""
+    Image.init()
+    return {
+        fmt: quality
+        for fmt, quality in settings.RESPONSIVE_IMAGE_FORMATS.items()
+        if fmt in Image.SAVE
+    }
+
+
+def variant_name(source, width, fmt):
+    stem = posixpath.splitext(source)[0]
+    return f"{VARIANTS_DIR}/{stem}/{width}w.{FORMAT_EXTENSIONS[fmt]}"
+
+
+def _open_rgb(source, storage):
+    with storage.open(source) as f:
+        image = Image.open(f)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    return image
+
+
+def generate_variants(source, storage=default_storage):
+    """
+    Создаёт уменьшенные копии изображения всех ширин из
+    RESPONSIVE_IMAGE_WIDTHS (меньше исходной) во всех поддерживаемых
+    форматах и записывает их в ResponsiveImage.
+    """
+    image = _open_rgb(source, storage)
+    width, height = image.size
+    targets = sorted({w for w in settings.RESPONSIVE_IMAGE_WIDTHS if w < width} | {width})
+
+    variants = []
+    for target in targets:
+        resized = image
+        if target != width:
+            resized = image.resize((target, max(1, round(height * target / width))), Image.Resampling.LANCZOS)
+        for fmt, quality in supported_formats().items():
+            if target == width and source.lower().endswith(f".{FORMAT_EXTENSIONS[fmt]}"):
+                # Исходник уже в этом формате и этой ширины
+                name = source
+            else:
+                buffer = BytesIO()
+                resized.save(buffer, format=fmt, quality=quality)
+                name = variant_name(source, target, fmt)
+                if storage.exists(name):
+                    storage.delete(name)
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+            variants.append({
+                "name": name,
+                "format": FORMAT_EXTENSIONS[fmt],
+                "width": resized.size[0],
+                "height": resized.size[1],
+            })
+
+    record, _created = ResponsiveImage.objects.update_or_create(
+        source=source,
+        defaults={"width": width, "height": height, "variants": variants},
+    )
+    cache.delete(_cache_key(source))
+    return record
+
+
+def delete_variants(source, storage=default_storage):
+    """Удаляет запись ResponsiveImage и файлы вариантов (кроме самого исходника)."""
+    record = ResponsiveImage.objects.filter(source=source).first()
+    if record is None:
+        return
+    for variant in record.variants:
+        if variant["name"] != source:
+            storage.delete(variant["name"])
+    record.delete()
+    cache.delete(_cache_key(source))
+
+
+def ensure_variants(instance):
+    """Генерирует варианты для новых изображений объекта (уже обработанные пропускаются)."""
+    # Необработанные загрузки получат варианты после process_images
+    names = {name for name in image_names([instance]) if not is_raw(name)}
+    if not names:
+        return
+    existing = set(ResponsiveImage.objects.filter(source__in=names).values_list("source", flat=True))
+    for name in names - existing:
+        try:
+            generate_variants(name)
+        except (OSError, Image.UnidentifiedImageError) as e:
+            logger.warning("Не удалось создать варианты для %s: %s", name, e)
+
+
+# -------------------------------
+# Поиск вариантов при рендере
+# -------------------------------
+def _cache_key(source):
+    return CACHE_KEY.format(hashlib.md5(source.encode()).hexdigest())
+
+
+def load_responsive_images(names):
+    """
+    Варианты для набора файлов одним запросом: {имя файла: ResponsiveImage}.
+    Файлы без вариантов тоже попадают в словарь (со значением None).
+    """
+    names = {name for name in names if name}
+    if not names:
+        return {}
+    records = dict.fromkeys(names)
+    records.update((record.source, record) for record in ResponsiveImage.objects.filter(source__in=names))
+    return records
+
+
+def get_responsive_image(source):
+    """Варианты одного файла через общий кэш (None, если их ещё нет)."""
+    key = _cache_key(source)
+    missing = object()
+    record = cache.get(key, missing)
+    if record is missing:
+        record = ResponsiveImage.objects.filter(source=source).first()
+        cache.set(key, record, settings.PAGE_CACHE_TIMEOUT)
+    return record
@@ -0,0 +1,82 @@
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.base.assets import build_bundles
+from apps.base.boot import (
+    boot_lock,
+    pending_migrations,
+    save_static_fingerprint,
+    static_fingerprint,
+    static_is_current,
+    wait_for_database,
+)
+from apps.base.db import close_connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Подготовка контейнера к запуску: ждёт БД, применяет миграции и собирает "
+        "статику с бандлами CSS/JS, только если они изменились. Миграции не создаёт."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", default=DEFAULT_DB_ALIAS,
+            help="База данных (по умолчанию default)",
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=settings.BOOT_DB_TIMEOUT,
+            help="Сколько секунд ждать БД (по умолчанию BOOT_DB_TIMEOUT)",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Запустить migrate и collectstatic без проверок",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        alias = options["database"]
+
+        try:
+            attempts = wait_for_database(alias, timeout=options["timeout"])
+        except TimeoutError as error:
+            raise CommandError(str(error))
+        self.stdout.write(f"БД доступна (попыток: {attempts}, {self._since(started)})")
+
+        try:
+            with boot_lock(alias):
+                self.migrate(alias, options["force"])
+                self.collectstatic(options["force"])
+        finally:
+            # boot — отдельный процесс, но с пулом соединения лучше закрыть явно
+            close_connections()
+
+        self.stdout.write(self.style.SUCCESS(f"Готово за {self._since(started)}"))
+
+    def migrate(self, alias, force):
+        step = time.monotonic()
+        plan = pending_migrations(alias)
+        if not plan and not force:
+            self.stdout.write("Миграции: новых нет, migrate пропущен")
+            return
+        call_command("migrate", database=alias, interactive=False, verbosity=0)
+        self.stdout.write(f"Миграции: применено {len(plan)} ({self._since(step)})")
+
+    def collectstatic(self, force):
+        step = time.monotonic()
+        fingerprint = static_fingerprint()
+        if static_is_current(fingerprint) and not force:
+            self.stdout.write("Статика: без изменений, collectstatic пропущен")
+            return
+        call_command("collectstatic", interactive=False, verbosity=0)
+        manifest = build_bundles()
+        save_static_fingerprint(fingerprint)
+        self.stdout.write(f"Статика: собрана, бандлов: {len(manifest)} ({self._since(step)})")
+
+    @staticmethod
+    def _since(moment):
+        return f"{time.monotonic() - moment:.1f} с"
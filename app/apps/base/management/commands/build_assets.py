@@ -0,0 +1,28 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.base.assets import COMPRESSORS, build_bundles
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает бандлы CSS/JS (ASSET_BUNDLES): склейка, минификация, имя с хэшем "
+        "содержимого и готовые .gz/.br. При старте контейнера их собирает boot."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        manifest = build_bundles()
+        root = Path(settings.ASSET_ROOT)
+        for name, filename in sorted(manifest.items()):
+            sizes = ", ".join(
+                f"{suffix or 'raw'} {(root / (filename + suffix)).stat().st_size / 1024:.1f} КБ"
+                for suffix in ("", *COMPRESSORS)
+            )
+            self.stdout.write(f"{name} -> {settings.ASSET_URL}{filename} ({sizes})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Собрано бандлов: {len(manifest)} ({time.monotonic() - started:.1f} с)"
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from apps.base.fields import is_raw
+from apps.base.images import generate_variants, image_references
+from apps.base.models import ResponsiveImage
+
+
+class Command(BaseCommand):
+    help = "Создаёт уменьшенные копии (AVIF/WEBP) для srcset у уже загруженных изображений"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Пересоздать варианты и для уже обработанных файлов",
+        )
+
+    def handle(self, *args, **options):
+        # Необработанные загрузки получат варианты от process_images
+        names = {name for name in image_references() if not is_raw(name)}
+        if not options["force"]:
+            names -= set(ResponsiveImage.objects.values_list("source", flat=True))
+
+        created = failed = 0
+        for name in sorted(names):
+            try:
+                record = generate_variants(name)
+            except (OSError, Image.UnidentifiedImageError) as e:
+                failed += 1
+                self.stderr.write(f"{name}: {e}")
+                continue
+            created += 1
+            self.stdout.write(f"{name}: {len(record.variants)} вариантов")
+
+        self.stdout.write(self.style.SUCCESS(f"Готово: {created}, ошибок: {failed}"))
@@ -0,0 +1,187 @@
+import json
+import os
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+from PIL import Image
+
+from apps.base.cache import CATALOG, CHROME, bump_on_commit, category_scope, service_scope
+from apps.base.fields import is_raw
+from apps.base.images import delete_variants, generate_variants, image_references
+from apps.base.reencode import reencode
+from apps.cms import models as cms_models
+from apps.cms.snapshots import rebuild_snapshots
+
+TMP_SUFFIX = ".optimize-tmp"
+CHECKPOINT_EVERY = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Пережимает уже загруженные изображения (все ImageField apps.base и apps.cms) "
+        "в WEBP с меньшим качеством и размером. Файлы обрабатываются параллельно, "
+        "прогресс сохраняется в checkpoint, поэтому прерванный запуск можно продолжить."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quality", type=int, default=80, help="Качество WEBP (по умолчанию 80)")
+        parser.add_argument(
+            "--max-size", type=int, default=1920,
+            help="Максимальная длина большей стороны в пикселях (по умолчанию 1920)",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Число процессов (по умолчанию — число ядер)",
+        )
+        parser.add_argument(
+            "--min-savings", type=float, default=10,
+            help="Заменять файл, только если он уменьшится хотя бы на столько процентов",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Файл прогресса (по умолчанию MEDIA_ROOT/.optimize_media.json)",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Ничего не менять, только посчитать ожидаемую экономию",
+        )
+
+    def handle(self, *args, **options):
+        if not 1 <= options["quality"] <= 100:
+            raise CommandError("--quality должно быть от 1 до 100")
+        dry_run = options["dry_run"]
+        checkpoint_path = options["checkpoint"] or default_storage.path(".optimize_media.json")
+
+        done = {} if dry_run else self._load_checkpoint(checkpoint_path)
+        references = image_references()
+        # Уже обработанные файлы и их замены повторно не трогаем,
+        # загрузки из очереди process_images — тоже
+        finished = set(done) | {name for name in done.values() if name}
+        pending = sorted(name for name in references if name not in finished and not is_raw(name))
+
+        jobs = []
+        for name in pending:
+            path = default_storage.path(name)
+            if not os.path.exists(path):
+                self.stderr.write(f"{name}: файл не найден")
+                continue
+            jobs.append((
+                name, path, options["quality"], options["max_size"],
+                None if dry_run else path + TMP_SUFFIX,
+            ))
+        self.stdout.write(f"К обработке: {len(jobs)} из {len(references)} файлов")
+
+        threshold = 1 - options["min_savings"] / 100
+        stats = {"files": 0, "replaced": 0, "failed": 0, "original": 0, "optimized": 0}
+        try:
+            with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+                for result in pool.map(reencode, jobs, chunksize=8):
+                    name = result["name"]
+                    tmp_path = default_storage.path(name) + TMP_SUFFIX
+                    stats["files"] += 1
+                    if result["error"]:
+                        stats["failed"] += 1
+                        self.stderr.write(f"{name}: {result['error']}")
+                        new_name = None
+                    elif result["optimized"] > result["original"] * threshold:
+                        new_name = None
+                    else:
+                        stats["original"] += result["original"]
+                        stats["optimized"] += result["optimized"]
+                        stats["replaced"] += 1
+                        new_name = None if dry_run else self._replace(name, tmp_path, references[name])
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+
+                    if not dry_run:
+                        done[name] = new_name
+                        if stats["files"] % CHECKPOINT_EVERY == 0:
+                            self._save_checkpoint(checkpoint_path, done)
+        finally:
+            if not dry_run:
+                self._save_checkpoint(checkpoint_path, done)
+
+        saved = stats["original"] - stats["optimized"]
+        percent = saved * 100 / stats["original"] if stats["original"] else 0
+        verb = "Будет заменено" if dry_run else "Заменено"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb}: {stats['replaced']} из {stats['files']}, ошибок: {stats['failed']}. "
+            f"{filesizeformat(stats['original'])} → {filesizeformat(stats['optimized'])}, "
+            f"экономия {filesizeformat(saved)} ({percent:.1f}%)"
+        ))
+
+    def _replace(self, name, tmp_path, fields):
+        """
+        Кладёт пережатый файл под новым именем и переключает на него все
+        ссылки в одной транзакции. Новое имя нужно, чтобы браузеры и CDN
+        не отдавали старую копию из кэша. В той же транзакции пересобираются
+        снимки затронутых услуг, версии кэша поднимаются после фиксации, а
+        старый файл удаляется только после неё: страница, отрисованная по
+        старым данным, не ссылается на удалённый файл. При ошибке остаётся
+        старый файл, а новый удаляется.
+        """
+        new_name = default_storage.get_available_name(posixpath.splitext(name)[0] + ".webp")
+        os.replace(tmp_path, default_storage.path(new_name))
+        try:
+            # Варианты — до переключения: новые страницы сразу получают srcset
+            generate_variants(new_name)
+        except (OSError, Image.UnidentifiedImageError) as e:
+            self.stderr.write(f"{new_name}: варианты не созданы: {e}")
+        try:
+            with transaction.atomic():
+                service_ids = set()
+                for model, field in fields:
+                    queryset = model._base_manager.filter(**{field.attname: name})
+                    service_ids.update(self._service_ids(model, queryset))
+                    values = {field.attname: new_name}
+                    if any(f.name == "updated_at" for f in model._meta.concrete_fields):
+                        values["updated_at"] = timezone.now()
+                    queryset.update(**values)
+                # update() не шлёт сигналы — снимки и версии кэша обновляем сами
+                services = cms_models.Service.objects.filter(pk__in=service_ids)
+                rebuild_snapshots(services)
+                scopes = [service_scope(slug) for slug in services.values_list("slug", flat=True)]
+                scopes += [
+                    category_scope(pk)
+                    for pk in set(services.values_list("organization_id", flat=True))
+                ]
+                bump_on_commit(CHROME, CATALOG, *scopes)
+                transaction.on_commit(lambda: self._delete_file(name))
+        except Exception:
+            self._delete_file(new_name)
+            raise
+
+        self.stdout.write(f"{name} → {new_name}")
+        return new_name
+
+    def _service_ids(self, model, queryset):
+        """Услуги, в снимки которых входит файл из queryset'а."""
+        if model is cms_models.Service:
+            return queryset.values_list("pk", flat=True)
+        if model is cms_models.CategoryOrganization:
+            return cms_models.Service.objects.filter(organization__in=queryset).values_list("pk", flat=True)
+        if any(f.name == "service" for f in model._meta.concrete_fields):
+            return queryset.values_list("service_id", flat=True)
+        # Настройки и баннеры — часть "обвязки", её сбрасывает версия chrome
+        return []
+
+    def _delete_file(self, name):
+        delete_variants(name)
+        default_storage.delete(name)
+
+    def _load_checkpoint(self, path):
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["done"]
+
+    def _save_checkpoint(self, path, done):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"done": done}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -0,0 +1,41 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.base.image_queue import pending_count, process_next_job
+
+
+class Command(BaseCommand):
+    help = "Воркер очереди изображений: уменьшает и конвертирует загрузки из админки"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Обработать всё, что есть в очереди, и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f"В очереди: {pending_count()}")
+        processed = 0
+        while not self.stopping:
+            close_old_connections()
+            if process_next_job():
+                processed += 1
+                continue
+            if options["once"]:
+                break
+            time.sleep(settings.IMAGE_WORKER_POLL_INTERVAL)
+
+        self.stdout.write(self.style.SUCCESS(f"Обработано задач: {processed}"))
+
+    def _stop(self, signum, frame):
+        # Текущая задача дорабатывается, новая не берётся
+        self.stopping = True
@@ -1,15 +1,17 @@
 from django.db import models
-from django_resized import ResizedImageField 
+from django.utils import timezone
+from apps.base.fields import DeferredResizedImageField
 # Create your models here.
 class Settings(models.Model):
     title = models.CharField(max_length=255, verbose_name="Название сайта")
     descriptions = models.TextField(verbose_name="Информационный текст", blank=True, null=True)
-    logo = ResizedImageField(force_format="WEBP", quality=100,upload_to="logo/", verbose_name="Логотип")
-    icon = ResizedImageField(force_format="WEBP", quality=100,upload_to="logo/", verbose_name="Иконка сайта")
+    logo = DeferredResizedImageField(force_format="WEBP", quality=100,upload_to="logo/", verbose_name="Логотип")
+    icon = DeferredResizedImageField(force_format="WEBP", quality=100,upload_to="logo/", verbose_name="Иконка сайта")
     phone = models.CharField(max_length=255, verbose_name='Телефон номер')
     email = models.EmailField(max_length=255, verbose_name='Почта', blank=True, null=True)
     location = models.CharField(max_length=255, verbose_name='Адрес')
     instagram = models.URLField(verbose_name='Instagram URL', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
 
     def __str__(self):
         return self.title
@@ -21,11 +23,56 @@ class Settings(models.Model):
 class Banner(models.Model):
     title = models.CharField(max_length=255, verbose_name="Название")
     subtitle = models.CharField(max_length=255, verbose_name="Подзаголовок", blank=True, null=True)
-    image = ResizedImageField(force_format="WEBP", quality=100,upload_to="banner/", verbose_name="Фотография")
+    image = DeferredResizedImageField(force_format="WEBP", quality=100,upload_to="banner/", verbose_name="Фотография")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
     
     def __str__(self):
         return self.title
     
     class Meta:
         verbose_name = "2) Баннер"
-        verbose_name_plural = "2) Баннеры"
\ No newline at end of file
+        verbose_name_plural = "2) Баннеры"
+
+class ResponsiveImage(models.Model):
+    """Набор уменьшенных копий (AVIF/WEBP) загруженного изображения для srcset."""
+    source = models.CharField(max_length=255, unique=True, verbose_name="Исходный файл")
+    width = models.PositiveIntegerField(verbose_name="Ширина")
+    height = models.PositiveIntegerField(verbose_name="Высота")
+    # [{"name": "variants/.../640w.avif", "format": "avif", "width": 640, "height": 360}, ...]
+    variants = models.JSONField(default=list, verbose_name="Варианты")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    def __str__(self):
+        return self.source
+
+    class Meta:
+        verbose_name = "Адаптивное изображение"
+        verbose_name_plural = "Адаптивные изображения"
+
+
+class ImageJob(models.Model):
+    """Задача очереди: довести загруженный "сырой" файл до параметров поля."""
+    PENDING = "pending"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "В очереди"),
+        (FAILED, "Ошибка"),
+    ]
+
+    source = models.CharField(max_length=255, unique=True, verbose_name="Исходный файл")
+    # Поле, по параметрам которого (size/quality/force_format) обрабатывается файл
+    model = models.CharField(max_length=100, verbose_name="Модель")
+    field = models.CharField(max_length=100, verbose_name="Поле")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Статус")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попыток")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    available_at = models.DateTimeField(default=timezone.now, verbose_name="Доступна с")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+
+    def __str__(self):
+        return self.source
+
+    class Meta:
+        verbose_name = "Обработка изображения"
+        verbose_name_plural = "Обработка изображений"
+        indexes = [models.Index(fields=["status", "available_at"], name="base_imagejob_queue_idx")]
@@ -0,0 +1,40 @@
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# Модуль без импортов Django: функции выполняются в дочерних процессах
+# пула (optimize_media), которым не нужно поднимать приложение.
+
+
+def reencode(job):
+    """
+    Пережимает одно изображение в WEBP с заданным качеством, уменьшая
+    большую сторону до max_size.
+
+    job — (name, path, quality, max_size, output_path). Если output_path
+    задан, результат записывается туда; иначе (пробный прогон) только
+    считается размер. Возвращает словарь с исходным и новым размером
+    или текстом ошибки.
+    """
+    name, path, quality, max_size, output_path = job
+    result = {"name": name, "original": 0, "optimized": 0, "error": None}
+    try:
+        result["original"] = os.path.getsize(path)
+        with Image.open(path) as image:
+            image.load()
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        if max(image.size) > max_size:
+            image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+        buffer = BytesIO()
+        image.save(buffer, format="WEBP", quality=quality, method=6)
+        result["optimized"] = buffer.tell()
+        if output_path and result["optimized"] < result["original"]:
+            with open(output_path, "wb") as f:
+                f.write(buffer.getbuffer())
+    except (OSError, Image.UnidentifiedImageError) as e:
+        result["error"] = str(e)
+    return result
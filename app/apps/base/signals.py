@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.base import models as base_models
+from apps.base.cache import CHROME, bump_on_commit
+from apps.base.context_processors import reset_site_chrome
+from apps.base.image_queue import enqueue_images
+from apps.base.images import ensure_variants, image_fields
+
+
+@receiver([post_save, post_delete], sender=base_models.Settings)
+@receiver([post_save, post_delete], sender=base_models.Banner)
+def invalidate_chrome(sender, instance, **kwargs):
+    """Настройки и баннеры выводятся на всех страницах."""
+    bump_on_commit(CHROME)
+    transaction.on_commit(reset_site_chrome)
+
+
+def process_uploaded_images(sender, instance, raw=False, **kwargs):
+    """
+    Новые загрузки ставятся в очередь process_images; для уже
+    обработанных файлов сразу создаются уменьшенные копии для srcset.
+    """
+    if not raw:
+        enqueue_images(instance)
+        ensure_variants(instance)
+
+
+for image_model in {model for model, _field in image_fields()}:
+    post_save.connect(process_uploaded_images, sender=image_model)
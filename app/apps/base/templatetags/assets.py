@@ -0,0 +1,19 @@
+from django import template
+from django.utils.html import format_html_join
+
+from apps.base.assets import bundle_urls
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    """
+    {% bundle "site.css" %} -> <link rel="stylesheet">, {% bundle "site.js" %}
+    -> <script defer>. Собранный бандл — один тег, без сборки — по тегу на исходник.
+    """
+    if name.endswith(".css"):
+        tag = '<link rel="stylesheet" href="{}">'
+    else:
+        tag = '<script src="{}" defer></script>'
+    return format_html_join("\n", tag, ((url,) for url in bundle_urls(name)))
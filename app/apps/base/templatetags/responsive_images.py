@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from apps.base.fields import is_raw
+from apps.base.images import get_responsive_image
+
+register = template.Library()
+
+
+def _file(image):
+    """
+    ImageField или словарь {"name", "url"} из снимка услуги (ServiceSnapshot):
+    у обоих после этого есть .name и .url.
+    """
+    if isinstance(image, dict):
+        return SimpleNamespace(**image)
+    return image
+
+
+def _lookup(context, image):
+    preloaded = context.get("responsive_images", {})
+    if image.name in preloaded:
+        return preloaded[image.name]
+    return get_responsive_image(image.name)
+
+
+def _srcset(record, fmt):
+    return ", ".join(
+        f"{default_storage.url(variant['name'])} {variant['width']}w"
+        for variant in record.variants
+        if variant["format"] == fmt
+    )
+
+
+@register.filter
+def image_url(image):
+    """URL файла или заглушки, пока загрузка ждёт обработки: {{ settings.logo|image_url }}"""
+    if not image:
+        return ""
+    image = _file(image)
+    if is_raw(image.name):
+        return static(settings.IMAGE_PLACEHOLDER)
+    return image.url
+
+
+@register.simple_tag(takes_context=True)
+def responsive_image(context, image, sizes="100vw", **attrs):
+    """
+    <img> с srcset/sizes/width/height для ImageField.
+
+    Если для файла есть AVIF-варианты, оборачивается в <picture> с
+    <source type="image/avif">; без вариантов выводится обычный <img>.
+    Варианты берутся из context["responsive_images"] (загружены пачкой
+    во view), иначе — из общего кэша. Пока загрузка ждёт обработки
+    (process_images), выводится заглушка IMAGE_PLACEHOLDER.
+
+        {% responsive_image item.image sizes="92px" class="..." alt=item.name %}
+    """
+    if not image:
+        return ""
+    image = _file(image)
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+
+    record = None if is_raw(image.name) else _lookup(context, image)
+    if record is None:
+        return format_html(
+            '<img src="{}"{}>',
+            image_url(image),
+            format_html_join("", ' {}="{}"', attrs.items()),
+        )
+
+    img = format_html(
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}"{}>',
+        image.url,
+        _srcset(record, "webp"),
+        sizes,
+        record.width,
+        record.height,
+        format_html_join("", ' {}="{}"', attrs.items()),
+    )
+    avif = _srcset(record, "avif")
+    if not avif:
+        return img
+    # display: contents — <picture> не влияет на вёрстку, стили <img> работают как раньше
+    return format_html(
+        '<picture style="display: contents"><source type="image/avif" srcset="{}" sizes="{}">{}</picture>',
+        avif,
+        sizes,
+        img,
+    )
+
+
+@register.simple_tag(takes_context=True)
+def responsive_background(context, image, width=1280):
+    """
+    Значение style для фоновой картинки: вариант нужной ширины, AVIF
+    через image-set() и обычный url() для старых браузеров.
+
+        <section{% if service.cover_image %} style="{% responsive_background service.cover_image %}"{% endif %}>
+    """
+    if not image:
+        return ""
+    image = _file(image)
+    record = None if is_raw(image.name) else _lookup(context, image)
+    if record is None:
+        return format_html("background-image: url('{}');", image_url(image))
+
+    def pick(fmt):
+        candidates = sorted(
+            (v for v in record.variants if v["format"] == fmt), key=lambda v: v["width"]
+        )
+        for variant in candidates:
+            if variant["width"] >= width:
+                return default_storage.url(variant["name"])
+        return default_storage.url(candidates[-1]["name"]) if candidates else None
+
+    webp = pick("webp") or image.url
+    avif = pick("avif")
+    if not avif:
+        return format_html("background-image: url('{}');", webp)
+    return format_html(
+        "background-image: url('{}'); "
+        "background-image: image-set(url('{}') type('image/avif'), url('{}') type('image/webp'));",
+        webp, avif, webp,
+    )
@@ -1,3 +1,517 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import brotli
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from apps.base import assets, boot
+from apps.base.cache import CATALOG, CHROME, bump_versions, get_versions
+from apps.base import models as base_models
+from apps.base.context_processors import reset_site_chrome
+from apps.base.db import close_connections, pool_stats
+from apps.base.fields import DeferredResizedImageFieldFile
+from apps.base.image_queue import process_next_job
+from apps.base.images import supported_formats
+from apps.cms import models as cms_models
+
+
+def uploaded_image(name="photo.jpg", size=(1600, 900), noise=False):
+    buffer = BytesIO()
+    image = Image.effect_noise(size, 64).convert("RGB") if noise else Image.new("RGB", size, (40, 120, 200))
+    image.save(buffer, format="JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+def processed_banner(**kwargs):
+    """Баннер с загрузкой, уже обработанной воркером process_images."""
+    banner = base_models.Banner.objects.create(**kwargs)
+    while process_next_job():
+        pass
+    banner.refresh_from_db()
+    return banner
+
+
+class SiteChromeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.settings = base_models.Settings.objects.create(
+            title="Cleaning", logo="logo/logo.webp", icon="logo/icon.webp",
+            phone="+996 000 000", location="Бишкек",
+        )
+        cms_models.CategoryOrganization.objects.create(name="Офисы", image="category_image/office.webp")
+
+    def setUp(self):
+        cache.clear()
+        reset_site_chrome()
+
+    def test_chrome_is_loaded_once_per_process(self):
+        # settings, banners, categories, варианты изображений
+        with self.assertNumQueries(4):
+            self.client.get(reverse("index-page"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("category-page"))
+        self.assertContains(response, "Офисы")
+        self.assertContains(response, "/media/logo/logo.webp")
+
+    def test_settings_save_invalidates_chrome(self):
+        self.client.get(reverse("index-page"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.settings.title = "Cleaning KIKI"
+            self.settings.save()
+        self.assertContains(self.client.get(reverse("category-page")), "Cleaning KIKI")
+
+
+    @override_settings(SITE_CHROME_TTL=3600)
+    def test_page_cached_under_new_version_gets_new_chrome(self):
+        self.client.get(reverse("index-page"))
+        # Правка в другом воркере: версия в общем кэше поднята, а обвязка
+        # этого процесса не сброшена и по TTL ещё не перепроверялась
+        base_models.Settings.objects.update(title="Cleaning KIKI")
+        bump_versions(CHROME)
+
+        self.assertContains(self.client.get(reverse("category-page")), "Cleaning KIKI")
+        reset_site_chrome()
+        # И из кэша страниц под новой версией отдаётся новая шапка
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(reverse("category-page")), "Cleaning KIKI")
+
+
+class ResponsiveImageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, RESPONSIVE_IMAGE_WIDTHS=[320, 640, 2400])
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_upload_generates_smaller_variants(self):
+        banner = processed_banner(title="Hero", image=uploaded_image())
+        record = base_models.ResponsiveImage.objects.get(source=banner.image.name)
+        self.assertEqual((record.width, record.height), (1600, 900))
+
+        widths = sorted({v["width"] for v in record.variants})
+        self.assertEqual(widths, [320, 640, 1600])
+        for variant in record.variants:
+            self.assertTrue(default_storage.exists(variant["name"]))
+        small = next(v for v in record.variants if v["width"] == 320 and v["format"] == "webp")
+        self.assertEqual(small["height"], 180)
+        self.assertLess(default_storage.size(small["name"]), default_storage.size(banner.image.name))
+
+    def test_tag_renders_srcset_with_dimensions(self):
+        banner = processed_banner(title="Hero", image=uploaded_image())
+        html = Template(
+            '{% load responsive_images %}{% responsive_image image sizes="50vw" alt="Hero" class="hero-bg" %}'
+        ).render(Context({"image": banner.image}))
+        self.assertIn('width="1600" height="900"', html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn("320w", html)
+        self.assertIn('class="hero-bg"', html)
+        if "AVIF" in supported_formats():
+            self.assertIn('<source type="image/avif"', html)
+
+    def test_tag_without_variants_falls_back_to_plain_img(self):
+        banner = base_models.Banner(title="Hero", image="banner/missing.webp")
+        html = Template(
+            '{% load responsive_images %}{% responsive_image image alt="x" %}'
+        ).render(Context({"image": banner.image}))
+        self.assertEqual(html, '<img src="/media/banner/missing.webp" alt="x" loading="lazy" decoding="async">')
+
+
+class OptimizeMediaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, RESPONSIVE_IMAGE_WIDTHS=[320])
+        override.enable()
+        self.addCleanup(override.disable)
+        # Сохранено django_resized с quality=100 — как в рабочей медиатеке
+        self.banner = processed_banner(
+            title="Hero", image=uploaded_image(size=(1200, 800), noise=True)
+        )
+        self.original = self.banner.image.name
+
+    def optimize(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("optimize_media", "--workers=1", "--quality=50", "--max-size=600", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_savings_without_changes(self):
+        size = default_storage.size(self.original)
+        output = self.optimize("--dry-run")
+
+        self.assertIn("Будет заменено: 1 из 1", output)
+        self.banner.refresh_from_db()
+        self.assertEqual(self.banner.image.name, self.original)
+        self.assertEqual(default_storage.size(self.original), size)
+        self.assertFalse(default_storage.exists(".optimize_media.json"))
+
+    def test_reencodes_and_switches_references(self):
+        size = default_storage.size(self.original)
+        self.optimize()
+
+        self.banner.refresh_from_db()
+        new_name = self.banner.image.name
+        self.assertNotEqual(new_name, self.original)
+        self.assertFalse(default_storage.exists(self.original))
+        self.assertLess(default_storage.size(new_name), size)
+        with default_storage.open(new_name) as f:
+            self.assertEqual(Image.open(f).size, (600, 400))
+        self.assertTrue(base_models.ResponsiveImage.objects.filter(source=new_name).exists())
+        self.assertFalse(base_models.ResponsiveImage.objects.filter(source=self.original).exists())
+
+        with open(os.path.join(self.media_root, ".optimize_media.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["done"], {self.original: new_name})
+
+    def test_snapshots_switch_before_old_file_is_deleted(self):
+        category = cms_models.CategoryOrganization.objects.create(name="Офисы")
+        service = cms_models.Service.objects.create(organization=category, title="Office", cover_image=self.original)
+        catalog_version = get_versions(CATALOG)[CATALOG]
+        out = StringIO()
+        with self.captureOnCommitCallbacks() as callbacks:
+            call_command("optimize_media", "--workers=1", "--quality=50", "--max-size=600", stdout=out)
+        new_name = cms_models.Service.objects.get(pk=service.pk).cover_image.name
+
+        # До фиксации старый файл на месте, а снимок уже ссылается на новый
+        self.assertTrue(default_storage.exists(self.original))
+        payload = cms_models.ServiceSnapshot.objects.get(service=service).payload
+        self.assertEqual(payload["cover_image"]["name"], new_name)
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(default_storage.exists(self.original))
+        self.assertNotEqual(get_versions(CATALOG)[CATALOG], catalog_version)
+
+    def test_resumes_from_checkpoint(self):
+        self.optimize()
+        self.assertIn("К обработке: 0 из 1", self.optimize())
+
+
+class ImageQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, RESPONSIVE_IMAGE_WIDTHS=[320])
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_upload_is_stored_raw_and_queued(self):
+        banner = base_models.Banner.objects.create(title="Hero", image=uploaded_image(size=(2400, 1200)))
+
+        self.assertEqual(banner.image.name, "banner/raw/photo.jpg")
+        self.assertTrue(base_models.ImageJob.objects.filter(source=banner.image.name).exists())
+        self.assertFalse(base_models.ResponsiveImage.objects.exists())
+        html = Template('{% load responsive_images %}{% responsive_image image alt="x" %}').render(
+            Context({"image": banner.image})
+        )
+        self.assertIn('src="/static/public/placeholder.svg"', html)
+
+    def test_worker_processes_file_and_switches_all_references(self):
+        banner = base_models.Banner.objects.create(title="Hero", image=uploaded_image(size=(2400, 1200)))
+        raw = banner.image.name
+        # Копия делит файл с оригиналом (как копии услуг)
+        copy = base_models.Banner.objects.create(title="Copy", image=raw)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(process_next_job())
+        self.assertFalse(process_next_job())
+
+        banner.refresh_from_db()
+        copy.refresh_from_db()
+        self.assertEqual(banner.image.name, "banner/photo.webp")
+        self.assertEqual(copy.image.name, banner.image.name)
+        with default_storage.open(banner.image.name) as f:
+            self.assertEqual(Image.open(f).size, (1920, 960))
+        self.assertFalse(default_storage.exists(raw))
+        self.assertFalse(base_models.ImageJob.objects.exists())
+        self.assertTrue(base_models.ResponsiveImage.objects.filter(source=banner.image.name).exists())
+
+    def test_reference_changed_during_encode_is_kept(self):
+        banner = base_models.Banner.objects.create(title="Hero", image=uploaded_image())
+        raw = banner.image.name
+        process = DeferredResizedImageFieldFile.process
+
+        def replace_while_encoding(field_file, name, content):
+            # Пока файл пережимается, строки не заблокированы: админка успевает сохранить другое
+            base_models.Banner.objects.filter(pk=banner.pk).update(image="banner/other.webp")
+            process(field_file, name, content)
+
+        with mock.patch.object(DeferredResizedImageFieldFile, "process", replace_while_encoding):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertTrue(process_next_job())
+
+        banner.refresh_from_db()
+        self.assertEqual(banner.image.name, "banner/other.webp")
+        self.assertFalse(base_models.ImageJob.objects.exists())
+        self.assertFalse(default_storage.exists("banner/photo.webp"))
+        self.assertFalse(base_models.ResponsiveImage.objects.filter(source="banner/photo.webp").exists())
+        self.assertFalse(default_storage.exists(raw))
+
+    def test_claimed_job_is_leased(self):
+        base_models.Banner.objects.create(title="Hero", image=uploaded_image())
+        with mock.patch("apps.base.image_queue._process", side_effect=SystemExit):
+            # Воркер "упал" посреди задачи: другой не берёт её до конца срока
+            with self.assertRaises(SystemExit):
+                process_next_job()
+        self.assertFalse(process_next_job())
+        base_models.ImageJob.objects.update(available_at=timezone.now())
+        self.assertTrue(process_next_job())
+        self.assertFalse(base_models.ImageJob.objects.exists())
+
+    def test_broken_file_is_retried_later(self):
+        banner = base_models.Banner.objects.create(title="Hero", image=uploaded_image())
+        with default_storage.open(banner.image.name, "wb") as f:
+            f.write(b"not an image")
+
+        self.assertTrue(process_next_job())
+        job = base_models.ImageJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (base_models.ImageJob.PENDING, 1))
+        self.assertTrue(job.error)
+        # Повтор отложен — сразу задача не выдаётся
+        self.assertFalse(process_next_job())
+
+    @override_settings(IMAGE_PROCESSING_DEFERRED=False)
+    def test_synchronous_mode(self):
+        banner = base_models.Banner.objects.create(title="Hero", image=uploaded_image())
+        self.assertEqual(banner.image.name, "banner/photo.webp")
+        self.assertFalse(base_models.ImageJob.objects.exists())
+
+
+class ImageWorkerCommandTests(TransactionTestCase):
+    # Воркер закрывает устаревшие соединения между задачами — нужны настоящие транзакции
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, RESPONSIVE_IMAGE_WIDTHS=[320])
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_drains_queue_and_exits(self):
+        base_models.Banner.objects.create(title="Hero", image=uploaded_image())
+        out = StringIO()
+        call_command("process_images", "--once", stdout=out)
+
+        self.assertIn("Обработано задач: 1", out.getvalue())
+        self.assertEqual(base_models.Banner.objects.get().image.name, "banner/photo.webp")
+        self.assertFalse(default_storage.exists("banner/raw/photo.jpg"))
+
+
+class DbPoolTests(TestCase):
+    def test_stats_endpoint_is_staff_only(self):
+        url = reverse("db-pool")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        staff = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()["pools"]), set(pool_stats()))
+
+    def test_pool_stats(self):
+        if not connection.pool:
+            self.skipTest("DB_POOL выключен")
+        stats = pool_stats()[connection.alias]
+        self.assertEqual(stats["pid"], os.getpid())
+        self.assertEqual(stats["max_size"], connection.settings_dict["OPTIONS"]["pool"]["max_size"])
+        self.assertGreaterEqual(stats["size"], 1)
+        self.assertLessEqual(stats["utilization"], 1)
+
+
+class CloseConnectionsTests(TransactionTestCase):
+    # Закрывается и пул, а TestCase держит соединение в транзакции
+    def test_closes_pool_and_reconnects(self):
+        base_models.Banner.objects.exists()
+        close_connections()
+        self.assertIsNone(connection.connection)
+        self.assertEqual(pool_stats(), {})
+
+        # Следующий запрос открывает соединение (и пул) заново
+        self.assertFalse(base_models.Banner.objects.exists())
+
+
+class BootTests(TransactionTestCase):
+    # boot закрывает соединения и пул, поэтому без общей транзакции TestCase
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.static_root = tempfile.mkdtemp()
+        for path in (self.source, self.static_root):
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        with open(os.path.join(self.source, "site.css"), "w") as file:
+            file.write("body { margin: 0 }")
+        override = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STATIC_ROOT=self.static_root,
+            ASSET_ROOT=os.path.join(self.static_root, "assets"),
+            ASSET_BUNDLES={"site.css": ["site.css"]},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def boot(self, *args):
+        out = StringIO()
+        call_command("boot", *args, stdout=out)
+        return out.getvalue()
+
+    def test_skips_work_that_is_already_done(self):
+        output = self.boot()
+        self.assertIn("migrate пропущен", output)
+        self.assertIn("Статика: собрана, бандлов: 1", output)
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, "site.css")))
+        self.assertIn("site.css", assets.read_manifest())
+
+        self.assertIn("collectstatic пропущен", self.boot())
+
+        # Без бандлов статика считается несобранной
+        shutil.rmtree(os.path.join(self.static_root, "assets"))
+        self.assertIn("Статика: собрана", self.boot())
+
+        # Новый файл статики — сборка снова нужна
+        with open(os.path.join(self.source, "app.js"), "w") as file:
+            file.write("console.log(1)")
+        self.assertIn("Статика: собрана", self.boot())
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, "app.js")))
+
+    def test_no_pending_migrations_in_migrated_database(self):
+        self.assertEqual(boot.pending_migrations(), [])
+
+    def test_database_wait_gives_up(self):
+        with mock.patch.object(boot, "probe_database", return_value="connection refused") as probe:
+            with self.assertRaisesMessage(CommandError, "connection refused"):
+                self.boot("--timeout", "0.5")
+        # Паузы растут: за полсекунды 0.2 + 0.3 — не больше трёх попыток
+        self.assertLessEqual(probe.call_count, 3)
+
+    def test_database_probe(self):
+        self.assertIsNone(boot.probe_database())
+
+
+class HealthCheckTests(TestCase):
+    def test_healthz(self):
+        response = self.client.get("/healthz", HTTP_HOST="10.0.0.5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok"})
+        self.assertEqual(response["Cache-Control"], "no-store")
+
+    def test_readyz(self):
+        response = self.client.get("/readyz", HTTP_HOST="10.0.0.5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["checks"], {"database": "ok", "cache": "ok"})
+
+    def test_readyz_reports_failed_check(self):
+        with mock.patch("apps.base.health.cache.get", side_effect=ConnectionError("refused")):
+            response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "unavailable")
+        self.assertEqual(response.json()["checks"]["cache"], "refused")
+
+
+class AssetBundleTests(TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        for path in (self.source, self.root):
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        self.write("base.css", "body {\n    margin: 0;\n}\n/* комментарий */\n")
+        self.write("menu.css", ".menu  a { color: #ffffff; }\n")
+        self.write("app.js", "// комментарий\nfunction hello(name) {\n    return 'hi ' + name;\n}\n")
+        override = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            ASSET_ROOT=self.root,
+            ASSET_BUNDLES={"site.css": ["base.css", "menu.css"], "site.js": ["app.js"]},
+            ASSET_BUNDLES_ENABLED=True,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        assets.current_manifest.cache_clear()
+        self.addCleanup(assets.current_manifest.cache_clear)
+
+    def write(self, name, text):
+        with open(os.path.join(self.source, name), "w") as file:
+            file.write(text)
+
+    def test_build(self):
+        manifest = assets.build_bundles()
+        self.assertRegex(manifest["site.css"], r"^site\.[0-9a-f]{12}\.css$")
+
+        with open(os.path.join(self.root, manifest["site.css"]), "rb") as file:
+            css = file.read()
+        self.assertEqual(css, b"body{margin:0}.menu a{color:#ffffff}\n")
+        with open(os.path.join(self.root, manifest["site.css"] + ".gz"), "rb") as file:
+            self.assertEqual(gzip.decompress(file.read()), css)
+        with open(os.path.join(self.root, manifest["site.css"] + ".br"), "rb") as file:
+            self.assertEqual(brotli.decompress(file.read()), css)
+        with open(os.path.join(self.root, manifest["site.js"]), "rb") as file:
+            self.assertNotIn(b"//", file.read())
+
+    def test_keeps_previous_build(self):
+        first = assets.build_bundles()["site.css"]
+        self.write("menu.css", ".menu a { color: red; }")
+        second = assets.build_bundles()["site.css"]
+        self.assertNotEqual(first, second)
+        self.assertTrue(os.path.exists(os.path.join(self.root, first + ".br")))
+
+        self.write("menu.css", ".menu a { color: blue; }")
+        assets.build_bundles()
+        self.assertFalse(os.path.exists(os.path.join(self.root, first)))
+        self.assertFalse(os.path.exists(os.path.join(self.root, first + ".br")))
+        self.assertTrue(os.path.exists(os.path.join(self.root, second)))
+
+    def test_template_tag(self):
+        template = Template('{% load assets %}{% bundle "site.css" %}{% bundle "site.js" %}')
+        # Сборки нет — исходники по отдельности
+        html = template.render(Context())
+        self.assertIn('href="/static/base.css"', html)
+        self.assertIn('href="/static/menu.css"', html)
+
+        manifest = assets.build_bundles()
+        assets.current_manifest.cache_clear()
+        html = template.render(Context())
+        self.assertEqual(html.count("<link"), 1)
+        self.assertIn(f'href="/assets/{manifest["site.css"]}"', html)
+        self.assertIn(f'<script src="/assets/{manifest["site.js"]}" defer></script>', html)
+
+        with override_settings(ASSET_BUNDLES_ENABLED=False):
+            self.assertIn('src="/static/app.js"', template.render(Context()))
+
+    def test_serves_precompressed_file(self):
+        name = assets.build_bundles()["site.css"]
+        url = reverse("asset", args=[name])
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(response["Content-Type"], "text/css; charset=utf-8")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+        body = b"".join(response.streaming_content)
+        self.assertEqual(brotli.decompress(body), b"body{margin:0}.menu a{color:#ffffff}\n")
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+        response = self.client.get(url)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), b"body{margin:0}.menu a{color:#ffffff}\n")
+
+        for name in (name + ".br", "manifest.json", "missing.css"):
+            self.assertEqual(self.client.get(reverse("asset", args=[name])).status_code, 404)
@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.urls import path
 from apps.base import views as base_viwes
 urlpatterns = [
-    path('', base_viwes.index, name = "index-page")
+    path('', base_viwes.index, name = "index-page"),
+    path('internal/db-pool/', base_viwes.db_pool, name="db-pool"),
+    path(settings.ASSET_URL.lstrip('/') + '<str:name>', base_viwes.asset, name="asset"),
 ]
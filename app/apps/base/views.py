@@ -1,9 +1,55 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import render
-from apps.base import models as base_models
-from apps.cms import models as cms_models
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import require_safe
+from apps.base.assets import COMPRESSORS, MANIFEST_NAME
+from apps.base.cache import cached_page
+from apps.base.db import pool_stats
 # Create your views here.
+# settings, banners и categories приходят из apps.base.context_processors.site_chrome
+@cached_page()
 def index(request):
-    settings = base_models.Settings.objects.first()
-    banners = base_models.Banner.objects.all()
-    categories = cms_models.CategoryOrganization.objects.all()
-    return render(request, "pages/index.html", locals())
\ No newline at end of file
+    return render(request, "pages/index.html")
+
+
+@staff_member_required
+def db_pool(request):
+    """Статистика пула соединений процесса, который обработал запрос."""
+    return JsonResponse({"pools": pool_stats()})
+
+
+# Content-Encoding -> расширение готовой сжатой копии, в порядке предпочтения
+ASSET_ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+@require_safe
+def asset(request, name):
+    """Бандл из ASSET_ROOT: готовая .br/.gz копия, если клиент её принимает."""
+    path = os.path.join(settings.ASSET_ROOT, name)
+    if name.startswith(".") or name == MANIFEST_NAME or name.endswith(tuple(COMPRESSORS)):
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+
+    accepted = {
+        part.split(";")[0].strip()
+        for part in request.headers.get("Accept-Encoding", "").lower().split(",")
+    }
+    encoding = None
+    for candidate, suffix in ASSET_ENCODINGS.items():
+        if candidate in accepted and os.path.isfile(path + suffix):
+            encoding, path = candidate, path + suffix
+            break
+
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    response = FileResponse(open(path, "rb"), content_type=f"{content_type}; charset=utf-8", filename=name)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    patch_cache_control(response, public=True, max_age=settings.ASSET_MAX_AGE, immutable=True)
+    return response
@@ -1,9 +1,18 @@
+import io
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.contrib import messages
-from django.utils.text import slugify
-import uuid
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
 from apps.cms import models as cms_models
+from apps.cms.cloning import clone_services
+from apps.cms.transfer import FORMATS, CatalogImportError, describe_stats, export_lines, import_catalog
 
 
 # -------------------------------
@@ -118,6 +127,28 @@ class ServicePriceItemInline(admin.TabularInline):
 # -------------------------------
 # Услуги
 # -------------------------------
+class ServiceActionForm(ActionForm):
+    """Позволяет дублировать выбранные услуги сразу в другую категорию"""
+    organization = forms.ModelChoiceField(
+        queryset=cms_models.CategoryOrganization.objects.all(),
+        required=False,
+        empty_label="в ту же категорию",
+        label="Категория для копий",
+    )
+
+
+class CatalogImportForm(forms.Form):
+    """Загрузка каталога из файла выгрузки (apps.cms.transfer)"""
+    file = forms.FileField(label="Файл")
+    format = forms.ChoiceField(choices=[(fmt, fmt.upper()) for fmt in FORMATS], label="Формат")
+    upsert = forms.BooleanField(
+        required=False,
+        label="Обновлять услуги с тем же slug",
+        help_text="Пункты разделов таких услуг заменяются пунктами из файла",
+    )
+    dry_run = forms.BooleanField(required=False, label="Только проверить, ничего не записывать")
+
+
 @admin.register(cms_models.Service)
 class ServiceAdmin(admin.ModelAdmin):
     list_display = ("title", "organization", "is_active", "order", "has_360")
@@ -127,6 +158,8 @@ class ServiceAdmin(admin.ModelAdmin):
     
     # Используем кастомный шаблон для формы редактирования
     change_form_template = "admin/cms/service/change_form.html"
+    # Кнопки выгрузки и загрузки каталога
+    change_list_template = "admin/cms/service/change_list.html"
 
     fieldsets = (
         ("Основное", {
@@ -166,53 +199,89 @@ class ServiceAdmin(admin.ModelAdmin):
     ServicePriceItemInline,
 ]
 
-    actions = ['duplicate_service']
+    actions = ['duplicate_service', 'export_services']
+    action_form = ServiceActionForm
 
     def duplicate_service(self, request, queryset):
-        """Дублирование выбранных услуг со всеми связанными данными"""
-        duplicated_count = 0
-        
-        for service in queryset:
-            try:
-                # Создаем копию основной услуги
-                original_title = service.title
-                new_title = f"{original_title} (копия)"
-                
-                # Генерируем уникальный slug
-                base_slug = slugify(original_title) + "-copy"
-                slug = base_slug
-                i = 1
-                while cms_models.Service.objects.filter(slug=slug).exists():
-                    slug = f"{base_slug}-{i}"
-                    i += 1
-                
-                # Копируем основную услугу
-                new_service = cms_models.Service.objects.create(
-                    organization=service.organization,
-                    title=new_title,
-                    slug=slug,
-                    cover_image=service.cover_image,
-                    cover_video_url=service.cover_video_url,
-                    has_360=service.has_360,
-                    view_360_url=service.view_360_url,
-                    is_active=service.is_active,
-                    order=service.order,
-                )
-                
-                # Копируем все связанные данные
-                self._duplicate_related_data(service, new_service)
-                
-                duplicated_count += 1
-                self.message_user(request, f'Услуга "{original_title}" успешно дублирована как "{new_title}"', messages.SUCCESS)
-                
-            except Exception as e:
-                self.message_user(request, f'Ошибка при дублировании услуги "{service.title}": {str(e)}', messages.ERROR)
-        
-        if duplicated_count == 0:
+        """Дублирование выбранных услуг со всеми связанными данными (одной пачкой)"""
+        organization = None
+        organization_id = request.POST.get("organization")
+        if organization_id:
+            organization = cms_models.CategoryOrganization.objects.filter(pk=organization_id).first()
+
+        try:
+            clones = clone_services(queryset.order_by("pk"), organization=organization)
+        except Exception as e:
+            self.message_user(request, f'Ошибка при дублировании услуг: {str(e)}', messages.ERROR)
+            return
+
+        if not clones:
             self.message_user(request, 'Ни одна услуга не была дублирована', messages.WARNING)
-    
+            return
+        target = f' в категорию "{organization}"' if organization else ''
+        self.message_user(request, f'Дублировано услуг: {len(clones)}{target}', messages.SUCCESS)
+
     duplicate_service.short_description = 'Дублировать выбранные услуги'
 
+    def export_services(self, request, queryset):
+        """Выгрузка выбранных услуг с их категориями и разделами"""
+        return self.export_response("jsonl", queryset)
+
+    export_services.short_description = 'Выгрузить выбранные услуги (JSONL)'
+
+    def get_urls(self):
+        return [
+            path("export/", self.admin_site.admin_view(self.export_view), name="cms_service_export"),
+            path("import/", self.admin_site.admin_view(self.import_view), name="cms_service_import"),
+        ] + super().get_urls()
+
+    def export_response(self, fmt, services=None):
+        """Выгрузка потоком: строки уходят клиенту по мере чтения из БД"""
+        _to_lines, content_type = FORMATS[fmt]
+        response = StreamingHttpResponse(export_lines(fmt, services), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="catalog-{timezone.now():%Y-%m-%d}.{fmt}"'
+        return response
+
+    def export_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        fmt = request.GET.get("format", "jsonl")
+        if fmt not in FORMATS:
+            raise Http404
+        return self.export_response(fmt)
+
+    def import_view(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+        form = CatalogImportForm(request.POST or None, request.FILES or None)
+        errors = []
+        if request.method == "POST" and form.is_valid():
+            data = form.cleaned_data
+            # Файл читается построчно, большой загружается на диск, а не в память
+            lines = io.TextIOWrapper(data["file"].file, encoding="utf-8-sig", newline="")
+            try:
+                stats = import_catalog(lines, data["format"], upsert=data["upsert"], dry_run=data["dry_run"])
+            except CatalogImportError as error:
+                errors = error.errors
+            except UnicodeDecodeError:
+                errors = ["Файл не в кодировке UTF-8"]
+            else:
+                summary = "; ".join(describe_stats(stats)) or "Файл пуст"
+                if data["dry_run"]:
+                    self.message_user(request, f"Проверка пройдена, ничего не записано. {summary}", messages.INFO)
+                else:
+                    self.message_user(request, f"Каталог загружен. {summary}", messages.SUCCESS)
+                return redirect("admin:cms_service_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Загрузка каталога",
+            "form": form,
+            "errors": errors,
+        }
+        return TemplateResponse(request, "admin/cms/service/import.html", context)
+
     def response_add(self, request, obj, post_url_continue=None):
         """Переопределяем response_add для добавления кнопки дублирования"""
         return super().response_add(request, obj, post_url_continue)
@@ -221,159 +290,13 @@ class ServiceAdmin(admin.ModelAdmin):
         """Добавляем кнопку дублирования в форму редактирования"""
         if '_duplicate' in request.POST:
             try:
-                # Создаем копию услуги
-                original_title = obj.title
-                new_title = f"{original_title} (копия)"
-                
-                # Генерируем уникальный slug
-                base_slug = slugify(original_title) + "-copy"
-                slug = base_slug
-                i = 1
-                while cms_models.Service.objects.filter(slug=slug).exists():
-                    slug = f"{base_slug}-{i}"
-                    i += 1
-                
-                # Копируем основную услугу
-                new_service = cms_models.Service.objects.create(
-                    organization=obj.organization,
-                    title=new_title,
-                    slug=slug,
-                    cover_image=obj.cover_image,
-                    cover_video_url=obj.cover_video_url,
-                    has_360=obj.has_360,
-                    view_360_url=obj.view_360_url,
-                    is_active=obj.is_active,
-                    order=obj.order,
-                )
-                
-                # Копируем все связанные данные
-                self._duplicate_related_data(obj, new_service)
-                
-                self.message_user(request, f'Услуга "{original_title}" успешно дублирована как "{new_title}"', messages.SUCCESS)
-                
+                new_service = clone_services([obj])[0]
+                self.message_user(request, f'Услуга "{obj.title}" успешно дублирована как "{new_service.title}"', messages.SUCCESS)
+
                 # Перенаправляем на страницу редактирования новой услуги
                 return redirect(f'admin:cms_service_change', new_service.id)
-                
+
             except Exception as e:
                 self.message_user(request, f'Ошибка при дублировании: {str(e)}', messages.ERROR)
-        
-        return super().response_change(request, obj)
 
-    def _duplicate_related_data(self, original_service, new_service):
-        """Копирование всех связанных данных услуги"""
-        
-        # Копируем пункты по зонам
-        for item in original_service.zone_items.all():
-            cms_models.ServiceZoneItem.objects.create(
-                service=new_service,
-                zone=item.zone,
-                text=item.text,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем используемые средства
-        for item in original_service.chemical_items.all():
-            cms_models.ServiceChemicalItem.objects.create(
-                service=new_service,
-                name=item.name,
-                description=item.description,
-                image=item.image,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем оборудование
-        for item in original_service.equipment_items.all():
-            cms_models.ServiceEquipmentItem.objects.create(
-                service=new_service,
-                name=item.name,
-                description=item.description,
-                image=item.image,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем FAQ
-        for item in original_service.faq_items.all():
-            cms_models.ServiceFAQItem.objects.create(
-                service=new_service,
-                question=item.question,
-                answer=item.answer,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем требования к объекту
-        for item in original_service.requirement_items.all():
-            cms_models.ServiceRequirementItem.objects.create(
-                service=new_service,
-                text=item.text,
-                description=item.description,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем условия выполнения работ
-        for item in original_service.work_condition_items.all():
-            cms_models.ServiceWorkConditionItem.objects.create(
-                service=new_service,
-                text=item.text,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем исключения
-        for item in original_service.excluded_items.all():
-            cms_models.ServiceExcludedItem.objects.create(
-                service=new_service,
-                text=item.text,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем кейсы до/после
-        for item in original_service.cases_before_after.all():
-            cms_models.ServiceCaseBeforeAfter.objects.create(
-                service=new_service,
-                title=item.title,
-                description=item.description,
-                before_image=item.before_image,
-                after_image=item.after_image,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем клиентов/компании
-        for item in original_service.client_companies.all():
-            cms_models.ServiceClientCompany.objects.create(
-                service=new_service,
-                name=item.name,
-                business_type=item.business_type,
-                logo=item.logo,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем документы
-        for item in original_service.documents.all():
-            cms_models.ServiceDocument.objects.create(
-                service=new_service,
-                doc_type=item.doc_type,
-                title=item.title,
-                file=item.file,
-                url=item.url,
-                order=item.order,
-                is_active=item.is_active
-            )
-        
-        # Копируем цены
-        for item in original_service.price_items.all():
-            cms_models.ServicePriceItem.objects.create(
-                service=new_service,
-                title=item.title,
-                price=item.price,
-                description=item.description,
-                order=item.order,
-                is_active=item.is_active
-            )
+        return super().response_change(request, obj)
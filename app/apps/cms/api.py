@@ -0,0 +1,155 @@
+import datetime
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from apps.base.cache import cached_page, category_scope, service_scope
+from apps.cms import models as cms_models
+from apps.cms.autocomplete import suggest as autocomplete
+from apps.cms.documents import category_document, get_service_document, media, project
+from apps.cms.pagination import keyset_page
+from apps.cms.search import search_services
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson есть в requirements.txt
+    orjson = None
+
+# -------------------------------
+# JSON API каталога (только чтение)
+# -------------------------------
+# Ответы кэшируются целиком по версиям контента (cached_page), как и
+# HTML-страницы, и поддерживают ETag/304.
+SEARCH_QUERY_MAX_LENGTH = 200
+
+
+def _default(value):
+    # Даты — в том же виде, что у orjson (isoformat)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(data):
+    """Компактный JSON в байтах: orjson, если установлен, иначе stdlib."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type="application/json")
+
+
+def api_view(view):
+    """Ошибки API — тоже JSON, а не HTML-страницы."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return json_response({"detail": "Не найдено"}, status=404)
+        except BadRequest as e:
+            return json_response({"detail": str(e)}, status=400)
+    return require_safe(wrapper)
+
+
+def requested_fields(request):
+    fields = request.GET.get("fields", "")
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def base_url(request):
+    return request.build_absolute_uri("/")
+
+
+@api_view
+@cached_page(vary_on_host=True)
+def categories(request):
+    url = base_url(request)
+    return json_response({
+        "categories": [
+            category_document(category, url)
+            for category in cms_models.CategoryOrganization.objects.filter(is_active=True)
+        ],
+    })
+
+
+@api_view
+@cached_page(lambda pk: [category_scope(pk)], vary_on_host=True, query_params=("after",))
+def category_services(request, pk: int):
+    """Услуги категории постранично (?after=<курсор>, как на странице категории)."""
+    category = get_object_or_404(cms_models.CategoryOrganization, pk=pk, is_active=True)
+    services, next_cursor = keyset_page(
+        category.services.filter(is_active=True),
+        request.GET.get("after"),
+        settings.CATALOG_PAGE_SIZE,
+        ("slug", "title", "cover_image", "updated_at"),
+    )
+    url = base_url(request)
+    cover_field = cms_models.Service._meta.get_field("cover_image")
+    return json_response({
+        "category": category_document(category, url),
+        "services": [
+            {
+                "id": service["id"],
+                "slug": service["slug"],
+                "title": service["title"],
+                "order": service["order"],
+                "cover_image": media(cover_field.attr_class(None, cover_field, service["cover_image"]), url),
+                "updated_at": service["updated_at"],
+            }
+            for service in services
+        ],
+        "next": next_cursor,
+    })
+
+
+@api_view
+@cached_page(lambda slug: [service_scope(slug)], vary_on_host=True, query_params=("fields",))
+def service(request, slug: str):
+    """Услуга со всеми разделами; ?fields=title,sections.faq_items — только нужные поля."""
+    document = get_service_document(slug, base_url(request))
+    return json_response(project(document, requested_fields(request)))
+
+
+@api_view
+def search(request):
+    """
+    Поиск услуг: ?q=удаление жира. Ответ не кэшируется — запрос идёт по
+    GIN-индексу search_vector и ранжирует только найденные строки.
+    """
+    text = request.GET.get("q", "").strip()
+    if len(text) > SEARCH_QUERY_MAX_LENGTH:
+        raise BadRequest("Слишком длинный запрос")
+    url = base_url(request)
+    services = search_services(text, settings.CATALOG_PAGE_SIZE) if text else []
+    return json_response({
+        "query": text,
+        "services": [
+            {
+                "id": service.pk,
+                "slug": service.slug,
+                "title": service.title,
+                "cover_image": media(service.cover_image, url),
+                "category": {"id": service.organization.pk, "name": service.organization.name},
+                "rank": round(service.rank, 4),
+            }
+            for service in services
+        ],
+    })
+
+
+@require_safe
+def suggest(request):
+    """
+    Подсказки для поиска в шапке: ?q=уда. Отвечает из индекса в памяти
+    процесса, без обращений к БД и кэшу на каждое нажатие клавиши.
+    """
+    text = request.GET.get("q", "")[:SEARCH_QUERY_MAX_LENGTH]
+    return json_response({"suggestions": autocomplete(text, settings.AUTOCOMPLETE_LIMIT)})
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class CmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.cms'
-    verbose_name = "2) Дополнительные параметры сайта"
\ No newline at end of file
+    verbose_name = "2) Дополнительные параметры сайта"
+
+    def ready(self):
+        from apps.cms import signals  # noqa: F401
@@ -0,0 +1,119 @@
+import bisect
+import re
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.urls import reverse
+
+from apps.base.cache import CATALOG, get_versions
+from apps.base.db import close_connections
+from apps.cms import models as cms_models
+
+# -------------------------------
+# Подсказки поиска
+# -------------------------------
+# Названия активных услуг и категорий лежат в памяти процесса как
+# отсортированный массив ключей: нормализованное название и каждый его
+# хвост, начинающийся со слова ("удаление жира", "жира"). Подсказки по
+# префиксу — bisect и проход вперёд, без запросов к БД и кэшу. Индекс
+# собирается при старте (warm_up) и пересобирается, как и
+# "обвязка", когда поднимают версию "catalog" (проверка раз в
+# SITE_CHROME_TTL секунд).
+WORD = re.compile(r"\w+")
+
+_index = None
+
+
+def normalize(text):
+    """Регистр, ё/е и пунктуация не важны: "Ёлка, мытьё!" -> "елка мытье"."""
+    return " ".join(WORD.findall(text.casefold().replace("ё", "е")))
+
+
+def reset_autocomplete():
+    global _index
+    _index = None
+
+
+def _entries():
+    categories = cms_models.CategoryOrganization.objects.filter(is_active=True).values_list("pk", "name")
+    for pk, name in categories:
+        yield {"type": "category", "title": name, "url": reverse("category-detail", args=[pk])}
+    services = (
+        cms_models.Service.objects
+        .filter(is_active=True, organization__is_active=True)
+        .values_list("slug", "title")
+    )
+    for slug, title in services:
+        yield {"type": "service", "title": title, "url": reverse("service-detail", args=[slug])}
+
+
+def _build_index(version):
+    entries = list(_entries())
+    pairs = []
+    for position, entry in enumerate(entries):
+        words = normalize(entry["title"]).split()
+        pairs.extend((" ".join(words[i:]), position) for i in range(len(words)))
+    # При равных ключах раньше идут категории: они первые в entries
+    pairs.sort()
+    return {
+        "version": version,
+        "checked_at": time.monotonic(),
+        "keys": [key for key, _position in pairs],
+        "positions": [position for _key, position in pairs],
+        "entries": entries,
+    }
+
+
+def get_autocomplete_index():
+    global _index
+    index = _index
+    now = time.monotonic()
+    if index is not None and now - index["checked_at"] < settings.SITE_CHROME_TTL:
+        return index
+
+    version = get_versions(CATALOG)[CATALOG]
+    if index is not None and index["version"] == version:
+        index["checked_at"] = now
+        return index
+
+    _index = _build_index(version)
+    return _index
+
+
+def warm_up():
+    """
+    Собирает индекс при старте (core/wsgi.py, core/asgi.py). Если БД ещё
+    недоступна — индекс соберётся на первом запросе. Соединения после
+    прогрева закрываются, чтобы воркеры gunicorn (preload_app) не
+    унаследовали сокет мастера.
+    """
+    try:
+        get_autocomplete_index()
+    except DatabaseError:
+        pass
+    finally:
+        close_connections()
+
+
+def suggest(text, limit):
+    """
+    До limit подсказок {"type", "title", "url"}, у которых название или
+    одно из его слов начинается с text.
+    """
+    prefix = normalize(text)
+    if not prefix:
+        return []
+    index = get_autocomplete_index()
+    keys, positions, entries = index["keys"], index["positions"], index["entries"]
+    found = []
+    seen = set()
+    for i in range(bisect.bisect_left(keys, prefix), len(keys)):
+        if not keys[i].startswith(prefix):
+            break
+        if positions[i] not in seen:
+            seen.add(positions[i])
+            found.append(entries[positions[i]])
+            if len(found) == limit:
+                break
+    return found
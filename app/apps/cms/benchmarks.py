@@ -0,0 +1,253 @@
+import json
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.template import base as template_base
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.base import views as base_views
+from apps.base.context_processors import get_site_chrome, reset_site_chrome
+from apps.cms import models as cms_models
+from apps.cms import views as cms_views
+from apps.cms.loaders import SERVICE_SECTIONS
+from apps.cms.search import update_search_vectors
+from apps.cms.snapshots import rebuild_snapshots
+
+# -------------------------------
+# Бенчмарки публичных страниц
+# -------------------------------
+# Каталог размера "категории x услуги в категории x пункты в разделе"
+# заполняется bulk_create'ом, после чего каждая страница вызывается
+# напрямую (без кэша страниц, с прогретой "обвязкой") и измеряется:
+#   queries    — число запросов к БД
+#   wall_ms    — время ответа, медиана по повторам
+#   render_ms  — из него время рендера шаблона, медиана
+#   peak_kb    — пик выделенной памяти (tracemalloc, отдельный прогон)
+# Результаты сравниваются с benchmark_baseline.json (python manage.py benchmark).
+BASELINE_PATH = Path(__file__).resolve().with_name("benchmark_baseline.json")
+
+DEFAULT_SIZES = ["3x10x3", "10x50x25"]
+
+METRICS = ("queries", "wall_ms", "render_ms", "peak_kb")
+
+# Разница меньше этих значений — шум, а не регрессия, при любом запасе
+NOISE_FLOOR = {"wall_ms": 1.0, "render_ms": 1.0, "peak_kb": 64}
+
+
+def parse_size(size):
+    """ "10x50x25" -> (10, 50, 25)."""
+    try:
+        categories, services, items = (int(part) for part in size.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Размер каталога задаётся как КАТЕГОРИИxУСЛУГИxПУНКТЫ, а не {size!r}")
+    return categories, services, items
+
+
+# -------------------------------
+# Каталог
+# -------------------------------
+def section_item(model, service, i, is_active=True):
+    """Пункт раздела с заполненными обязательными полями (общий для замеров и тестов)."""
+    fields = {"service": service, "order": i, "is_active": is_active}
+    if model is cms_models.ServiceZoneItem:
+        fields.update(zone="kitchen" if i % 2 else "room", text=f"Пункт {i}")
+    elif model is cms_models.ServiceFAQItem:
+        fields.update(question=f"Вопрос {i}", answer=f"Ответ {i}")
+    elif model is cms_models.ServiceDocument:
+        fields.update(doc_type="contract", url=f"https://example.com/{i}")
+    elif model is cms_models.ServicePriceItem:
+        fields.update(title=f"Цена {i}", price=f"{i} сом")
+    elif model is cms_models.ServiceCaseBeforeAfter:
+        fields.update(title=f"Кейс {i}")
+    elif model in (cms_models.ServiceChemicalItem, cms_models.ServiceEquipmentItem,
+                   cms_models.ServiceClientCompany):
+        fields.update(name=f"Название {i}")
+    else:
+        fields.update(text=f"Пункт {i}")
+    return model(**fields)
+
+
+@transaction.atomic
+def seed_catalog(categories, services, items):
+    """
+    Каталог для замеров: categories категорий по services услуг, в каждом
+    разделе услуги items активных пунктов. Снимки и поисковый индекс
+    собираются так же, как после правок в админке.
+    """
+    organizations = cms_models.CategoryOrganization.objects.bulk_create([
+        cms_models.CategoryOrganization(name=f"Категория {c}", order=c)
+        for c in range(categories)
+    ])
+    created = cms_models.Service.objects.bulk_create([
+        cms_models.Service(
+            organization=organization,
+            title=f"Уборка {c}-{s}",
+            slug=f"bench-{c}-{s}",
+            order=s,
+        )
+        for c, organization in enumerate(organizations)
+        for s in range(services)
+    ])
+    for model, _ordering in SERVICE_SECTIONS.values():
+        model.objects.bulk_create(
+            (section_item(model, service, i) for service in created for i in range(items)),
+            batch_size=5000,
+        )
+    queryset = cms_models.Service.objects.filter(pk__in=[service.pk for service in created])
+    update_search_vectors(queryset)
+    rebuild_snapshots(queryset)
+    return organizations, created
+
+
+# -------------------------------
+# Замеры
+# -------------------------------
+@contextmanager
+def _template_timer(timings):
+    """Время внешнего Template.render (вложенные include в него входят)."""
+    original = template_base.Template.render
+    depth = 0
+
+    def render(self, context):
+        nonlocal depth
+        depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            depth -= 1
+            if depth == 0:
+                timings.append(time.perf_counter() - started)
+
+    template_base.Template.render = render
+    try:
+        yield
+    finally:
+        template_base.Template.render = original
+
+
+def public_views(organizations, services):
+    """(имя, функция без кэша страниц, kwargs, путь) для каждой публичной страницы."""
+    category, service = organizations[0], services[0]
+    return [
+        ("index", base_views.index.__wrapped__, {}, reverse("index-page")),
+        ("category", cms_views.category.__wrapped__, {}, reverse("category-page")),
+        ("category_detail", cms_views.category_detail.__wrapped__, {"pk": category.pk},
+         reverse("category-detail", args=[category.pk])),
+        ("service_detail", cms_views.service_detail.__wrapped__, {"slug": service.slug},
+         reverse("service-detail", args=[service.slug])),
+    ]
+
+
+def measure(view, kwargs, path, repeat):
+    factory = RequestFactory()
+
+    def call():
+        request = factory.get(path)
+        request.user = AnonymousUser()
+        response = view(request, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path}: ответ {response.status_code}")
+        return response
+
+    # Прогрев: "обвязка" и шаблоны уже в памяти процесса, как в воркере
+    call()
+
+    with CaptureQueriesContext(connection) as queries:
+        call()
+
+    walls, renders = [], []
+    for _ in range(repeat):
+        timings = []
+        with _template_timer(timings):
+            started = time.perf_counter()
+            call()
+            walls.append(time.perf_counter() - started)
+        renders.append(sum(timings))
+
+    tracemalloc.start()
+    try:
+        call()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "queries": len(queries),
+        "wall_ms": round(statistics.median(walls) * 1000, 2),
+        "render_ms": round(statistics.median(renders) * 1000, 2),
+        "peak_kb": round(peak / 1024),
+    }
+
+
+def run_benchmarks(size, repeat=20):
+    """{страница: метрики} для каталога размера size ("3x10x3") в текущей БД."""
+    organizations, services = seed_catalog(*parse_size(size))
+    reset_site_chrome()
+    get_site_chrome()
+    return {
+        name: measure(view, kwargs, path, repeat)
+        for name, view, kwargs, path in public_views(organizations, services)
+    }
+
+
+# -------------------------------
+# Baseline
+# -------------------------------
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True, ensure_ascii=False)
+        file.write("\n")
+
+
+def compare(results, baseline, margin, metrics=METRICS):
+    """
+    Превышения бюджета: список строк "размер страница метрика: было -> стало".
+    Число запросов не должно расти вовсе; время и память — не больше чем
+    на margin (0.25 = 25%) и на NOISE_FLOOR сверх baseline.
+    """
+    failures = []
+    for size, pages in results.items():
+        for page, measured in pages.items():
+            budget = baseline.get(size, {}).get(page)
+            if budget is None:
+                continue
+            for metric in metrics:
+                if metric not in budget:
+                    continue
+                if metric == "queries":
+                    limit = budget[metric]
+                else:
+                    limit = max(budget[metric] * (1 + margin), budget[metric] + NOISE_FLOOR[metric])
+                if measured[metric] > limit:
+                    failures.append(f"{size} {page} {metric}: {budget[metric]} -> {measured[metric]}")
+    return failures
+
+
+def report(results, baseline=None):
+    """Таблица результатов; в скобках — baseline, если он есть."""
+    lines = []
+    for size, pages in results.items():
+        lines.append(f"Каталог {size}:")
+        lines.append(f"  {'страница':<16}" + "".join(f"{metric:>20}" for metric in METRICS))
+        for page, measured in pages.items():
+            budget = (baseline or {}).get(size, {}).get(page, {})
+            cells = [
+                f"{measured[metric]}" + (f" ({budget[metric]})" if metric in budget else "")
+                for metric in METRICS
+            ]
+            lines.append(f"  {page:<16}" + "".join(f"{cell:>20}" for cell in cells))
+    return "\n".join(lines)
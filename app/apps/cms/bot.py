@@ -0,0 +1,411 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from html import escape
+from urllib.parse import urljoin
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from telebot import types
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_helper import ApiTelegramException
+
+from apps.base.cache import CATALOG, get_versions
+from apps.cms import models as cms_models
+from apps.cms.autocomplete import normalize
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Telegram-бот каталога
+# -------------------------------
+# Бот отвечает из каталога в памяти процесса, собранного из снимков
+# услуг (ServiceSnapshot), и не ходит в Postgres на каждое сообщение.
+# Каталог пересобирается, когда поднимают версию "catalog" (проверка
+# раз в SITE_CHROME_TTL секунд). Исходящие сообщения идут через очередь
+# Outbox с лимитами Telegram.
+SERVICES_PER_PAGE = 8
+MESSAGE_LIMIT = 4096
+
+# Основы слов, по которым вопрос считается вопросом о цене
+PRICE_STEMS = ("цен", "стои", "прай", "сколь", "тариф")
+# Слова, которые не помогают найти ответ
+STOP_WORDS = {"как", "что", "это", "для", "или", "где", "вас", "нас", "все", "его"}
+# Доля слов вопроса, которые должны совпасть с вопросом из FAQ
+FAQ_MATCH_THRESHOLD = 0.5
+# Сколько первых букв должно совпасть у двух слов (или всё более короткое слово):
+# грубая замена стемминга — "сохнут"/"сохнет", "пол"/"полы"
+STEM_LENGTH = 4
+
+
+def words(text):
+    return [word for word in normalize(text).split() if len(word) >= 3 and word not in STOP_WORDS]
+
+
+def _similar(a, b):
+    n = min(STEM_LENGTH, len(a), len(b))
+    return a[:n] == b[:n]
+
+
+def _overlap(query, candidate):
+    """Доля слов query, у которых есть похожее слово в candidate."""
+    return sum(any(_similar(word, other) for other in candidate) for word in query) / len(query)
+
+
+class Catalog:
+    """Категории и снимки услуг, загруженные одним проходом."""
+
+    def __init__(self, categories, services):
+        self.categories = categories
+        self.services = services
+        self.by_category = {category["id"]: [] for category in categories}
+        self.titles = []
+        self.faq = []
+        for slug, service in services.items():
+            self.by_category.setdefault(service["category"]["id"], []).append(slug)
+            self.titles.append((words(service["title"]), slug))
+            self.faq.extend(
+                (words(item["question"]), slug, item) for item in service["sections"]["faq_items"]
+            )
+        # Первые три буквы слова -> номера вопросов FAQ: сравниваем только с кандидатами
+        self.faq_by_prefix = {}
+        for position, (question, _slug, _item) in enumerate(self.faq):
+            for word in question:
+                self.faq_by_prefix.setdefault(word[:3], set()).add(position)
+
+    def category(self, pk):
+        return next((category for category in self.categories if category["id"] == pk), None)
+
+    def find_services(self, text):
+        """Услуги с наибольшим числом слов из text в названии."""
+        query = words(text)
+        if not query:
+            return []
+        scored = [(_overlap(query, title), slug) for title, slug in self.titles]
+        best = max((score for score, _slug in scored), default=0)
+        return [slug for score, slug in scored if best and score == best]
+
+    def find_faq(self, text):
+        """(slug услуги, пункт FAQ), лучше всего подходящий к вопросу, или None."""
+        query = words(text)
+        candidates = set().union(*(self.faq_by_prefix.get(word[:3], ()) for word in query))
+        best_score, best = 0, None
+        for position in sorted(candidates):
+            question, slug, item = self.faq[position]
+            score = _overlap(query, question)
+            if score > best_score:
+                best_score, best = score, (slug, item)
+        return best if best_score >= FAQ_MATCH_THRESHOLD else None
+
+
+def build_catalog():
+    categories = list(
+        cms_models.CategoryOrganization.objects.filter(is_active=True).values("id", "name")
+    )
+    payloads = (
+        cms_models.ServiceSnapshot.objects
+        .filter(is_active=True, service__organization__is_active=True)
+        .order_by("service__order", "service__title")
+        .values_list("payload", flat=True)
+    )
+    return Catalog(categories, {payload["slug"]: payload for payload in payloads})
+
+
+class CatalogStore:
+    """Каталог текущей версии "catalog"; пересборка — в потоке, чтобы не блокировать цикл."""
+
+    def __init__(self, loader=build_catalog):
+        self.loader = loader
+        self.catalog = None
+        self.version = None
+        self.checked_at = 0
+
+    def _load(self):
+        # Соединение потока sync_to_async живёт между пересборками — проверяем его
+        close_old_connections()
+        return self.loader()
+
+    async def get(self):
+        now = time.monotonic()
+        if self.catalog is not None and now - self.checked_at < settings.SITE_CHROME_TTL:
+            return self.catalog
+        version = (await sync_to_async(get_versions)(CATALOG))[CATALOG]
+        if self.catalog is None or version != self.version:
+            self.catalog = await sync_to_async(self._load)()
+            self.version = version
+        self.checked_at = now
+        return self.catalog
+
+
+# -------------------------------
+# Ответы
+# -------------------------------
+# Каждая функция возвращает (текст в HTML, клавиатура или None).
+def _keyboard(rows):
+    markup = types.InlineKeyboardMarkup()
+    for row in rows:
+        markup.row(*row)
+    return markup
+
+
+def _button(text, data):
+    return types.InlineKeyboardButton(text, callback_data=data)
+
+
+def _join(lines):
+    """Строки через перевод строки, но не длиннее одного сообщения (обрезается по строкам)."""
+    text = ""
+    for line in lines:
+        if len(text) + len(line) + 2 > MESSAGE_LIMIT:
+            return text + "\n…"
+        text = f"{text}\n{line}" if text else line
+    return text
+
+
+def categories_reply(catalog):
+    if not catalog.categories:
+        return "Каталог пока пуст.", None
+    return "Выберите категорию:", _keyboard(
+        [_button(category["name"], f"c:{category['id']}:0")] for category in catalog.categories
+    )
+
+
+def category_reply(catalog, pk, page=0):
+    category = catalog.category(pk)
+    if category is None:
+        return categories_reply(catalog)
+    slugs = catalog.by_category.get(pk, [])
+    start = page * SERVICES_PER_PAGE
+    rows = [
+        [_button(catalog.services[slug]["title"], f"s:{slug}")]
+        for slug in slugs[start:start + SERVICES_PER_PAGE]
+    ]
+    pager = []
+    if page > 0:
+        pager.append(_button("← Назад", f"c:{pk}:{page - 1}"))
+    if start + SERVICES_PER_PAGE < len(slugs):
+        pager.append(_button("Ещё →", f"c:{pk}:{page + 1}"))
+    rows.append(pager + [_button("Категории", "categories")])
+    text = f"<b>{escape(category['name'])}</b>"
+    if not slugs:
+        text += "\nУслуг пока нет."
+    return text, _keyboard(rows)
+
+
+def service_reply(catalog, slug):
+    service = catalog.services.get(slug)
+    if service is None:
+        return categories_reply(catalog)
+    sections = service["sections"]
+    lines = [f"<b>{escape(service['title'])}</b>", escape(service["category"]["name"])]
+    zones = [item["text"] for item in sections["zone_items"]]
+    if zones:
+        lines += ["", "Что входит:"] + [f"• {escape(text)}" for text in zones]
+    rows = []
+    actions = []
+    if sections["price_items"]:
+        actions.append(_button("Цены", f"p:{slug}"))
+    if sections["faq_items"]:
+        actions.append(_button("Вопросы", f"f:{slug}"))
+    if actions:
+        rows.append(actions)
+    if settings.TELEGRAM_SITE_URL:
+        url = urljoin(settings.TELEGRAM_SITE_URL, f"/service/{slug}/")
+        rows.append([types.InlineKeyboardButton("Открыть на сайте", url=url)])
+    rows.append([_button("← К категории", f"c:{service['category']['id']}:0")])
+    return _join(lines), _keyboard(rows)
+
+
+def prices_reply(catalog, slug):
+    service = catalog.services.get(slug)
+    if service is None:
+        return categories_reply(catalog)
+    items = service["sections"]["price_items"]
+    if not items:
+        return f"Для «{escape(service['title'])}» цены уточняйте у менеджера.", None
+    lines = [f"<b>Цены: {escape(service['title'])}</b>"]
+    for item in items:
+        lines.append(f"• {escape(item['title'])} — {escape(item['price'])}")
+        if item["description"]:
+            lines.append(f"  <i>{escape(item['description'])}</i>")
+    return _join(lines), None
+
+
+def faq_reply(catalog, slug):
+    service = catalog.services.get(slug)
+    if service is None:
+        return categories_reply(catalog)
+    items = service["sections"]["faq_items"]
+    if not items:
+        return "Вопросов пока нет.", None
+    lines = [f"<b>Вопросы: {escape(service['title'])}</b>"]
+    for item in items:
+        lines += ["", f"<b>{escape(item['question'])}</b>"]
+        if item["answer"]:
+            lines.append(escape(item["answer"]))
+    return _join(lines), None
+
+
+def text_reply(catalog, text):
+    """Ответ на свободный вопрос: цена услуги, ответ из FAQ или подходящие услуги."""
+    words = normalize(text).split()
+    slugs = catalog.find_services(text)
+    if any(word.startswith(PRICE_STEMS) for word in words) and len(slugs) == 1:
+        return prices_reply(catalog, slugs[0])
+
+    match = catalog.find_faq(text)
+    if match:
+        slug, item = match
+        service = catalog.services[slug]
+        lines = [f"<b>{escape(item['question'])}</b>"]
+        if item["answer"]:
+            lines.append(escape(item["answer"]))
+        lines += ["", f"<i>{escape(service['title'])}</i>"]
+        return _join(lines), _keyboard([[_button("Подробнее об услуге", f"s:{slug}")]])
+
+    if slugs:
+        return "Нашлись услуги:", _keyboard(
+            [_button(catalog.services[slug]["title"], f"s:{slug}")] for slug in slugs[:SERVICES_PER_PAGE]
+        )
+    text, markup = categories_reply(catalog)
+    return "Не нашёл ответа. " + text, markup
+
+
+def callback_reply(catalog, data):
+    kind, _, rest = data.partition(":")
+    if kind == "c":
+        pk, _, page = rest.partition(":")
+        if pk.isdigit() and page.isdigit():
+            return category_reply(catalog, int(pk), int(page))
+    elif kind == "s":
+        return service_reply(catalog, rest)
+    elif kind == "p":
+        return prices_reply(catalog, rest)
+    elif kind == "f":
+        return faq_reply(catalog, rest)
+    return categories_reply(catalog)
+
+
+# -------------------------------
+# Исходящие сообщения
+# -------------------------------
+class Outbox:
+    """
+    Очередь исходящих сообщений с лимитами Telegram: не чаще одного
+    сообщения в чат за chat_interval секунд и не больше rate сообщений в
+    секунду всего. Пока чат ждёт своей очереди, его текстовые сообщения
+    склеиваются в одно (до MESSAGE_LIMIT символов); клавиатура может быть
+    только у последнего из склеенных. На 429 отправка повторяется через
+    retry_after, который вернул Telegram.
+    """
+
+    def __init__(self, send, rate, chat_interval, max_retries=3):
+        self.send = send
+        self.interval = 1 / rate
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self.queue = asyncio.Queue()
+        self.pending = {}
+        self.ready_at = {}
+        self.tasks = set()
+
+    async def put(self, chat_id, text, markup=None):
+        await self.queue.put((chat_id, text, markup))
+
+    def _drain(self):
+        while not self.queue.empty():
+            chat_id, text, markup = self.queue.get_nowait()
+            self.pending.setdefault(chat_id, deque()).append((text, markup))
+
+    def _merge(self, messages):
+        text, markup = messages.popleft()
+        while markup is None and messages:
+            next_text, next_markup = messages[0]
+            if len(text) + 2 + len(next_text) > MESSAGE_LIMIT:
+                break
+            messages.popleft()
+            text, markup = f"{text}\n\n{next_text}", next_markup
+        return text, markup
+
+    async def _send(self, chat_id, text, markup):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.send(chat_id, text, markup)
+                return
+            except ApiTelegramException as e:
+                if e.error_code != 429 or attempt == self.max_retries:
+                    logger.warning("Сообщение в чат %s не отправлено: %s", chat_id, e.description)
+                    return
+                retry_after = e.result_json.get("parameters", {}).get("retry_after", 1)
+                self.ready_at[chat_id] = time.monotonic() + retry_after
+                await asyncio.sleep(retry_after)
+
+    async def run(self):
+        next_send = 0
+        while True:
+            if not self.pending:
+                chat_id, text, markup = await self.queue.get()
+                self.pending.setdefault(chat_id, deque()).append((text, markup))
+            self._drain()
+            chat_id = min(self.pending, key=lambda chat: self.ready_at.get(chat, 0))
+            delay = max(self.ready_at.get(chat_id, 0), next_send) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                # За время ожидания могли прийти ещё сообщения в этот чат
+                self._drain()
+            messages = self.pending[chat_id]
+            text, markup = self._merge(messages)
+            if not messages:
+                del self.pending[chat_id]
+            now = time.monotonic()
+            self.ready_at[chat_id] = now + self.chat_interval
+            next_send = now + self.interval
+            task = asyncio.create_task(self._send(chat_id, text, markup))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def join(self):
+        """Ждёт, пока всё поставленное в очередь будет отправлено."""
+        while not self.queue.empty() or self.pending or self.tasks:
+            await asyncio.sleep(0.01)
+
+
+# -------------------------------
+# Бот
+# -------------------------------
+def create_bot(token, store):
+    """(бот, очередь его исходящих сообщений). Очередь запускается отдельно: outbox.run()."""
+    bot = AsyncTeleBot(token, parse_mode="HTML")
+
+    async def send(chat_id, text, markup):
+        await bot.send_message(chat_id, text, reply_markup=markup, disable_web_page_preview=True)
+
+    outbox = Outbox(
+        send,
+        rate=settings.TELEGRAM_MESSAGES_PER_SECOND,
+        chat_interval=settings.TELEGRAM_CHAT_INTERVAL,
+    )
+
+    @bot.message_handler(commands=["start", "help", "catalog"])
+    async def start(message):
+        catalog = await store.get()
+        text, markup = categories_reply(catalog)
+        if message.text.startswith(("/start", "/help")):
+            text = "Здравствуйте! Я помогу подобрать услугу, узнать цены и ответы на частые вопросы.\n\n" + text
+        await outbox.put(message.chat.id, text, markup)
+
+    @bot.callback_query_handler(func=lambda call: True)
+    async def callback(call):
+        catalog = await store.get()
+        await bot.answer_callback_query(call.id)
+        await outbox.put(call.message.chat.id, *callback_reply(catalog, call.data or ""))
+
+    @bot.message_handler(content_types=["text"])
+    async def question(message):
+        catalog = await store.get()
+        await outbox.put(message.chat.id, *text_reply(catalog, message.text))
+
+    return bot, outbox
+
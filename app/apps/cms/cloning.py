@@ -0,0 +1,97 @@
+from django.db import models, transaction
+from django.utils import timezone
+
+from apps.base.cache import CATALOG, bump_on_commit, category_scope
+from apps.cms import models as cms_models
+from apps.cms.loaders import SERVICE_SECTIONS
+from apps.cms.search import update_search_vectors
+from apps.cms.slugs import save_with_unique_slugs, slug_base
+from apps.cms.snapshots import rebuild_snapshots
+
+COPY_TITLE_SUFFIX = " (копия)"
+BATCH_SIZE = 1000
+
+# Поля, которые при копировании задаются заново, а не переносятся
+SERVICE_SKIP_FIELDS = {"id", "organization", "title", "slug", "created_at", "updated_at", "search_vector"}
+SECTION_SKIP_FIELDS = {"id", "service", "updated_at"}
+
+
+def _copy_values(obj, skip):
+    """Значения полей объекта для конструктора копии (файлы — по имени, без перезаписи)."""
+    values = {}
+    for field in obj._meta.concrete_fields:
+        if field.name in skip:
+            continue
+        value = getattr(obj, field.attname)
+        if isinstance(field, models.FileField):
+            value = value.name if value else None
+        values[field.attname] = value
+    return values
+
+
+def clone_services(services, organization=None):
+    """
+    Копирует услуги вместе со всеми разделами (SERVICE_SECTIONS).
+
+    Работает пачкой: один bulk_create для услуг и по одному чтению и
+    bulk_create на каждый раздел, сколько бы услуг и пунктов ни было.
+    Всё выполняется в одной транзакции — при ошибке не остаётся
+    частичных копий. organization — категория для копий (по умолчанию
+    та же, что у оригинала). Возвращает новые услуги в порядке исходных.
+    """
+    services = list(services)
+    if not services:
+        return []
+
+    with transaction.atomic():
+        clones = [
+            cms_models.Service(
+                organization_id=organization.pk if organization else service.organization_id,
+                title=f"{service.title}{COPY_TITLE_SUFFIX}",
+                **_copy_values(service, SERVICE_SKIP_FIELDS),
+            )
+            for service in services
+        ]
+
+        def assign(slugs):
+            for clone, slug in zip(clones, slugs):
+                clone.slug = slug
+
+        # Slug'и копий: "<slug>-copy", "<slug>-copy-2"... одним запросом на всю пачку
+        save_with_unique_slugs(
+            cms_models.Service,
+            [slug_base(service.title) + "-copy" for service in services],
+            assign,
+            lambda: cms_models.Service.objects.bulk_create(clones, batch_size=BATCH_SIZE),
+        )
+        clone_ids = {service.pk: clone.pk for service, clone in zip(services, clones)}
+
+        for model, _ordering in SERVICE_SECTIONS.values():
+            items = (
+                model.objects.filter(service_id__in=clone_ids)
+                .order_by("service_id", "pk")
+                .iterator(chunk_size=BATCH_SIZE)
+            )
+            batch = []
+            for item in items:
+                batch.append(model(
+                    service_id=clone_ids[item.service_id],
+                    **_copy_values(item, SECTION_SKIP_FIELDS),
+                ))
+                if len(batch) >= BATCH_SIZE:
+                    model.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                model.objects.bulk_create(batch)
+
+        # bulk_create не шлёт сигналы — отмечаем изменение списков услуг сами
+        organization_ids = {clone.organization_id for clone in clones}
+        cms_models.CategoryOrganization.objects.filter(pk__in=organization_ids).update(
+            updated_at=timezone.now()
+        )
+        bump_on_commit(CATALOG, *(category_scope(pk) for pk in organization_ids))
+        clones_queryset = cms_models.Service.objects.filter(pk__in=clone_ids.values())
+        update_search_vectors(clones_queryset)
+        rebuild_snapshots(clones_queryset)
+
+    return clones
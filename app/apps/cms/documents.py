@@ -0,0 +1,109 @@
+import hashlib
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.templatetags.static import static
+
+from apps.base.cache import CHROME, get_versions, service_scope
+from apps.base.fields import is_raw
+from apps.cms.loaders import SERVICE_SECTIONS, load_service
+
+# -------------------------------
+# Документы каталога для JSON API
+# -------------------------------
+# Услуга целиком (со всеми разделами) собирается в один словарь без
+# обращений к связанным моделям при сериализации. Файлы отдаются как
+# {"name": ..., "url": <абсолютный URL>}.
+DOCUMENT_KEY = "service-document:{}"
+
+# Служебные поля пунктов, которые не нужны клиентам
+ITEM_SKIP_FIELDS = {"service", "is_active"}
+SERVICE_SKIP_FIELDS = {"organization", "is_active", "search_vector"}
+
+
+def media(file, base_url):
+    """Файл как {"name", "url"}; пока загрузка обрабатывается — URL заглушки."""
+    if not file:
+        return None
+    url = static(settings.IMAGE_PLACEHOLDER) if is_raw(file.name) else file.url
+    return {"name": file.name, "url": urljoin(base_url, url)}
+
+
+def object_document(obj, base_url, skip=ITEM_SKIP_FIELDS):
+    """
+    Все поля объекта, кроме skip. Для полей с choices добавляется
+    <поле>_display с подписью.
+    """
+    data = {}
+    for field in obj._meta.concrete_fields:
+        if field.name in skip:
+            continue
+        if isinstance(field, models.FileField):
+            data[field.name] = media(getattr(obj, field.name), base_url)
+            continue
+        data[field.attname] = getattr(obj, field.attname)
+        if field.choices:
+            data[f"{field.name}_display"] = getattr(obj, f"get_{field.name}_display")()
+    return data
+
+
+def category_document(category, base_url):
+    return {
+        "id": category.pk,
+        "name": category.name,
+        "descriptions": category.descriptions,
+        "image": media(category.image, base_url),
+        "order": category.order,
+    }
+
+
+def service_document(service, base_url):
+    """Документ услуги, загруженной load_service (разделы уже в active_*)."""
+    document = object_document(service, base_url, skip=SERVICE_SKIP_FIELDS)
+    document["category"] = {"id": service.organization.pk, "name": service.organization.name}
+    document["sections"] = {
+        related_name: [object_document(item, base_url) for item in getattr(service, f"active_{related_name}")]
+        for related_name in SERVICE_SECTIONS
+    }
+    return document
+
+
+def get_service_document(slug, base_url):
+    """
+    Документ услуги из кэша текущей версии контента. Версии читаются до
+    обращения к БД, как и в cached_page. Название категории входит в
+    документ, поэтому учитывается и версия "chrome".
+    """
+    versions = get_versions(CHROME, service_scope(slug))
+    key = DOCUMENT_KEY.format(hashlib.md5(
+        f"{slug}:{base_url}:{versions[CHROME]}:{versions[service_scope(slug)]}".encode()
+    ).hexdigest())
+    document = cache.get(key)
+    if document is None:
+        document = service_document(load_service(slug), base_url)
+        cache.set(key, document, settings.PAGE_CACHE_TIMEOUT)
+    return document
+
+
+def project(document, fields):
+    """
+    Оставляет в документе только перечисленные поля. Вложенные — через
+    точку: "title,sections.faq_items". Неизвестные поля пропускаются.
+    """
+    if not fields:
+        return document
+    result = {}
+    for path in fields:
+        source, target = document, result
+        *parents, leaf = path.split(".")
+        for part in parents:
+            if not isinstance(source.get(part), dict):
+                break
+            source = source[part]
+            target = target.setdefault(part, {})
+        else:
+            if leaf in source:
+                target[leaf] = source[leaf]
+    return result
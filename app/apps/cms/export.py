@@ -0,0 +1,172 @@
+import hashlib
+import json
+import multiprocessing
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from apps.base import models as base_models
+from apps.base.cache import release
+from apps.base.db import close_connections
+from apps.cms import models as cms_models
+
+# -------------------------------
+# Статический экспорт каталога
+# -------------------------------
+# Публичные страницы рендерятся в <STATIC_EXPORT_ROOT>/<путь>/index.html,
+# nginx отдаёт их напрямую, а Django получает только админку и промахи.
+# В манифесте хранится отпечаток каждой страницы, поэтому повторный
+# экспорт перерисовывает только то, что изменилось.
+MANIFEST_NAME = ".manifest.json"
+PAGE_FILE = "index.html"
+CATEGORY_MENU_FIELDS = ("pk", "name", "image", "descriptions", "is_active", "order")
+
+
+def _fingerprint(*parts):
+    return hashlib.md5(":".join(map(str, (release()[0], *parts))).encode()).hexdigest()
+
+
+def public_pages():
+    """
+    Пары (путь, отпечаток) всех публичных страниц каталога.
+
+    Отпечаток строится по updated_at из БД (правка пункта услуги
+    обновляет услугу, правка услуги — категорию) и по идентификатору
+    выкладки, поэтому не зависит от того, общий ли кэш у процессов.
+    """
+    # "Обвязка" есть на всех страницах: настройки, баннеры, меню категорий.
+    # updated_at категории меняется и от правок её услуг, поэтому для меню
+    # берём сами выводимые поля, а не время изменения
+    chrome = [
+        model.objects.aggregate(count=Count("pk"), updated=Max("updated_at"))
+        for model in (base_models.Settings, base_models.Banner)
+    ]
+    chrome.append(list(
+        cms_models.CategoryOrganization.objects.order_by("pk").values_list(*CATEGORY_MENU_FIELDS)
+    ))
+    pages = [
+        (reverse("index-page"), _fingerprint(chrome)),
+        (reverse("category-page"), _fingerprint(chrome)),
+    ]
+    categories = dict(
+        cms_models.CategoryOrganization.objects.filter(is_active=True).values_list("pk", "updated_at")
+    )
+    for pk, updated_at in categories.items():
+        pages.append((reverse("category-detail", args=[pk]), _fingerprint(chrome, updated_at)))
+    # От категории страница услуги берёт только ссылку (pk), она входит в отпечаток
+    services = cms_models.Service.objects.filter(organization_id__in=categories, is_active=True)
+    for slug, updated_at, organization_id in services.values_list("slug", "updated_at", "organization_id"):
+        pages.append((
+            reverse("service-detail", args=[slug]),
+            _fingerprint(chrome, organization_id, updated_at),
+        ))
+    return pages
+
+
+def page_file(root, path):
+    return Path(root, path.strip("/"), PAGE_FILE)
+
+
+def render_page(job):
+    """
+    Рендерит одну страницу через её view (вместе с cached_page) и пишет
+    файл атомарно. Возвращает (путь, отпечаток) или (путь, None), если
+    страница больше не отдаётся (например, услугу выключили).
+    """
+    root, path, fingerprint = job
+    target = page_file(root, path)
+    match = resolve(path)
+    try:
+        response = match.func(RequestFactory().get(path), *match.args, **match.kwargs)
+    except Http404:
+        response = None
+    if response is None or response.status_code != 200:
+        target.unlink(missing_ok=True)
+        return path, None
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{PAGE_FILE}.{os.getpid()}.tmp")
+    tmp.write_bytes(response.content)
+    os.replace(tmp, target)
+    return path, fingerprint
+
+
+def load_manifest(root):
+    try:
+        with open(Path(root, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(root, manifest):
+    path = Path(root, MANIFEST_NAME)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=0, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def export_site(root=None, workers=1, full=False):
+    """
+    Экспортирует изменившиеся страницы. Возвращает словарь со счётчиками
+    rendered / skipped / removed.
+
+    При workers > 1 страницы рендерятся в дочерних процессах (fork);
+    им нужны уже зафиксированные данные, поэтому внутри транзакции
+    (в тестах) используйте workers=1.
+    """
+    root = Path(root or settings.STATIC_EXPORT_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = {} if full else load_manifest(root)
+
+    pages = dict(public_pages())
+    stale = [
+        (str(root), path, fingerprint)
+        for path, fingerprint in pages.items()
+        if manifest.get(path) != fingerprint or not page_file(root, path).exists()
+    ]
+
+    stats = {"rendered": 0, "skipped": len(pages) - len(stale), "removed": 0}
+    try:
+        if workers > 1 and len(stale) > 1:
+            # Дочерние процессы открывают свои соединения с БД
+            close_connections()
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                results = pool.imap_unordered(render_page, stale, chunksize=4)
+                stats["rendered"] += _apply(manifest, results)
+        else:
+            stats["rendered"] += _apply(manifest, map(render_page, stale))
+
+        # Страницы, которых больше нет в каталоге
+        for path in set(manifest) - set(pages):
+            page_file(root, path).unlink(missing_ok=True)
+            manifest.pop(path)
+            stats["removed"] += 1
+    finally:
+        save_manifest(root, manifest)
+
+    _prune_empty_dirs(root)
+    return stats
+
+
+def _apply(manifest, results):
+    rendered = 0
+    for path, fingerprint in results:
+        if fingerprint is None:
+            manifest.pop(path, None)
+        else:
+            manifest[path] = fingerprint
+            rendered += 1
+    return rendered
+
+
+def _prune_empty_dirs(root):
+    for directory in sorted((p for p in root.rglob("*") if p.is_dir()), reverse=True):
+        if not any(directory.iterdir()):
+            directory.rmdir()
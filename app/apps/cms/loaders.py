@@ -0,0 +1,61 @@
+import itertools
+
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+
+from apps.cms import models as cms_models
+
+# -------------------------------
+# Разделы страницы услуги
+# -------------------------------
+# related_name -> (модель, порядок сортировки).
+# Один раздел = один запрос, сколько бы пунктов в нём ни было.
+SERVICE_SECTIONS = {
+    "zone_items": (cms_models.ServiceZoneItem, ("zone", "order", "id")),
+    "chemical_items": (cms_models.ServiceChemicalItem, ("order", "id")),
+    "equipment_items": (cms_models.ServiceEquipmentItem, ("order", "id")),
+    "faq_items": (cms_models.ServiceFAQItem, ("order", "id")),
+    "requirement_items": (cms_models.ServiceRequirementItem, ("order", "id")),
+    "work_condition_items": (cms_models.ServiceWorkConditionItem, ("order", "id")),
+    "excluded_items": (cms_models.ServiceExcludedItem, ("order", "id")),
+    "price_items": (cms_models.ServicePriceItem, ("order", "id")),
+    "cases_before_after": (cms_models.ServiceCaseBeforeAfter, ("order", "id")),
+    "client_companies": (cms_models.ServiceClientCompany, ("order", "id")),
+    "documents": (cms_models.ServiceDocument, ("order", "id")),
+}
+
+ZONE_LABELS = dict(cms_models.ServiceZoneItem.ZONE_CHOICES)
+
+
+def section_prefetches():
+    """Prefetch всех активных пунктов услуги, уже отсортированных."""
+    return [
+        Prefetch(
+            related_name,
+            queryset=model.objects.filter(is_active=True).order_by(*ordering),
+            to_attr=f"active_{related_name}",
+        )
+        for related_name, (model, ordering) in SERVICE_SECTIONS.items()
+    ]
+
+
+def group_zone_items(zone_items):
+    """Группирует отсортированные по зоне пункты (словари из снимка) для шаблона."""
+    return [
+        {"zone": zone, "label": ZONE_LABELS.get(zone, zone), "items": list(items_iter)}
+        for zone, items_iter in itertools.groupby(zone_items, key=lambda x: x["zone"])
+    ]
+
+
+def load_service(slug):
+    """
+    Активная услуга с категорией и всеми активными пунктами разделов
+    (в атрибутах active_<раздел>) — по одному запросу на раздел.
+    """
+    return get_object_or_404(
+        cms_models.Service.objects
+        .select_related("organization")
+        .prefetch_related(*section_prefetches()),
+        slug=slug,
+        is_active=True,
+    )
@@ -0,0 +1,269 @@
+import asyncio
+import ipaddress
+import itertools
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import aiohttp
+from django.urls import URLPattern, reverse
+
+from apps.base import urls as base_urls
+from apps.base.assets import current_manifest
+from apps.cms import models as cms_models
+from apps.cms import urls as cms_urls
+
+# -------------------------------
+# Нагрузочный прогон
+# -------------------------------
+# python manage.py loadtest гоняет по кругу все публичные URL каталога
+# (apps/cms/urls.py и apps/base/urls.py для каждой активной категории и
+# услуги) с нарастающим числом одновременных соединений и собирает
+# задержки в гистограмму с логарифмическими корзинами, как HdrHistogram.
+# Только localhost: это замер своего стенда, а не чужого сервера.
+APP_DIR = Path(__file__).resolve().parents[2]
+
+# Маршруты, которые в прогон не входят: только для staff
+EXCLUDED_ROUTES = {"db-pool"}
+
+# Параметры маршрутов, которым без них нечего отдавать
+ROUTE_QUERIES = {
+    "api-search": "q=уборка офиса",
+    "api-suggest": "q=убо",
+}
+
+
+def crawl_urls():
+    """(маршрут, путь) для каждого публичного URL: категории и услуги — все активные."""
+    categories = list(
+        cms_models.CategoryOrganization.objects.filter(is_active=True).values_list("pk", flat=True)
+    )
+    services = list(
+        cms_models.Service.objects
+        .filter(is_active=True, organization__is_active=True)
+        .values_list("slug", flat=True)
+    )
+    argument_values = {
+        "pk": categories,
+        "slug": services,
+        # Бандлы CSS/JS текущей сборки
+        "name": list(current_manifest().values()),
+    }
+
+    urls = []
+    for pattern in cms_urls.urlpatterns + base_urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or pattern.name in EXCLUDED_ROUTES:
+            continue
+        converters = list(pattern.pattern.converters)
+        if not converters:
+            path = reverse(pattern.name)
+            if pattern.name in ROUTE_QUERIES:
+                path = f"{path}?{ROUTE_QUERIES[pattern.name]}"
+            urls.append((pattern.name, path))
+            continue
+        (argument,) = converters
+        urls.extend(
+            (pattern.name, reverse(pattern.name, kwargs={argument: value}))
+            for value in argument_values.get(argument, [])
+        )
+    return urls
+
+
+def check_local(url):
+    """ValueError, если адрес не на этой машине."""
+    host = urlsplit(url).hostname
+    if not host:
+        raise ValueError(f"Не указан хост: {url}")
+    addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    if not all(ipaddress.ip_address(address.split("%")[0]).is_loopback for address in addresses):
+        raise ValueError(f"Нагрузку можно давать только на localhost, а {host} -> {', '.join(sorted(addresses))}")
+
+
+# -------------------------------
+# Гистограмма задержек
+# -------------------------------
+class LatencyHistogram:
+    """
+    Задержки в микросекундах в логарифмических корзинах: у значения
+    хранятся старшие SIGNIFICANT_BITS бит, погрешность меньше 1%, а
+    память не зависит от числа запросов. Как у HdrHistogram, гистограммы
+    разных прогонов можно складывать и сравнивать по перцентилям.
+    """
+    SIGNIFICANT_BITS = 8
+
+    def __init__(self, counts=None):
+        self.counts = Counter({int(value): count for value, count in (counts or {}).items()})
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def record(self, seconds):
+        value = max(1, round(seconds * 1_000_000))
+        shift = max(0, value.bit_length() - self.SIGNIFICANT_BITS)
+        # Верхняя граница корзины: перцентиль не бывает оптимистичнее замера
+        self.counts[(((value >> shift) + 1) << shift) - 1] += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+
+    def percentile(self, percent):
+        """Значение (мс), не больше которого percent процентов задержек."""
+        total = self.total
+        if not total:
+            return 0.0
+        rank = max(1, math.ceil(percent / 100 * total))
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= rank:
+                return value / 1000
+        return max(self.counts) / 1000
+
+    def distribution(self):
+        """
+        Строки (мс, перцентиль, число запросов, 1/(1-перцентиль)) на точках
+        0, 50, 75, 87.5, ... % — каждая вдвое ближе к 100%, как в выводе
+        HdrHistogram, пока на хвост приходится хотя бы один запрос.
+        """
+        total = self.total
+        rows = []
+        step = 0
+        while total:
+            fraction = 1 - 0.5 ** step
+            if step and (1 - fraction) * total < 1:
+                break
+            rank = max(1, math.ceil(fraction * total))
+            rows.append((self.percentile(fraction * 100), fraction, rank, 1 / (1 - fraction)))
+            step += 1
+        rows.append((self.percentile(100), 1.0, total, math.inf))
+        return rows
+
+    def summary(self):
+        return {
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.percentile(100),
+        }
+
+
+# -------------------------------
+# Прогон
+# -------------------------------
+async def run_stage(base_url, urls, concurrency, duration):
+    """
+    concurrency соединений по duration секунд запрашивают urls по кругу
+    (закрытая модель: следующий запрос — после ответа на предыдущий).
+    """
+    queue = itertools.cycle(urls)
+    histogram = LatencyHistogram()
+    by_route = defaultdict(LatencyHistogram)
+    statuses = Counter()
+    errors = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker(session):
+        while time.perf_counter() < deadline:
+            route, path = next(queue)
+            started = time.perf_counter()
+            try:
+                async with session.get(base_url + path, allow_redirects=False) as response:
+                    await response.read()
+                    status = response.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                errors[error.__class__.__name__] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            statuses[status] += 1
+            histogram.record(elapsed)
+            by_route[route].record(elapsed)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "duration": round(elapsed, 2),
+        "requests": histogram.total,
+        "rps": round(histogram.total / elapsed, 1),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "errors": dict(errors),
+        "latency_ms": histogram.summary(),
+        "routes": {route: {"requests": h.total, **h.summary()} for route, h in sorted(by_route.items())},
+        "histogram": {str(value): count for value, count in sorted(histogram.counts.items())},
+    }
+
+
+# -------------------------------
+# Свой сервер
+# -------------------------------
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, extra_env=None):
+    """gunicorn с core/gunicorn_conf.py в режиме mode (sync/gthread/asgi) на 127.0.0.1:port."""
+    env = {
+        **os.environ,
+        "GUNICORN_MODE": mode,
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        # Журнал каждого запроса заметно тормозит воркеры под нагрузкой
+        "GUNICORN_ACCESS_LOG": os.devnull,
+        **(extra_env or {}),
+    }
+    hosts = [host for host in env.get("ALLOWED_HOSTS", "").split(",") if host]
+    env["ALLOWED_HOSTS"] = ",".join(hosts + ["127.0.0.1"])
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "core/gunicorn_conf.py"],
+        cwd=APP_DIR, env=env,
+    )
+
+
+async def wait_ready(base_url, timeout=60):
+    """Ждёт 200 от /readyz; TimeoutError, если сервер не поднялся."""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(base_url + "/readyz") as response:
+                    if response.status == 200:
+                        return
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"{base_url} не ответил на /readyz за {timeout} с")
+
+
+def compare_reports(current, previous):
+    """Строки "c=N: rps, p50, p99 — было -> стало (±%)" по совпадающим ступеням."""
+    previous_stages = {stage["concurrency"]: stage for stage in previous.get("stages", [])}
+    lines = []
+    for stage in current["stages"]:
+        old = previous_stages.get(stage["concurrency"])
+        if old is None:
+            continue
+        cells = []
+        for label, new_value, old_value in (
+            ("rps", stage["rps"], old["rps"]),
+            ("p50", stage["latency_ms"]["p50"], old["latency_ms"]["p50"]),
+            ("p99", stage["latency_ms"]["p99"], old["latency_ms"]["p99"]),
+        ):
+            change = f"{(new_value - old_value) / old_value * 100:+.0f}%" if old_value else "—"
+            cells.append(f"{label} {old_value} -> {new_value} ({change})")
+        lines.append(f"c={stage['concurrency']}: " + ", ".join(cells))
+    return lines
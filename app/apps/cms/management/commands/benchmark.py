@@ -0,0 +1,99 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from apps.cms.benchmarks import (
+    BASELINE_PATH, DEFAULT_SIZES, compare, load_baseline, parse_size, report, run_benchmarks, save_baseline,
+)
+
+# Кэш процесса вместо Redis: замеры не трогают версии контента продакшна
+BENCHMARK_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеры публичных страниц (index, category, category_detail, service_detail) на "
+        "каталогах заданного размера: запросы, время ответа и рендера, пик памяти. "
+        "Сравнивает с baseline и завершается ошибкой при превышении бюджета. "
+        "Работает в отдельной тестовой БД."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default=",".join(DEFAULT_SIZES),
+            help="Размеры каталога через запятую: КАТЕГОРИИxУСЛУГИxПУНКТЫ (по умолчанию %(default)s)",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Повторов на страницу для медианы времени (по умолчанию %(default)s)",
+        )
+        parser.add_argument(
+            "--margin", type=float, default=0.25,
+            help="Допустимый рост времени и памяти относительно baseline (по умолчанию %(default)s = 25%%)",
+        )
+        parser.add_argument(
+            "--baseline", default=str(BASELINE_PATH),
+            help="JSON с бюджетами (по умолчанию apps/cms/benchmark_baseline.json)",
+        )
+        parser.add_argument(
+            "--update", action="store_true",
+            help="Записать результаты как новый baseline вместо сравнения",
+        )
+        parser.add_argument(
+            "--keepdb", action="store_true",
+            help="Не удалять тестовую БД между запусками (быстрее повторный запуск)",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [size.strip() for size in options["sizes"].split(",") if size.strip()]
+        for size in sizes:
+            try:
+                parse_size(size)
+            except ValueError as error:
+                raise CommandError(str(error))
+
+        started = time.monotonic()
+        old_name = connection.settings_dict["NAME"]
+        test_settings = connection.settings_dict["TEST"]
+        old_test_name = test_settings["NAME"]
+        # Своё имя БД, чтобы --keepdb не пересекался с базой manage.py test;
+        # прежнее возвращается, чтобы не сбить тестовую БД дальше в процессе
+        test_settings["NAME"] = f"benchmark_{old_name}"
+        try:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+            try:
+                with override_settings(CACHES=BENCHMARK_CACHES):
+                    results = {size: self.run_size(size, options["repeat"]) for size in sizes}
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+        finally:
+            test_settings["NAME"] = old_test_name
+
+        if options["update"]:
+            save_baseline(results, options["baseline"])
+            self.stdout.write(report(results))
+            self.stdout.write(self.style.SUCCESS(f"Baseline записан: {options['baseline']}"))
+            return
+
+        try:
+            baseline = load_baseline(options["baseline"])
+        except FileNotFoundError:
+            baseline = {}
+        self.stdout.write(report(results, baseline))
+        failures = compare(results, baseline, options["margin"])
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f"Превышен бюджет: {len(failures)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Бюджеты соблюдены ({time.monotonic() - started:.1f} с)"
+        ))
+
+    def run_size(self, size, repeat):
+        # Каждый размер — на пустой БД: данные откатываются после замеров
+        with transaction.atomic():
+            results = run_benchmarks(size, repeat)
+            transaction.set_rollback(True)
+        return results
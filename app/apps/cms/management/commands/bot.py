@@ -0,0 +1,51 @@
+import asyncio
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from telebot import asyncio_helper
+
+from apps.cms.bot import CatalogStore, create_bot
+
+
+class Command(BaseCommand):
+    help = (
+        "Telegram-бот каталога: категории, услуги, цены и ответы на частые вопросы. "
+        "Отвечает из каталога в памяти, собранного из снимков услуг."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--api-url", default=settings.TELEGRAM_API_URL,
+            help="Адрес Bot API: {0} — токен, {1} — метод (по умолчанию TELEGRAM_API_URL)",
+        )
+
+    def handle(self, *args, **options):
+        token = settings.TELEGRAM_BOT_TOKEN
+        if not token:
+            raise CommandError("Не задан TELEGRAM_BOT_TOKEN")
+        asyncio_helper.API_URL = options["api_url"]
+        asyncio.run(self.run(token))
+        self.stdout.write(self.style.SUCCESS("Бот остановлен"))
+
+    async def run(self, token):
+        store = CatalogStore()
+        catalog = await store.get()
+        self.stdout.write(
+            f"Каталог загружен: {len(catalog.categories)} категорий, {len(catalog.services)} услуг"
+        )
+        bot, outbox = create_bot(token, store)
+        sender = asyncio.create_task(outbox.run())
+        polling = asyncio.create_task(bot.infinity_polling(timeout=30, skip_pending=True))
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, polling.cancel)
+        try:
+            await polling
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # Уже принятые ответы досылаются перед выходом
+            await outbox.join()
+            sender.cancel()
+            await bot.close_session()
@@ -0,0 +1,50 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from apps.cms import models as cms_models
+from apps.cms.transfer import CHUNK_SIZE, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает каталог (категории, услуги и пункты всех разделов) в JSONL или CSV. "
+        "Читает БД порциями, память не зависит от размера каталога."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", nargs="?", default="-", help="Файл (по умолчанию stdout)")
+        parser.add_argument(
+            "--format", choices=sorted(FORMATS),
+            help="Формат (по умолчанию — по расширению файла, иначе jsonl)",
+        )
+        parser.add_argument(
+            "--category", type=int, action="append", metavar="PK",
+            help="Только услуги этих категорий (можно несколько раз)",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=CHUNK_SIZE,
+            help="Строк за одно чтение из БД (по умолчанию %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        services = None
+        if options["category"]:
+            services = cms_models.Service.objects.filter(organization_id__in=options["category"])
+
+        fmt = options["format"]
+        if fmt is None:
+            fmt = "csv" if Path(options["output"]).suffix.lower() == ".csv" else "jsonl"
+
+        started = time.monotonic()
+        lines = export_lines(fmt, services, options["chunk_size"])
+        if options["output"] == "-":
+            sys.stdout.writelines(lines)
+            return
+        with open(options["output"], "w", encoding="utf-8", newline="") as file:
+            file.writelines(lines)
+        self.stdout.write(self.style.SUCCESS(
+            f"Каталог выгружен в {options['output']} ({time.monotonic() - started:.1f} с)"
+        ))
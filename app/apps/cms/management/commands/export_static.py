@@ -0,0 +1,48 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.cms.export import export_site
+
+
+class Command(BaseCommand):
+    help = (
+        "Рендерит публичные страницы каталога в HTML-файлы для nginx. "
+        "Повторный запуск перерисовывает только страницы с изменившимся контентом."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.STATIC_EXPORT_ROOT,
+            help="Каталог для страниц (по умолчанию STATIC_EXPORT_ROOT)",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Число процессов для рендера (по умолчанию — число ядер)",
+        )
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Перерисовать все страницы, не глядя на прошлый экспорт",
+        )
+        parser.add_argument(
+            "--watch", type=float, metavar="SECONDS",
+            help="Не завершаться: проверять изменения каждые SECONDS секунд",
+        )
+
+    def handle(self, *args, **options):
+        full = options["full"]
+        while True:
+            started = time.monotonic()
+            stats = export_site(options["output"], workers=options["workers"], full=full)
+            if stats["rendered"] or stats["removed"] or not options["watch"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Отрисовано: {stats['rendered']}, без изменений: {stats['skipped']}, "
+                    f"удалено: {stats['removed']} ({time.monotonic() - started:.1f} с)"
+                ))
+            if not options["watch"]:
+                break
+            full = False
+            time.sleep(options["watch"])
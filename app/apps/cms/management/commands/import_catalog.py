@@ -0,0 +1,61 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cms.transfer import BATCH_SIZE, FORMATS, CatalogImportError, describe_stats, import_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает каталог из JSONL или CSV (формат export_catalog) пачками, "
+        "по транзакции на пачку. С --upsert обновляет у услуг с тем же slug поля "
+        "из записи и заменяет пункты их разделов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Файл или - для stdin")
+        parser.add_argument(
+            "--format", choices=sorted(FORMATS),
+            help="Формат (по умолчанию — по расширению файла, иначе jsonl)",
+        )
+        parser.add_argument(
+            "--upsert", action="store_true",
+            help="Обновлять существующие услуги (по slug) вместо ошибки",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Только проверить: записать и откатить",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE,
+            help="Записей в пачке (по умолчанию %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["format"]
+        if fmt is None:
+            fmt = "csv" if Path(options["input"]).suffix.lower() == ".csv" else "jsonl"
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть положительным")
+
+        started = time.monotonic()
+        try:
+            if options["input"] == "-":
+                stats = self.load(sys.stdin, fmt, options)
+            else:
+                with open(options["input"], encoding="utf-8-sig", newline="") as file:
+                    stats = self.load(file, fmt, options)
+        except CatalogImportError as error:
+            raise CommandError(f"Файл не загружен:\n{error}")
+
+        for line in describe_stats(stats):
+            self.stdout.write(line)
+        suffix = " (проверка, ничего не записано)" if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"Готово за {time.monotonic() - started:.1f} с{suffix}"))
+
+    def load(self, file, fmt, options):
+        return import_catalog(
+            file, fmt, upsert=options["upsert"], dry_run=options["dry_run"], batch_size=options["batch_size"],
+        )
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cms.loadtest import (
+    LatencyHistogram, check_local, compare_reports, crawl_urls, free_port, run_stage, start_server, wait_ready,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон по всем публичным URL каталога на localhost: ступени "
+        "одновременных соединений, запросы/с и перцентили задержек. Поднимает gunicorn "
+        "(core/gunicorn_conf.py) в выбранном режиме или нагружает уже запущенный --url."
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument(
+            "--server", choices=["gthread", "sync", "asgi"], default="gthread",
+            help="Поднять gunicorn в этом режиме на свободном порту (по умолчанию %(default)s)",
+        )
+        target.add_argument(
+            "--url", help="Адрес уже запущенного сервера, например http://127.0.0.1:8000",
+        )
+        parser.add_argument(
+            "--ramp", default="1,4,16,32",
+            help="Ступени одновременных соединений через запятую (по умолчанию %(default)s)",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=10,
+            help="Секунд на ступень (по умолчанию %(default)s)",
+        )
+        parser.add_argument(
+            "--warmup", type=float, default=3,
+            help="Секунд прогрева кэша страниц перед замерами (по умолчанию %(default)s)",
+        )
+        parser.add_argument(
+            "--workers", type=int,
+            help="GUNICORN_WORKERS для поднятого сервера (по умолчанию — как в gunicorn_conf.py)",
+        )
+        parser.add_argument("--output", help="Записать отчёт в JSON (с гистограммами)")
+        parser.add_argument("--compare", help="JSON прошлого прогона: показать изменения по ступеням")
+        parser.add_argument(
+            "--hdr", action="store_true",
+            help="Вывести распределение задержек по перцентилям для каждой ступени",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            ramp = [int(value) for value in options["ramp"].split(",")]
+        except ValueError:
+            raise CommandError("--ramp: числа через запятую, например 1,4,16")
+        if not ramp or min(ramp) < 1:
+            raise CommandError("--ramp: нужна хотя бы одна ступень от 1 соединения")
+
+        urls = crawl_urls()
+        self.stdout.write(f"URL в прогоне: {len(urls)}")
+
+        server = None
+        if options["url"]:
+            base_url = options["url"].rstrip("/")
+            try:
+                check_local(base_url)
+            except (ValueError, OSError) as error:
+                raise CommandError(str(error))
+            mode = "external"
+        else:
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            extra_env = {"GUNICORN_WORKERS": str(options["workers"])} if options["workers"] else None
+            server = start_server(options["server"], port, extra_env)
+            mode = options["server"]
+            self.stdout.write(f"gunicorn ({mode}) на {base_url}, pid {server.pid}")
+
+        try:
+            stages = asyncio.run(self.run(base_url, urls, ramp, options))
+        finally:
+            if server is not None:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=60)
+
+        report = {
+            "mode": mode,
+            "url": base_url,
+            "urls": len(urls),
+            "cpu_count": os.cpu_count(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "stages": stages,
+        }
+        self.print_report(report, options["hdr"])
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                previous = json.load(file)
+            self.stdout.write(f"\nСравнение с {options['compare']} ({previous.get('mode')}):")
+            for line in compare_reports(report, previous):
+                self.stdout.write(f"  {line}")
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Отчёт: {options['output']}"))
+
+    async def run(self, base_url, urls, ramp, options):
+        try:
+            await wait_ready(base_url)
+        except TimeoutError as error:
+            raise CommandError(str(error))
+        if options["warmup"]:
+            await run_stage(base_url, urls, max(ramp), options["warmup"])
+        stages = []
+        for concurrency in ramp:
+            self.stdout.write(f"c={concurrency}, {options['duration']:g} с…")
+            stages.append(await run_stage(base_url, urls, concurrency, options["duration"]))
+        return stages
+
+    def print_report(self, report, hdr):
+        self.stdout.write(f"\nРежим: {report['mode']}, URL: {report['urls']}, ядер: {report['cpu_count']}")
+        self.stdout.write(
+            f"{'c':>5}{'запросов':>10}{'запр/с':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}"
+            f"{'p99.9':>9}{'max':>9}  ошибки"
+        )
+        for stage in report["stages"]:
+            latency = stage["latency_ms"]
+            failed = sum(stage["errors"].values()) + sum(
+                count for status, count in stage["statuses"].items() if not status.startswith("2")
+            )
+            self.stdout.write(
+                f"{stage['concurrency']:>5}{stage['requests']:>10}{stage['rps']:>9}"
+                + "".join(f"{latency[key]:>9.1f}" for key in ("p50", "p90", "p95", "p99", "p999", "max"))
+                + f"  {failed}"
+            )
+        self.stdout.write("Задержки в мс.")
+
+        if not hdr:
+            return
+        for stage in report["stages"]:
+            histogram = LatencyHistogram(stage["histogram"])
+            self.stdout.write(f"\nc={stage['concurrency']}:")
+            self.stdout.write(f"{'Value (ms)':>12} {'Percentile':>12} {'TotalCount':>12} {'1/(1-Percentile)':>18}")
+            for value, percentile, count, inverse in histogram.distribution():
+                self.stdout.write(f"{value:>12.3f} {percentile:>12.6f} {count:>12} {inverse:>18.2f}")
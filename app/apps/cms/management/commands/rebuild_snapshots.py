@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cms.snapshots import check_snapshots, rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает снимки страниц услуг (ServiceSnapshot) пачками. "
+        "С --check только сверяет снимки с данными и завершается ошибкой при расхождении."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Не пересобирать, а найти отсутствующие и устаревшие снимки",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            report = check_snapshots()
+            for slug in report["missing"]:
+                self.stderr.write(f"{slug}: нет снимка")
+            for slug in report["stale"]:
+                self.stderr.write(f"{slug}: снимок устарел")
+            if report["missing"] or report["stale"]:
+                raise CommandError(
+                    f"Расхождений: {len(report['missing']) + len(report['stale'])}. "
+                    "Запустите rebuild_snapshots без --check."
+                )
+            self.stdout.write(self.style.SUCCESS("Снимки совпадают с данными"))
+            return
+
+        started = time.monotonic()
+        count = rebuild_snapshots()
+        self.stdout.write(self.style.SUCCESS(
+            f"Пересобрано снимков: {count} ({time.monotonic() - started:.1f} с)"
+        ))
@@ -0,0 +1,73 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cms.seeding import SeedCatalogError, clear_seeded, seed_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет БД синтетическим каталогом для нагрузочных прогонов: категории, услуги, "
+        "пункты всех разделов и картинки-заглушки. Детерминирован по --seed. "
+        "Сгенерированное удаляется через --clear."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=1, help="Зерно генератора (по умолчанию %(default)s)")
+        parser.add_argument(
+            "--categories", type=int, default=12, help="Число категорий (по умолчанию %(default)s)",
+        )
+        parser.add_argument(
+            "--services", type=int, default=5000, help="Число услуг (по умолчанию %(default)s)",
+        )
+        parser.add_argument(
+            "--items", type=int, default=20,
+            help="Пунктов в разделе услуги в среднем, ±50%% (по умолчанию %(default)s)",
+        )
+        parser.add_argument(
+            "--images", type=int, default=24,
+            help="Картинок-заглушек для обложек и кейсов (по умолчанию %(default)s)",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Процессов для рисования картинок (по умолчанию — число ядер)",
+        )
+        parser.add_argument(
+            "--skip-derived", action="store_true",
+            help="Не пересчитывать поисковый индекс и снимки услуг",
+        )
+        parser.add_argument(
+            "--clear", action="store_true",
+            help="Сначала удалить ранее сгенерированный каталог (с --services 0 — только удалить)",
+        )
+
+    def handle(self, *args, **options):
+        for name in ("categories", "services", "items", "images", "workers"):
+            if options[name] < 0:
+                raise CommandError(f"--{name} не может быть отрицательным")
+        if options["services"] and not options["categories"]:
+            raise CommandError("Для услуг нужна хотя бы одна категория")
+
+        if options["clear"]:
+            deleted = clear_seeded()
+            self.stdout.write("Удалено: " + ", ".join(f"{name} {count}" for name, count in deleted.items()))
+            if not options["services"]:
+                return
+
+        try:
+            stats = seed_catalog(
+                seed=options["seed"],
+                categories=options["categories"],
+                services=options["services"],
+                items=options["items"],
+                images=options["images"],
+                workers=max(1, options["workers"]),
+                derived=not options["skip_derived"],
+                log=self.stdout.write,
+            )
+        except SeedCatalogError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(
+            f"Категорий: {stats['categories']}, услуг: {stats['services']}, "
+            f"пунктов: {stats['child_rows']} (за {stats['rows_seconds']} с), всего {stats['seconds']} с"
+        ))
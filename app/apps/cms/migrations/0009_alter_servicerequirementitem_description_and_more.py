@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 10:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0008_servicerequirementitem_description'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='servicerequirementitem',
+            name='description',
+            field=models.CharField(blank=True, max_length=500, null=True, verbose_name='Описание'),
+        ),
+        migrations.CreateModel(
+            name='ServicePriceItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(help_text='Например: Генеральная уборка до 50 м²', max_length=255, verbose_name='Наименование')),
+                ('price', models.CharField(help_text='Например: от 15 000 сом или договорная', max_length=100, verbose_name='Стоимость')),
+                ('description', models.CharField(blank=True, help_text='Дополнительная информация о цене', max_length=500, null=True, verbose_name='Описание')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Порядок')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Показывать')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_items', to='cms.service', verbose_name='Услуга')),
+            ],
+            options={
+                'verbose_name': 'Цена услуги',
+                'verbose_name_plural': 'Цены услуг',
+                'ordering': ['order', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 10:34
+
+import apps.base.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0010_categoryorganization_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='categoryorganization',
+            name='image',
+            field=apps.base.fields.DeferredResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=100, scale=None, size=[1920, 1080], upload_to='category_image/', verbose_name='Фотография'),
+        ),
+        migrations.AlterField(
+            model_name='service',
+            name='cover_image',
+            field=apps.base.fields.DeferredResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=95, scale=None, size=[1920, 1080], upload_to='services/covers/', verbose_name='Обложка (фото)'),
+        ),
+        migrations.AlterField(
+            model_name='servicecasebeforeafter',
+            name='after_image',
+            field=apps.base.fields.DeferredResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=90, scale=None, size=[1920, 1080], upload_to='services/cases/after/', verbose_name='Фото ПОСЛЕ'),
+        ),
+        migrations.AlterField(
+            model_name='servicecasebeforeafter',
+            name='before_image',
+            field=apps.base.fields.DeferredResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=90, scale=None, size=[1920, 1080], upload_to='services/cases/before/', verbose_name='Фото ДО'),
+        ),
+        migrations.AlterField(
+            model_name='servicechemicalitem',
+            name='image',
+            field=apps.base.fields.DeferredResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=90, scale=None, size=[1920, 1080], upload_to='services/chemicals/', verbose_name='Фотография средства'),
+        ),
+        migrations.AlterField(
+            model_name='serviceclientcompany',
+            name='logo',
+            field=apps.base.fields.DeferredResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=90, scale=None, size=[1920, 1080], upload_to='services/clients/logos/', verbose_name='Логотип'),
+        ),
+        migrations.AlterField(
+            model_name='serviceequipmentitem',
+            name='image',
+            field=apps.base.fields.DeferredResizedImageField(blank=True, crop=None, force_format='WEBP', keep_meta=True, null=True, quality=90, scale=None, size=[1920, 1080], upload_to='services/equipment/', verbose_name='Фотография оборудования'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2 on 2026-10-18 10:39
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не блокирует запись в таблицы, но не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('cms', '0011_deferred_image_fields'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['organization', 'order', 'title'], name='cms_service_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='servicecasebeforeafter',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_case_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='servicechemicalitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_chemicalitem_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='serviceclientcompany',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_clientcompany_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='servicedocument',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_document_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='serviceequipmentitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_equipmentitem_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='serviceexcludeditem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_excludeditem_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='servicefaqitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_faqitem_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='servicepriceitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_priceitem_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='servicerequirementitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_requirement_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='serviceworkconditionitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'order', 'id'], name='cms_workcondition_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='servicezoneitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['service', 'zone', 'order', 'id'], name='cms_zoneitem_active_idx'),
+        ),
+    ]
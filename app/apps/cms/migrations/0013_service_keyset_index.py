@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 10:41
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Новый индекс строится до удаления старого, чтобы страницы категорий не остались без индекса
+    atomic = False
+
+    dependencies = [
+        ('cms', '0012_partial_active_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['organization', 'order', 'title', 'id'], name='cms_service_keyset_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='service',
+            name='cms_service_active_idx',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 10:44
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0013_service_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceSnapshot',
+            fields=[
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='cms.service', verbose_name='Услуга')),
+                ('slug', models.SlugField(unique=True, verbose_name='Slug')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активна')),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Данные')),
+                ('built_at', models.DateTimeField(auto_now=True, verbose_name='Собран')),
+            ],
+            options={
+                'verbose_name': 'Снимок услуги',
+                'verbose_name_plural': 'Снимки услуг',
+            },
+        ),
+    ]
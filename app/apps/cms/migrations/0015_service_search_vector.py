@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-18 10:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# Копия apps.cms.search на момент миграции: последующие правки весов
+# и разделов не должны менять то, что делает эта миграция
+SEARCH_CONFIG = 'russian'
+TITLE_WEIGHT = 'A'
+SEARCH_SOURCES = [
+    ('ServiceZoneItem', 'text', 'B'),
+    ('ServiceFAQItem', 'question', 'B'),
+    ('ServiceFAQItem', 'answer', 'C'),
+    ('ServiceChemicalItem', 'name', 'B'),
+    ('ServiceChemicalItem', 'description', 'C'),
+    ('ServiceEquipmentItem', 'name', 'B'),
+    ('ServiceEquipmentItem', 'description', 'C'),
+    ('ServicePriceItem', 'title', 'B'),
+]
+
+
+def fill_search_vectors(apps, schema_editor):
+    vector = SearchVector('title', config=SEARCH_CONFIG, weight=TITLE_WEIGHT)
+    for model_name, field, weight in SEARCH_SOURCES:
+        text = Subquery(
+            apps.get_model('cms', model_name)._base_manager
+            .filter(service=OuterRef('pk'), is_active=True)
+            .order_by()
+            .values('service')
+            .annotate(text=StringAgg(field, ' '))
+            .values('text')
+        )
+        vector += SearchVector(text, config=SEARCH_CONFIG, weight=weight)
+    apps.get_model('cms', 'Service')._base_manager.update(search_vector=vector)
+
+
+class Migration(migrations.Migration):
+    # Индекс строится без блокировки записи в cms_service
+    atomic = False
+
+    dependencies = [
+        ('cms', '0014_servicesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый индекс'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='service',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='cms_service_search_idx'),
+        ),
+    ]
@@ -1,7 +1,9 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
-from django.utils.text import slugify
-import uuid
-from django_resized import ResizedImageField
+from apps.base.fields import DeferredResizedImageField
+from apps.cms.slugs import save_with_unique_slugs, slug_base
 
 # -------------------------------
 # Категории организаций
@@ -11,7 +13,7 @@ class CategoryOrganization(models.Model):
     Тип бизнеса / категория организации: офисы, кафе, медцентры и т.д.
     """
     name = models.CharField(max_length=255, verbose_name="Название")
-    image = ResizedImageField(
+    image = DeferredResizedImageField(
         force_format="WEBP",
         quality=100,
         upload_to="category_image/",
@@ -23,6 +25,7 @@ class CategoryOrganization(models.Model):
 
     is_active = models.BooleanField(default=True, verbose_name="Активна")
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     def __str__(self):
         return self.name
@@ -45,7 +48,7 @@ class Service(models.Model):
     title = models.CharField(max_length=255, verbose_name="Название услуги")
     slug = models.SlugField(unique=True, blank=True, verbose_name="Slug")
 
-    cover_image = ResizedImageField(
+    cover_image = DeferredResizedImageField(
         force_format="WEBP",
         quality=95,
         upload_to="services/covers/",
@@ -64,27 +67,43 @@ class Service(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
+    # Заполняется apps.cms.search.update_search_vectors
+    search_vector = SearchVectorField(null=True, editable=False, verbose_name="Поисковый индекс")
+
     class Meta:
         verbose_name = "Услуга"
         verbose_name_plural = "Услуги"
         ordering = ["order", "title"]
+        # category_detail: активные услуги категории постранично по (order, title, id)
+        indexes = [
+            models.Index(
+                fields=["organization", "order", "title", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_service_keyset_idx",
+            ),
+            # Поиск: search_vector @@ websearch_to_tsquery('russian', …)
+            GinIndex(fields=["search_vector"], name="cms_service_search_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        # Авто-slag, если пустой
-        if not self.slug:
-            base = slugify(self.title)
-            if not base:
-                base = f"service-{uuid.uuid4().hex[:8]}"
-            slug = base
-            i = 1
-            while Service.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                i += 1
-                slug = f"{base}-{i}"
-            self.slug = slug
-        super().save(*args, **kwargs)
+        # Авто-slug, если пустой: занятые slug'и читаются одним запросом,
+        # а при одновременном сохранении запись повторяется с новым slug
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        def assign(slugs):
+            self.slug = slugs[0]
+
+        save_with_unique_slugs(
+            Service,
+            [slug_base(self.title)],
+            assign,
+            lambda: super(Service, self).save(*args, **kwargs),
+            exclude_pk=self.pk,
+        )
 
 # -------------------------------
 # Пункты по зонам
@@ -121,11 +140,20 @@ class ServiceZoneItem(models.Model):
 
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Пункт по зонам"
         verbose_name_plural = "Пункты по зонам"
         ordering = ["zone", "order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "zone", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_zoneitem_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_zone_display()}: {self.text}"
@@ -155,7 +183,7 @@ class ServiceChemicalItem(models.Model):
         help_text="Например: Для кухни, удаления жира, рабочих поверхностей",
     )
 
-    image = ResizedImageField(
+    image = DeferredResizedImageField(
         force_format="WEBP",
         quality=90,
         upload_to="services/chemicals/",
@@ -166,11 +194,20 @@ class ServiceChemicalItem(models.Model):
 
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Используемое средство"
         verbose_name_plural = "Используемые средства"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_chemicalitem_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -195,7 +232,7 @@ class ServiceEquipmentItem(models.Model):
         help_text="Например: Для глубокой химчистки мебели, мощное всасывание",
     )
 
-    image = ResizedImageField(
+    image = DeferredResizedImageField(
         force_format="WEBP",
         quality=90,
         upload_to="services/equipment/",
@@ -206,11 +243,20 @@ class ServiceEquipmentItem(models.Model):
 
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Оборудование (услуги)"
         verbose_name_plural = "Оборудование (услуг)"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_equipmentitem_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -236,11 +282,20 @@ class ServiceFAQItem(models.Model):
 
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "FAQ (услуги)"
         verbose_name_plural = "FAQ (услуг)"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_faqitem_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.question
@@ -258,11 +313,20 @@ class ServiceRequirementItem(models.Model):
     description = models.CharField(max_length=500, verbose_name="Описание", blank=True, null=True)
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Требование к объекту"
         verbose_name_plural = "Требования к объекту"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_requirement_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -279,11 +343,20 @@ class ServiceWorkConditionItem(models.Model):
     text = models.CharField(max_length=255, verbose_name="Условие")
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Условие выполнения работ"
         verbose_name_plural = "Условия выполнения работ"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_workcondition_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -300,11 +373,20 @@ class ServiceExcludedItem(models.Model):
     text = models.CharField(max_length=255, verbose_name="Не входит в услугу")
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Не входит (пункт)"
         verbose_name_plural = "Что НЕ входит"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_excludeditem_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text
@@ -321,13 +403,13 @@ class ServiceCaseBeforeAfter(models.Model):
     title = models.CharField(max_length=255, verbose_name="Название кейса")
     description = models.CharField(max_length=255, blank=True, null=True, verbose_name="Короткое описание")
 
-    before_image = ResizedImageField(
+    before_image = DeferredResizedImageField(
         force_format="WEBP", quality=90,
         upload_to="services/cases/before/",
         blank=True, null=True,
         verbose_name="Фото ДО"
     )
-    after_image = ResizedImageField(
+    after_image = DeferredResizedImageField(
         force_format="WEBP", quality=90,
         upload_to="services/cases/after/",
         blank=True, null=True,
@@ -336,11 +418,20 @@ class ServiceCaseBeforeAfter(models.Model):
 
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Кейс До/После"
         verbose_name_plural = "Кейсы До/После"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_case_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -359,7 +450,7 @@ class ServiceClientCompany(models.Model):
         max_length=255, blank=True, null=True,
         verbose_name="Тип бизнеса (опционально)"
     )
-    logo = ResizedImageField(
+    logo = DeferredResizedImageField(
         force_format="WEBP", quality=90,
         upload_to="services/clients/logos/",
         blank=True, null=True,
@@ -368,11 +459,20 @@ class ServiceClientCompany(models.Model):
 
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Компания-клиент"
         verbose_name_plural = "Кто уже заказывал"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_clientcompany_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -405,11 +505,20 @@ class ServiceDocument(models.Model):
 
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Документ услуги"
         verbose_name_plural = "Документы услуги"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_document_active_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.get_doc_type_display()
@@ -447,11 +556,51 @@ class ServicePriceItem(models.Model):
     
     order = models.PositiveIntegerField(default=0, verbose_name="Порядок")
     is_active = models.BooleanField(default=True, verbose_name="Показывать")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
 
     class Meta:
         verbose_name = "Цена услуги"
         verbose_name_plural = "Цены услуг"
         ordering = ["order", "id"]
+        # Страница услуги: активные пункты одной услуги в порядке вывода
+        indexes = [
+            models.Index(
+                fields=["service", "order", "id"],
+                condition=models.Q(is_active=True),
+                name="cms_priceitem_active_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.title}: {self.price}"
+
+
+# -------------------------------
+# Снимок страницы услуги
+# -------------------------------
+class ServiceSnapshot(models.Model):
+    """
+    Услуга со всеми активными разделами одной строкой: страница услуги
+    рендерится из payload без join'ов по одиннадцати таблицам.
+    Пересобирается после фиксации транзакции с правкой (ServiceRefresh в
+    apps/cms/signals.py): внутри самой пишущей транзакции снимок ещё старый.
+    """
+    service = models.OneToOneField(
+        "Service",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="snapshot",
+        verbose_name="Услуга",
+    )
+    slug = models.SlugField(unique=True, verbose_name="Slug")
+    is_active = models.BooleanField(default=True, verbose_name="Активна")
+    # Документ apps.cms.documents.service_document + список файлов изображений
+    payload = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Данные")
+    built_at = models.DateTimeField(auto_now=True, verbose_name="Собран")
+
+    class Meta:
+        verbose_name = "Снимок услуги"
+        verbose_name_plural = "Снимки услуг"
 
     def __str__(self):
-        return f"{self.title}: {self.price}"
\ No newline at end of file
+        return self.slug
@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import BadRequest
+from django.db.models import F, Field, Func, Value
+from django.db.models.lookups import GreaterThan
+
+# -------------------------------
+# Keyset-пагинация
+# -------------------------------
+# Вместо OFFSET страница начинается "после" последней записи предыдущей:
+# WHERE (order, title, id) > (…) ORDER BY order, title, id LIMIT n.
+# Запрос идёт по индексу cms_service_keyset_idx, поэтому сотая страница
+# стоит столько же, сколько первая. Курсор — значения ключа последней
+# записи в base64, его можно передавать в ссылке как есть.
+KEYSET_FIELDS = ("order", "title", "id")
+
+
+def encode_cursor(row):
+    raw = json.dumps([row[field] for field in KEYSET_FIELDS], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        order, title, pk = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise BadRequest("Неверный курсор")
+    if not (isinstance(order, int) and isinstance(title, str) and isinstance(pk, int)):
+        raise BadRequest("Неверный курсор")
+    return order, title, pk
+
+
+class Row(Func):
+    """ROW(a, b, c) — строка для покомпонентного сравнения."""
+    function = "ROW"
+    output_field = Field()
+
+
+def _after(order, title, pk):
+    """
+    ROW(order, title, id) > ROW(…): Postgres берёт такое сравнение в Index
+    Cond по cms_service_keyset_idx, а эквивалентное OR из Q — только в
+    Filter, перебирая все предыдущие строки.
+    """
+    return GreaterThan(
+        Row(*(F(field) for field in KEYSET_FIELDS)),
+        Row(Value(order), Value(title), Value(pk)),
+    )
+
+
+def keyset_page(queryset, cursor, size, fields):
+    """
+    Страница из size строк queryset'а после курсора (None — первая).
+    Возвращает (строки, курсор следующей страницы или None). Строки —
+    словари только с полями fields (+ поля ключа).
+    """
+    queryset = queryset.order_by(*KEYSET_FIELDS)
+    if cursor:
+        queryset = queryset.filter(_after(*decode_cursor(cursor)))
+    rows = list(queryset.values(*{*fields, *KEYSET_FIELDS})[:size + 1])
+    next_cursor = encode_cursor(rows[size - 1]) if len(rows) > size else None
+    return rows[:size], next_cursor
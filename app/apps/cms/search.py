@@ -0,0 +1,74 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, OuterRef, Subquery
+
+from apps.cms import models as cms_models
+
+# -------------------------------
+# Полнотекстовый поиск по услугам
+# -------------------------------
+# Service.search_vector — tsvector (конфигурация russian) из названия
+# услуги и текстов её активных пунктов, с GIN-индексом. Вектор хранится
+# в строке услуги и пересчитывается после фиксации правки услуги или
+# пункта (apps.cms.signals.ServiceRefresh), поэтому запрос поиска — только
+# совпадение по индексу и ранжирование найденных строк.
+SEARCH_CONFIG = "russian"
+
+# Вес названия услуги
+TITLE_WEIGHT = "A"
+
+# (related_name, поле, вес). B — заголовки пунктов, C — описания и ответы
+SEARCH_SOURCES = [
+    ("zone_items", "text", "B"),
+    ("faq_items", "question", "B"),
+    ("faq_items", "answer", "C"),
+    ("chemical_items", "name", "B"),
+    ("chemical_items", "description", "C"),
+    ("equipment_items", "name", "B"),
+    ("equipment_items", "description", "C"),
+    ("price_items", "title", "B"),
+]
+
+
+def _section_text(model, related_name, field):
+    """Подзапрос: тексты поля field активных пунктов раздела через пробел."""
+    section_model = model._meta.get_field(related_name).related_model
+    return Subquery(
+        section_model._base_manager
+        .filter(service=OuterRef("pk"), is_active=True)
+        .order_by()
+        .values("service")
+        .annotate(text=StringAgg(field, " "))
+        .values("text")
+    )
+
+
+def search_vector(model=cms_models.Service):
+    """Выражение tsvector для UPDATE услуг модели model."""
+    vector = SearchVector("title", config=SEARCH_CONFIG, weight=TITLE_WEIGHT)
+    for related_name, field, weight in SEARCH_SOURCES:
+        vector += SearchVector(
+            _section_text(model, related_name, field), config=SEARCH_CONFIG, weight=weight
+        )
+    return vector
+
+
+def update_search_vectors(services):
+    """Пересчитывает search_vector услуг из queryset'а одним UPDATE."""
+    return services.update(search_vector=search_vector(services.model))
+
+
+def search_services(text, limit):
+    """
+    Активные услуги активных категорий, подходящие под запрос (синтаксис
+    websearch: "фразы", -исключения, or), по убыванию релевантности.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    return (
+        cms_models.Service.objects
+        .filter(search_vector=query, is_active=True, organization__is_active=True)
+        .select_related("organization")
+        .only("slug", "title", "cover_image", "order", "organization__name")
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "order", "id")[:limit]
+    )
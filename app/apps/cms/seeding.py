@@ -0,0 +1,385 @@
+import colorsys
+import io
+import multiprocessing
+import random
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from apps.base.cache import CATALOG, CHROME, bump_on_commit
+from apps.base.db import close_connections
+from apps.base.images import delete_variants, image_fields
+from apps.cms import models as cms_models
+from apps.cms.loaders import SERVICE_SECTIONS
+from apps.cms.search import update_search_vectors
+from apps.cms.snapshots import rebuild_snapshots
+
+# -------------------------------
+# Синтетический каталог
+# -------------------------------
+# python manage.py seed_catalog заполняет БД каталогом нужного размера для
+# нагрузочных прогонов. Всё определяется seed: одинаковые параметры дают
+# одинаковые строки. Услуги вставляются bulk_create'ом, пункты разделов —
+# COPY (по одному потоку на таблицу), картинки-заглушки рисуются в пуле
+# процессов. Сгенерированное помечается SEED_SLUG_PREFIX у услуг и
+# SEED_MARKER в описании категорий и удаляется через --clear.
+SEED_SLUG_PREFIX = "seed-"
+SEED_SLUG_PATTERN = rf"^{SEED_SLUG_PREFIX}\d+-\d+$"
+SEED_MARKER = "seed_catalog"
+IMAGE_DIR = "services/covers/seed"
+IMAGE_SIZE = (1280, 720)
+
+# Доля скрытых пунктов и услуг, как в живом каталоге
+INACTIVE_SHARE = 0.05
+
+CATEGORY_NAMES = [
+    "Офисы", "Рестораны и кафе", "Склады", "Медицинские клиники", "Квартиры", "Магазины", "Гостиницы",
+    "Школы и детские сады", "Салоны красоты", "Фитнес-клубы", "Производственные цеха", "Торговые центры",
+]
+ACTIONS = ["Мытьё", "Чистка", "Полировка", "Дезинфекция", "Обеспыливание", "Химчистка", "Уборка"]
+OBJECTS = [
+    "окон", "полов", "ковров", "мягкой мебели", "плитки", "сантехники", "фасада", "витрин", "кухни",
+    "потолков", "вентиляции", "складских стеллажей", "паркета", "жалюзи", "оргтехники",
+]
+QUALIFIERS = ["", "после ремонта", "после пожара", "генеральная", "ежедневная", "срочная", "на высоте"]
+ZONE_TASKS = [
+    "Протирка подоконников", "Мытьё зеркал", "Удаление пыли с плинтусов", "Чистка дверных ручек",
+    "Мытьё светильников", "Вынос мусора", "Влажная уборка пола", "Удаление жира с фасадов",
+    "Чистка смесителей", "Мытьё радиаторов", "Протирка розеток и выключателей", "Чистка вытяжки",
+]
+CHEMICALS = [
+    ("Антижир", "Снимает застарелый жир с плит и фасадов"),
+    ("Средство для стёкол", "Не оставляет разводов"),
+    ("Дезинфектант", "Уничтожает 99,9% бактерий"),
+    ("Очиститель ковров", "Для экстракторной чистки"),
+    ("Средство от известкового налёта", "Для сантехники и плитки"),
+    ("Полироль для мебели", "Восстанавливает блеск"),
+]
+EQUIPMENT = [
+    ("Поломоечная машина", "Для больших площадей"),
+    ("Парогенератор", "Чистка без химии"),
+    ("Моющий пылесос", "Сухая и влажная уборка"),
+    ("Роторная машина", "Полировка твёрдых полов"),
+    ("Экстрактор", "Глубокая чистка ковров и мебели"),
+    ("Телескопическая штанга", "Окна и витрины на высоте"),
+]
+FAQ = [
+    ("Сколько длится {service}?", "Обычно от {hours} до {hours_max} часов в зависимости от площади."),
+    ("Нужно ли присутствовать во время работ?", "Нет, достаточно оставить доступ к помещению."),
+    ("Какие средства вы используете?", "Профессиональную химию, безопасную для людей и животных."),
+    ("Можно ли заказать {service} в выходные?", "Да, бригады работают без выходных."),
+    ("Есть ли гарантия на {service}?", "Если результат не устроит, переделаем бесплатно в течение {hours} дней."),
+]
+REQUIREMENTS = [
+    ("Доступ к воде", "Холодная и горячая вода в зоне работ"),
+    ("Электричество 220 В", "Розетка не дальше 20 метров"),
+    ("Парковка для машины бригады", None),
+    ("Свободный проход к зоне работ", "Хрупкие предметы лучше убрать заранее"),
+]
+WORK_CONDITIONS = [
+    "Выезд в течение {hours} часов", "Работаем круглосуточно", "Оплата после приёмки работ",
+    "Договор для юрлиц", "Бригада из {people} человек", "Свой инвентарь и химия",
+]
+EXCLUDED = [
+    "Мытьё посуды", "Вынос крупногабаритного мусора", "Стирка штор", "Мытьё окон снаружи выше 2 этажа",
+    "Уборка после животных", "Чистка люстр",
+]
+COMPANY_PREFIXES = ["ОсОО", "ИП", "ЗАО", "ООО"]
+COMPANY_WORDS = ["Ала-Тоо", "Бишкек Сити", "Нур", "Асман", "Тянь-Шань", "Ак-Жол", "Сапат", "Береке"]
+
+
+def _zone_items(rng, service, i):
+    zones = cms_models.ServiceZoneItem.ZONE_CHOICES
+    return {"zone": zones[rng.randrange(len(zones))][0], "text": rng.choice(ZONE_TASKS)}
+
+
+def _chemical_items(rng, service, i):
+    name, description = rng.choice(CHEMICALS)
+    return {"name": f"{name} №{rng.randint(1, 99)}", "description": description}
+
+
+def _equipment_items(rng, service, i):
+    name, description = rng.choice(EQUIPMENT)
+    return {"name": f"{name} X-{rng.randint(100, 999)}", "description": description}
+
+
+def _faq_items(rng, service, i):
+    question, answer = rng.choice(FAQ)
+    hours = rng.randint(1, 4)
+    values = {"service": service["title"].lower(), "hours": hours, "hours_max": hours + rng.randint(1, 6)}
+    return {"question": question.format(**values)[:255], "answer": answer.format(**values)}
+
+
+def _requirement_items(rng, service, i):
+    text, description = rng.choice(REQUIREMENTS)
+    return {"text": text, "description": description}
+
+
+def _work_condition_items(rng, service, i):
+    text = rng.choice(WORK_CONDITIONS)
+    return {"text": text.format(hours=rng.randint(1, 6), people=rng.randint(2, 8))}
+
+
+def _excluded_items(rng, service, i):
+    return {"text": rng.choice(EXCLUDED)}
+
+
+def _price_items(rng, service, i):
+    area = rng.choice([20, 50, 100, 200, 500, 1000])
+    return {
+        "title": f"{service['title']} до {area} м²"[:255],
+        "price": f"от {rng.randint(5, 300) * 100} сом",
+        "description": rng.choice([None, "Выезд по городу бесплатно", "Химия включена в стоимость"]),
+    }
+
+
+def _cases_before_after(rng, service, i):
+    images = service["images"]
+    return {
+        "title": f"Объект №{rng.randint(1, 9999)}",
+        "description": rng.choice(CATEGORY_NAMES),
+        "before_image": rng.choice(images) if images else "",
+        "after_image": rng.choice(images) if images else "",
+    }
+
+
+def _client_companies(rng, service, i):
+    return {
+        "name": f"{rng.choice(COMPANY_PREFIXES)} «{rng.choice(COMPANY_WORDS)}»",
+        "business_type": rng.choice(CATEGORY_NAMES),
+    }
+
+
+def _documents(rng, service, i):
+    doc_types = cms_models.ServiceDocument.DOC_TYPE_CHOICES
+    doc_type, label = doc_types[rng.randrange(len(doc_types))]
+    return {
+        "doc_type": doc_type,
+        "title": f"{label} №{rng.randint(1, 999)}",
+        "url": f"https://example.com/docs/{service['slug']}/{i}.pdf",
+    }
+
+
+# related_name -> функция (rng, услуга, номер) -> поля пункта
+SECTION_FACTORIES = {
+    "zone_items": _zone_items,
+    "chemical_items": _chemical_items,
+    "equipment_items": _equipment_items,
+    "faq_items": _faq_items,
+    "requirement_items": _requirement_items,
+    "work_condition_items": _work_condition_items,
+    "excluded_items": _excluded_items,
+    "price_items": _price_items,
+    "cases_before_after": _cases_before_after,
+    "client_companies": _client_companies,
+    "documents": _documents,
+}
+
+
+# -------------------------------
+# Картинки-заглушки
+# -------------------------------
+def render_placeholder(args):
+    """WEBP 1280x720: градиент и фигуры, цвета от (seed, номер). Выполняется в пуле."""
+    seed, index = args
+    rng = random.Random(f"{seed}:image:{index}")
+    hue = rng.random()
+    top = tuple(round(c * 255) for c in colorsys.hsv_to_rgb(hue, 0.45, 0.95))
+    bottom = tuple(round(c * 255) for c in colorsys.hsv_to_rgb((hue + 0.1) % 1, 0.7, 0.55))
+    width, height = IMAGE_SIZE
+    gradient = Image.linear_gradient("L").resize(IMAGE_SIZE)
+    image = Image.composite(Image.new("RGB", IMAGE_SIZE, bottom), Image.new("RGB", IMAGE_SIZE, top), gradient)
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randint(3, 8)):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randint(40, 220)
+        shade = tuple(min(255, c + rng.randint(10, 60)) for c in top)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=shade)
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=80, method=4)
+    return index, buffer.getvalue()
+
+
+def generate_images(seed, count, workers):
+    """Рисует count заглушек в пуле процессов и сохраняет их; возвращает имена файлов."""
+    if not count:
+        return []
+    jobs = [(seed, index) for index in range(count)]
+    if workers > 1:
+        # Дочерние процессы не должны унаследовать соединение с БД
+        close_connections()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            rendered = pool.map(render_placeholder, jobs)
+    else:
+        rendered = map(render_placeholder, jobs)
+
+    names = []
+    for index, data in sorted(rendered):
+        name = f"{IMAGE_DIR}/seed-{seed}-{index}.webp"
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        names.append(default_storage.save(name, ContentFile(data)))
+    return names
+
+
+# -------------------------------
+# Каталог
+# -------------------------------
+class SeedCatalogError(ValueError):
+    """Каталог с таким seed уже есть в БД."""
+
+
+def _copy(model, columns, rows):
+    """COPY строк rows (кортежи в порядке columns) в таблицу модели; число строк."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    column_list = ", ".join(connection.ops.quote_name(column) for column in columns)
+    count = 0
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY {table} ({column_list}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                count += 1
+    return count
+
+
+def _section_rows(related_name, services, seed, items, now):
+    """Строки таблицы раздела для всех услуг: service_id, order, is_active, updated_at, поля."""
+    factory = SECTION_FACTORIES[related_name]
+    for service in services:
+        # Свой генератор на (услугу, раздел): таблицы не зависят друг от друга
+        rng = random.Random(f"{seed}:{service['slug']}:{related_name}")
+        for i in range(rng.randint(items // 2, items + items // 2)):
+            fields = factory(rng, service, i)
+            yield (service["id"], i, rng.random() >= INACTIVE_SHARE, now, *fields.values())
+
+
+def _section_columns(related_name, service):
+    fields = SECTION_FACTORIES[related_name](random.Random(0), service, 0)
+    return ["service_id", "order", "is_active", "updated_at", *fields]
+
+
+def _category_name(c):
+    """"Офисы", ..., "Гостиницы", затем "Офисы 2", ... — названия не повторяются."""
+    name = CATEGORY_NAMES[c % len(CATEGORY_NAMES)]
+    lap = c // len(CATEGORY_NAMES)
+    return f"{name} {lap + 1}" if lap else name
+
+
+def seed_catalog(seed=1, categories=12, services=5000, items=20, images=24, workers=1, derived=True, log=None):
+    """
+    Генерирует categories категорий и services услуг (поровну по
+    категориям), в каждом разделе услуги в среднем items пунктов.
+    derived=False — не пересчитывать поисковый индекс и снимки (быстрее,
+    страницы услуг соберут снимки на лету). Возвращает статистику.
+    """
+    log = log or (lambda message: None)
+    # slug'и seed-<seed>-<n> заняты: повтор упал бы на уникальности посреди
+    # вставки, а картинки этого seed перезаписались бы под живыми услугами
+    if cms_models.Service.objects.filter(slug__regex=rf"^{SEED_SLUG_PREFIX}{seed}-\d+$").exists():
+        raise SeedCatalogError(f"Каталог с seed {seed} уже сгенерирован — удалите его через --clear")
+    started = time.monotonic()
+    stats = {"categories": categories, "services": services, "images": images, "rows": {}}
+
+    image_names = generate_images(seed, images, workers)
+    log(f"Картинки: {len(image_names)} ({time.monotonic() - started:.1f} с)")
+
+    rng = random.Random(f"{seed}:catalog")
+    now = timezone.now()
+    with transaction.atomic():
+        organizations = cms_models.CategoryOrganization.objects.bulk_create([
+            cms_models.CategoryOrganization(
+                name=_category_name(c),
+                descriptions=SEED_MARKER,
+                order=c,
+            )
+            for c in range(categories)
+        ])
+        created = cms_models.Service.objects.bulk_create(
+            [
+                cms_models.Service(
+                    organization=organizations[n % categories],
+                    title=" ".join(filter(None, [rng.choice(ACTIONS), rng.choice(OBJECTS), rng.choice(QUALIFIERS)])),
+                    slug=f"{SEED_SLUG_PREFIX}{seed}-{n}",
+                    cover_image=image_names[n % len(image_names)] if image_names else "",
+                    is_active=rng.random() >= INACTIVE_SHARE,
+                    order=n // categories,
+                )
+                for n in range(services)
+            ],
+            batch_size=5000,
+        )
+        rows = [
+            {"id": service.pk, "slug": service.slug, "title": service.title, "images": image_names}
+            for service in created
+        ]
+        log(f"Категории и услуги: {len(created)} ({time.monotonic() - started:.1f} с)")
+
+        for related_name, (model, _ordering) in SERVICE_SECTIONS.items():
+            columns = _section_columns(related_name, rows[0]) if rows else []
+            count = _copy(model, columns, _section_rows(related_name, rows, seed, items, now)) if rows else 0
+            stats["rows"][related_name] = count
+            log(f"{related_name}: {count} ({time.monotonic() - started:.1f} с)")
+        stats["child_rows"] = sum(stats["rows"].values())
+        stats["rows_seconds"] = round(time.monotonic() - started, 1)
+
+        if derived:
+            seeded = cms_models.Service.objects.filter(pk__in=[row["id"] for row in rows])
+            update_search_vectors(seeded)
+            log(f"Поисковый индекс ({time.monotonic() - started:.1f} с)")
+            rebuild_snapshots(seeded)
+            log(f"Снимки ({time.monotonic() - started:.1f} с)")
+        bump_on_commit(CHROME, CATALOG)
+
+    stats["seconds"] = round(time.monotonic() - started, 1)
+    return stats
+
+
+def _image_names(services=None):
+    """Заглушки из IMAGE_DIR, на которые ссылаются услуги services (по умолчанию — что угодно)."""
+    section_models = {model for model, _ordering in SERVICE_SECTIONS.values()}
+    names = set()
+    for model, field in image_fields():
+        queryset = model._default_manager.filter(**{f"{field.name}__startswith": f"{IMAGE_DIR}/"})
+        if services is not None:
+            if model is cms_models.Service:
+                queryset = queryset.filter(pk__in=services)
+            elif model in section_models:
+                queryset = queryset.filter(service__in=services)
+            else:
+                continue
+        names.update(queryset.order_by().values_list(field.name, flat=True).distinct())
+    return names
+
+
+def clear_seeded():
+    """Удаляет сгенерированные услуги (с пунктами и снимками) и категории одним DELETE на таблицу."""
+    # Только slug'и ровно вида seed-<seed>-<n> в помеченных категориях:
+    # настоящая услуга "seed-cleaning" под --clear не попадает
+    services = cms_models.Service.objects.filter(
+        slug__regex=SEED_SLUG_PATTERN, organization__descriptions=SEED_MARKER
+    )
+    service_ids, params = services.values("id").query.sql_with_params()
+    images = _image_names(services)
+    deleted = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Без Collector: миллион пунктов не загружается в память ради сигналов
+        for model in [m for m, _ordering in SERVICE_SECTIONS.values()] + [cms_models.ServiceSnapshot]:
+            cursor.execute(f"DELETE FROM {model._meta.db_table} WHERE service_id IN ({service_ids})", params)
+            deleted[model._meta.model_name] = cursor.rowcount
+        deleted["service"] = services._raw_delete(connection.alias)
+        # Категорию, куда успели добавить настоящие услуги, не трогаем
+        deleted["categoryorganization"], _ = (
+            cms_models.CategoryOrganization.objects.filter(descriptions=SEED_MARKER, services__isnull=True).delete()
+        )
+        bump_on_commit(CHROME, CATALOG)
+    # Картинки общие для всего seed: файл удаляется, только если на него
+    # больше никто не ссылается
+    for name in images - _image_names():
+        delete_variants(name)
+        default_storage.delete(name)
+    return deleted
+
@@ -0,0 +1,143 @@
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.base.cache import CATALOG, CHROME, bump_versions, category_scope, service_scope
+from apps.base.context_processors import reset_site_chrome
+from apps.cms import models as cms_models
+from apps.cms.loaders import SERVICE_SECTIONS
+from apps.cms.search import search_vector
+from apps.cms.snapshots import rebuild_snapshots
+
+SECTION_MODELS = [model for model, _ordering in SERVICE_SECTIONS.values()]
+
+
+def _is_cascade(sender, origin):
+    """Удаление пришло каскадом от услуги/категории — их обработчики всё покроют."""
+    if origin is None:
+        return False
+    origin_model = type(origin) if isinstance(origin, models.Model) else origin.model
+    return origin_model is not sender
+
+
+# -------------------------------
+# Отложенная пересборка услуг
+# -------------------------------
+class ServiceRefresh:
+    """
+    Услуги, изменённые в текущей транзакции. Сохранение услуги с N
+    пунктами в инлайнах шлёт N+1 сигнал, поэтому сигналы только копят id,
+    а вектор и снимок каждой услуги пересобираются один раз после
+    фиксации. Версии кэша поднимаются уже после пересборки, иначе
+    страница успела бы закэшироваться под новой версией со старым снимком.
+    """
+
+    def __init__(self, savepoint_ids):
+        self.savepoint_ids = savepoint_ids
+        self.service_ids = set()
+        self.scopes = {CATALOG}
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        services = cms_models.Service.objects.filter(pk__in=self.service_ids)
+        with transaction.atomic():
+            # Правка любого пункта — это правка услуги
+            services.update(updated_at=timezone.now(), search_vector=search_vector())
+            rebuild_snapshots(services)
+        slugs = services.values_list("slug", flat=True)
+        bump_versions(*self.scopes, *(service_scope(slug) for slug in slugs))
+
+
+def refresh_on_commit(service_ids=(), scopes=()):
+    """Добавляет услуги и области кэша в пересборку текущей транзакции."""
+    connection = transaction.get_connection()
+    # atomic(savepoint=False) кладёт в стек None — отменить его отдельно нельзя
+    savepoint_ids = tuple(sid for sid in connection.savepoint_ids if sid)
+    refresh = getattr(connection, "cms_service_refresh", None)
+    # Пересборка, начатая во вложенной точке сохранения (услуга пишется в
+    # ней ради подбора slug), подходит и для внешнего уровня. Отменённая
+    # точка уносит с собой колбэк — тогда нужен новый
+    pending = (
+        refresh is not None
+        and not refresh.done
+        and refresh.savepoint_ids[:len(savepoint_ids)] == savepoint_ids
+        and any(func is refresh for _sids, func, _robust in connection.run_on_commit)
+    )
+    if not pending:
+        refresh = connection.cms_service_refresh = ServiceRefresh(savepoint_ids)
+    refresh.service_ids.update(service_ids)
+    refresh.scopes.update(scope for scope in scopes if scope)
+    if not pending:
+        # Вне транзакции колбэк выполнится сразу, поэтому id добавлены заранее
+        transaction.on_commit(refresh)
+
+
+# -------------------------------
+# Категории
+# -------------------------------
+@receiver([post_save, post_delete], sender=cms_models.CategoryOrganization)
+def invalidate_category(sender, instance, **kwargs):
+    # Категории есть в меню каждой страницы
+    refresh_on_commit(scopes=[CHROME, category_scope(instance.pk)])
+    transaction.on_commit(reset_site_chrome)
+
+
+@receiver(post_save, sender=cms_models.CategoryOrganization)
+def rebuild_category_snapshots(sender, instance, **kwargs):
+    # Название категории входит в снимки её услуг
+    refresh_on_commit(instance.services.values_list("pk", flat=True))
+
+
+# -------------------------------
+# Услуги
+# -------------------------------
+@receiver(pre_save, sender=cms_models.Service)
+def remember_service_location(sender, instance, **kwargs):
+    """Запоминаем прежние slug и категорию, чтобы сбросить и старые страницы."""
+    instance._previous_location = None
+    if instance.pk:
+        instance._previous_location = (
+            cms_models.Service.objects.filter(pk=instance.pk)
+            .values_list("slug", "organization_id")
+            .first()
+        )
+
+
+@receiver([post_save, post_delete], sender=cms_models.Service)
+def invalidate_service(sender, instance, origin=None, **kwargs):
+    scopes = [CATALOG, service_scope(instance.slug), category_scope(instance.organization_id)]
+    organization_ids = {instance.organization_id}
+    previous = getattr(instance, "_previous_location", None)
+    if previous:
+        previous_slug, previous_organization_id = previous
+        scopes += [service_scope(previous_slug), category_scope(previous_organization_id)]
+        organization_ids.add(previous_organization_id)
+    if not _is_cascade(sender, origin):
+        # Список услуг — часть содержимого категории
+        cms_models.CategoryOrganization.objects.filter(pk__in=organization_ids).update(
+            updated_at=timezone.now()
+        )
+    refresh_on_commit(scopes=scopes)
+
+
+@receiver(post_save, sender=cms_models.Service)
+def refresh_service(sender, instance, **kwargs):
+    # Вектор и снимок пересчитываются после фиксации; при удалении снимок
+    # уходит каскадом вместе с услугой
+    refresh_on_commit([instance.pk])
+
+
+# -------------------------------
+# Разделы услуги
+# -------------------------------
+def invalidate_service_section(sender, instance, origin=None, **kwargs):
+    if _is_cascade(sender, origin):
+        return
+    refresh_on_commit([instance.service_id])
+
+
+for section_model in SECTION_MODELS:
+    post_save.connect(invalidate_service_section, sender=section_model)
+    post_delete.connect(invalidate_service_section, sender=section_model)
@@ -0,0 +1,69 @@
+import re
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Сколько раз повторяем запись, если slug успели занять параллельно
+MAX_ATTEMPTS = 5
+
+
+def slug_base(title, fallback="service"):
+    """База slug'а из названия; кириллица без латиницы даёт пустую строку."""
+    return slugify(title) or f"{fallback}-{uuid.uuid4().hex[:8]}"
+
+
+def _taken_slugs(model, bases, exclude_pk=None):
+    """Все занятые slug'и с указанными префиксами — одним запросом."""
+    prefix_filter = Q()
+    for base in set(bases):
+        prefix_filter |= Q(slug__startswith=base)
+    queryset = model._default_manager.filter(prefix_filter)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return set(queryset.order_by().values_list("slug", flat=True))
+
+
+def unique_slugs(model, bases, exclude_pk=None):
+    """
+    Свободные slug'и для списка баз: "base", затем "base-2", "base-3"...
+    Повторяющиеся базы получают разные суффиксы.
+    """
+    taken = _taken_slugs(model, bases, exclude_pk)
+    slugs = []
+    for base in bases:
+        suffix_re = re.compile(rf"^{re.escape(base)}-(\d+)$")
+        used = {int(m.group(1)) for m in map(suffix_re.match, taken) if m}
+        if base not in taken:
+            slug = base
+        else:
+            i = 2
+            while i in used:
+                i += 1
+            slug = f"{base}-{i}"
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def save_with_unique_slugs(model, bases, assign, write, exclude_pk=None):
+    """
+    Подбирает slug'и, передаёт их в assign(slugs) и выполняет write().
+
+    Если между подбором и записью slug занял другой процесс (два админа
+    сохраняют одновременно), запись откатывается до savepoint и
+    повторяется с заново подобранными slug'ами.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        slugs = unique_slugs(model, bases, exclude_pk)
+        assign(slugs)
+        try:
+            with transaction.atomic():
+                return write()
+        except IntegrityError:
+            conflict = model._default_manager.filter(slug__in=slugs)
+            if exclude_pk is not None:
+                conflict = conflict.exclude(pk=exclude_pk)
+            if attempt == MAX_ATTEMPTS - 1 or not conflict.exists():
+                raise
@@ -0,0 +1,130 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import Http404
+
+from apps.base.images import image_names, load_responsive_images
+from apps.cms import models as cms_models
+from apps.cms.documents import service_document
+from apps.cms.loaders import SERVICE_SECTIONS, group_zone_items, section_prefetches
+
+# -------------------------------
+# Снимки страниц услуг
+# -------------------------------
+# ServiceSnapshot.payload — документ услуги (как в JSON API, но с
+# относительными URL), уже сгруппированные по зонам пункты и имена
+# файлов изображений для srcset. Снимок пересобирается сигналами один
+# раз на услугу после фиксации транзакции с её правками. Пишется
+# пачками через INSERT ... ON CONFLICT, чтобы пересборка любого числа
+# услуг стоила фиксированное число запросов на пачку.
+BATCH_SIZE = 200
+
+
+def build_payload(service):
+    """Payload снимка для услуги, загруженной с section_prefetches()."""
+    payload = service_document(service, base_url="")
+    objects = [service]
+    for related_name in SERVICE_SECTIONS:
+        objects.extend(getattr(service, f"active_{related_name}"))
+    payload["images"] = sorted(image_names(objects))
+    payload["zone_groups"] = group_zone_items(payload["sections"]["zone_items"])
+    return payload
+
+
+def _normalized(payload):
+    """Payload в том виде, в каком он вернётся из JSONField (даты — строки)."""
+    return json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+
+
+def _load(pks):
+    return (
+        cms_models.Service.objects.filter(pk__in=pks)
+        .select_related("organization")
+        .prefetch_related(*section_prefetches())
+    )
+
+
+def rebuild_snapshots(services=None):
+    """
+    Пересобирает снимки услуг из queryset'а services (по умолчанию — всех)
+    в одной транзакции. Возвращает число пересобранных снимков.
+    """
+    queryset = cms_models.Service.objects.all() if services is None else services
+    pks = list(queryset.order_by("pk").values_list("pk", flat=True))
+    with transaction.atomic():
+        for start in range(0, len(pks), BATCH_SIZE):
+            snapshots = [
+                cms_models.ServiceSnapshot(
+                    service=service,
+                    slug=service.slug,
+                    is_active=service.is_active,
+                    payload=build_payload(service),
+                )
+                for service in _load(pks[start:start + BATCH_SIZE])
+            ]
+            cms_models.ServiceSnapshot.objects.bulk_create(
+                snapshots,
+                update_conflicts=True,
+                unique_fields=["service"],
+                update_fields=["slug", "is_active", "payload", "built_at"],
+            )
+    return len(pks)
+
+
+def rebuild_snapshot(service_id):
+    """Пересобирает снимок одной услуги."""
+    rebuild_snapshots(cms_models.Service.objects.filter(pk=service_id))
+
+
+def check_snapshots():
+    """
+    Сверяет снимки с текущими данными. Возвращает словарь со списками
+    slug'ов: missing — нет снимка, stale — снимок устарел.
+    """
+    stored = {
+        service_id: (is_active, payload)
+        for service_id, is_active, payload in cms_models.ServiceSnapshot.objects.values_list(
+            "service_id", "is_active", "payload"
+        )
+    }
+    report = {"missing": [], "stale": []}
+    pks = list(cms_models.Service.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        for service in _load(pks[start:start + BATCH_SIZE]):
+            if service.pk not in stored:
+                report["missing"].append(service.slug)
+            elif stored[service.pk] != (service.is_active, _normalized(build_payload(service))):
+                report["stale"].append(service.slug)
+    return report
+
+
+def load_service_page(slug):
+    """
+    Контекст страницы услуги из снимка: одна строка вместо услуги и
+    одиннадцати разделов, плюс один запрос за вариантами изображений.
+    Если снимка ещё нет (услуга создана до появления снимков), он
+    собирается на месте.
+    """
+    snapshots = cms_models.ServiceSnapshot.objects.only("is_active", "payload")
+    try:
+        snapshot = snapshots.get(slug=slug)
+    except cms_models.ServiceSnapshot.DoesNotExist:
+        service_id = cms_models.Service.objects.filter(slug=slug).values_list("pk", flat=True).first()
+        if service_id is None:
+            raise Http404
+        rebuild_snapshot(service_id)
+        snapshot = snapshots.get(pk=service_id)
+    if not snapshot.is_active:
+        raise Http404
+
+    service = snapshot.payload
+    sections = service["sections"]
+    context = {
+        "service": service,
+        "category": service["category"],
+        "zone_groups": service["zone_groups"],
+        "responsive_images": load_responsive_images(service["images"]),
+    }
+    context.update((name, items) for name, items in sections.items() if name != "zone_items")
+    return context
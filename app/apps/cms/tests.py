@@ -1,3 +1,1274 @@
-from django.test import TestCase
+import asyncio
+import json
+import re
+import shutil
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+from urllib.parse import parse_qsl
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from aiohttp import web
+from telebot import asyncio_helper, types
+from telebot.asyncio_helper import ApiTelegramException
+
+from apps.base.context_processors import get_site_chrome, reset_site_chrome
+from apps.cms import models as cms_models
+from apps.cms.bot import (
+    CatalogStore, Outbox, build_catalog, callback_reply, categories_reply, create_bot, faq_reply,
+    text_reply,
+)
+from apps.cms.benchmarks import compare, load_baseline, parse_size, run_benchmarks, section_item
+from apps.cms.loadtest import LatencyHistogram, check_local, crawl_urls, run_stage
+from apps.cms.autocomplete import get_autocomplete_index, reset_autocomplete, suggest
+from apps.cms.cloning import clone_services
+from apps.cms.export import export_site
+from apps.cms.loaders import SERVICE_SECTIONS
+from apps.cms.pagination import encode_cursor
+from apps.cms.seeding import SEED_SLUG_PREFIX, clear_seeded, seed_catalog
+from apps.cms.slugs import _taken_slugs
+from apps.cms.snapshots import check_snapshots, rebuild_snapshot, rebuild_snapshots
+from apps.cms.transfer import CatalogImportError, export_lines, import_catalog
+
+# Фиксированный бюджет страницы услуги при прогретой "обвязке" и без
+# картинок: одна строка ServiceSnapshot.
+SERVICE_DETAIL_QUERY_BUDGET = 1
+
+# Пересборка снимка одной услуги: id услуг, savepoint, услуга с
+# категорией, по запросу на раздел, INSERT ... ON CONFLICT, release.
+SNAPSHOT_REBUILD_QUERIES = 5 + len(SERVICE_SECTIONS)
+
+
+def create_service(organization, title, items_per_section=1, **kwargs):
+    """Услуга с items_per_section активными и одним скрытым пунктом в каждом разделе."""
+    service = cms_models.Service.objects.create(organization=organization, title=title, **kwargs)
+    for related_name, (model, _ordering) in SERVICE_SECTIONS.items():
+        model.objects.bulk_create([
+            section_item(model, service, i, is_active=i < items_per_section)
+            for i in range(items_per_section + 1)
+        ])
+    # bulk_create не шлёт сигналы
+    rebuild_snapshot(service.pk)
+    return service
+
+
+class ServiceDetailQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Офисы")
+        cls.small = create_service(cls.organization, "Small", items_per_section=1)
+        cls.large = create_service(cls.organization, "Large", items_per_section=25)
+
+    def setUp(self):
+        cache.clear()
+        reset_site_chrome()
+        get_site_chrome()
+
+    def test_query_count_does_not_depend_on_section_size(self):
+        for service in (self.small, self.large):
+            with self.assertNumQueries(SERVICE_DETAIL_QUERY_BUDGET):
+                response = self.client.get(reverse("service-detail", args=[service.slug]))
+            self.assertEqual(response.status_code, 200)
+
+    def test_only_active_items_are_rendered(self):
+        response = self.client.get(reverse("service-detail", args=[self.large.slug]))
+        self.assertEqual(len(response.context["faq_items"]), 25)
+        self.assertContains(response, "Вопрос 24")
+        self.assertNotContains(response, "Вопрос 25")
+        zones = [group["zone"] for group in response.context["zone_groups"]]
+        self.assertEqual(zones, ["kitchen", "room"])
+
+    def test_inactive_service_is_404(self):
+        self.small.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.small.save()
+        response = self.client.get(reverse("service-detail", args=[self.small.slug]))
+        self.assertEqual(response.status_code, 404)
+
+
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Склады")
+        cls.service = create_service(cls.organization, "Warehouse", items_per_section=2)
+
+    def payload(self):
+        return cms_models.ServiceSnapshot.objects.get(pk=self.service.pk).payload
+
+    def test_item_changes_rebuild_snapshot(self):
+        faq = self.service.faq_items.filter(is_active=True).first()
+        faq.question = "Новый вопрос"
+        with self.captureOnCommitCallbacks(execute=True):
+            faq.save()
+        questions = [item["question"] for item in self.payload()["sections"]["faq_items"]]
+        self.assertIn("Новый вопрос", questions)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faq.delete()
+        self.assertEqual(len(self.payload()["sections"]["faq_items"]), 1)
+
+    def test_inline_items_rebuild_snapshot_once(self):
+        items = list(self.service.faq_items.all())
+        with mock.patch("apps.cms.signals.rebuild_snapshots", wraps=rebuild_snapshots) as rebuild:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.service.save()
+                for item in items:
+                    item.question += "?"
+                    item.save()
+                items[0].delete()
+        self.assertEqual(len(callbacks), 1)
+        rebuild.assert_called_once()
+        self.assertEqual(len(self.payload()["sections"]["faq_items"]), 1)
+
+    def test_category_rename_rebuilds_snapshots(self):
+        self.organization.name = "Склады и ангары"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.organization.save()
+        self.assertEqual(self.payload()["category"]["name"], "Склады и ангары")
+
+    def test_zone_items_are_grouped(self):
+        groups = self.payload()["zone_groups"]
+        self.assertEqual([group["zone"] for group in groups], ["kitchen", "room"])
+        self.assertEqual(sum(len(group["items"]) for group in groups), 2)
+
+    def test_missing_snapshot_is_built_on_request(self):
+        cms_models.ServiceSnapshot.objects.all().delete()
+        response = self.client.get(reverse("service-detail", args=[self.service.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(cms_models.ServiceSnapshot.objects.filter(pk=self.service.pk).exists())
+
+    def test_check_reports_and_rebuild_fixes_drift(self):
+        self.assertEqual(check_snapshots(), {"missing": [], "stale": []})
+        # update() не шлёт сигналы — снимок отстаёт от данных
+        self.service.faq_items.update(answer="Изменено в обход сигналов")
+        other = cms_models.Service.objects.bulk_create([
+            cms_models.Service(organization=self.organization, title="Bulk", slug="bulk")
+        ])[0]
+        self.assertEqual(check_snapshots(), {"missing": [other.slug], "stale": [self.service.slug]})
+        with self.assertRaises(CommandError):
+            call_command("rebuild_snapshots", "--check", stdout=StringIO(), stderr=StringIO())
+
+        call_command("rebuild_snapshots", stdout=StringIO())
+        self.assertEqual(check_snapshots(), {"missing": [], "stale": []})
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Кафе")
+        cls.service = create_service(cls.organization, "Cafe", items_per_section=2)
+        cls.other = create_service(cls.organization, "Other", items_per_section=2)
+
+    def setUp(self):
+        cache.clear()
+        reset_site_chrome()
+        self.url = reverse("service-detail", args=[self.service.slug])
+
+    def test_repeat_request_skips_database(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+
+    def test_unused_query_params_share_the_cached_page(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {"utm_source": "ads", "nocache": "123"})
+        self.assertEqual(first.content, second.content)
+
+        category_url = reverse("category-detail", args=[self.organization.pk])
+        page = self.client.get(category_url, {"utm_source": "ads"})
+        fragment = self.client.get(category_url, {"format": "fragment"})
+        self.assertNotEqual(page.content, fragment.content)
+        with self.assertNumQueries(0):
+            cached = self.client.get(category_url, {"utm_source": "mail", "format": "fragment"})
+        self.assertEqual(cached.content, fragment.content)
+
+    def test_section_edit_invalidates_only_its_service(self):
+        other_url = reverse("service-detail", args=[self.other.slug])
+        self.client.get(self.url)
+        self.client.get(other_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faq = self.service.faq_items.first()
+            faq.question = "Новый вопрос"
+            faq.save()
+
+        self.assertContains(self.client.get(self.url), "Новый вопрос")
+        with self.assertNumQueries(0):
+            self.client.get(other_url)
+
+    def test_category_edit_invalidates_every_page(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.organization.name = "Рестораны"
+            self.organization.save()
+        self.assertContains(self.client.get(self.url), "Рестораны")
+
+    def test_slug_change_invalidates_old_url(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.slug = "renamed"
+            self.service.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Склады")
+        cls.service = create_service(cls.organization, "Warehouse", items_per_section=2)
+
+    def setUp(self):
+        cache.clear()
+        reset_site_chrome()
+        self.url = reverse("service-detail", args=[self.service.slug])
+
+    def test_matching_etag_returns_304_without_queries(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(self.url, headers={"if-modified-since": last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_section_edit_changes_etag_and_touches_service(self):
+        etag = self.client.get(self.url)["ETag"]
+        updated_at = self.service.updated_at
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faq = self.service.faq_items.first()
+            faq.answer = "Другой ответ"
+            faq.save()
+
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.service.refresh_from_db()
+        self.assertGreater(self.service.updated_at, updated_at)
+
+    def test_service_edit_touches_category(self):
+        category_url = reverse("category-detail", args=[self.organization.pk])
+        etag = self.client.get(category_url)["ETag"]
+        updated_at = cms_models.CategoryOrganization.objects.get(pk=self.organization.pk).updated_at
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.title = "Warehouse XL"
+            self.service.save()
+
+        response = self.client.get(category_url, headers={"if-none-match": etag})
+        self.assertContains(response, "Warehouse XL")
+        self.organization.refresh_from_db()
+        self.assertGreater(self.organization.updated_at, updated_at)
+
+
+class CloneServicesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Медцентры")
+        cls.target = cms_models.CategoryOrganization.objects.create(name="Клиники")
+        cls.services = [
+            create_service(cls.organization, f"Clinic {i}", items_per_section=5, cover_image="services/covers/c.webp")
+            for i in range(3)
+        ]
+
+    def test_clone_copies_whole_graph(self):
+        clone = clone_services([self.services[0]])[0]
+        self.assertEqual(clone.title, "Clinic 0 (копия)")
+        self.assertEqual(clone.slug, "clinic-0-copy")
+        self.assertEqual(clone.organization_id, self.organization.pk)
+        self.assertEqual(clone.cover_image.name, "services/covers/c.webp")
+        for related_name in SERVICE_SECTIONS:
+            original = list(getattr(self.services[0], related_name).values_list("order", "is_active"))
+            copied = list(getattr(clone, related_name).values_list("order", "is_active"))
+            self.assertEqual(copied, original, related_name)
+
+    def test_batch_query_count_does_not_depend_on_size(self):
+        # slug'и, услуги, по чтению и вставке на раздел, категория + 2 savepoint'а
+        # и по одному пересчёту поисковых векторов и снимков на все копии
+        with self.assertNumQueries(8 + 2 * len(SERVICE_SECTIONS) + SNAPSHOT_REBUILD_QUERIES):
+            clones = clone_services(self.services, organization=self.target)
+        self.assertEqual(len(clones), 3)
+        self.assertEqual(self.target.services.count(), 3)
+        self.assertEqual(cms_models.ServiceFAQItem.objects.filter(service__in=clones).count(), 18)
+
+    def test_repeated_copies_get_unique_slugs(self):
+        slugs = [clone.slug for clone in clone_services([self.services[1]] * 3)]
+        self.assertEqual(slugs, ["clinic-1-copy", "clinic-1-copy-2", "clinic-1-copy-3"])
+
+    def test_failure_leaves_no_partial_copy(self):
+        services_before = cms_models.Service.objects.count()
+        with mock.patch.object(
+            cms_models.ServicePriceItem.objects, "bulk_create", side_effect=RuntimeError("boom")
+        ):
+            with self.assertRaises(RuntimeError):
+                clone_services(self.services)
+        self.assertEqual(cms_models.Service.objects.count(), services_before)
+
+
+class SlugAllocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Офисы")
+
+    def create(self, title):
+        return cms_models.Service.objects.create(organization=self.organization, title=title)
+
+    def test_collisions_use_one_lookup_query(self):
+        for _ in range(5):
+            self.create("Office cleaning")
+        # slug'и, savepoint, insert, отметка категории (сигнал), release;
+        # вектор и снимок пересчитываются после фиксации
+        with self.assertNumQueries(5):
+            service = self.create("Office cleaning")
+        self.assertEqual(service.slug, "office-cleaning-6")
+
+    def test_first_free_suffix_is_reused(self):
+        services = [self.create("Office") for _ in range(3)]
+        services[1].delete()
+        self.assertEqual(self.create("Office").slug, "office-2")
+
+    def test_concurrent_save_retries_with_next_slug(self):
+        self.create("Office")
+        calls = []
+
+        def stale_then_real(*args, **kwargs):
+            calls.append(args)
+            # Первый подбор "не видит" параллельно сохранённую услугу
+            return set() if len(calls) == 1 else _taken_slugs(*args, **kwargs)
+
+        with mock.patch("apps.cms.slugs._taken_slugs", side_effect=stale_then_real):
+            service = self.create("Office")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(service.slug, "office-2")
+
+
+class StaticExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Офисы")
+        cls.service = create_service(cls.organization, "Office")
+        cls.other = create_service(cls.organization, "Other")
+
+    def setUp(self):
+        cache.clear()
+        reset_site_chrome()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def export(self):
+        # workers=1: дочерние процессы не видят данные незафиксированной транзакции теста
+        return export_site(self.root, workers=1)
+
+    def test_exports_every_public_page(self):
+        stats = self.export()
+
+        self.assertEqual(stats, {"rendered": 5, "skipped": 0, "removed": 0})
+        for path in ("index.html", "category/index.html",
+                     f"category/{self.organization.pk}/index.html",
+                     f"service/{self.service.slug}/index.html"):
+            self.assertTrue((self.root / path).exists(), path)
+        self.assertIn("Office", (self.root / f"service/{self.service.slug}/index.html").read_text())
+
+    def test_second_run_renders_only_changed_pages(self):
+        self.export()
+        self.assertEqual(self.export()["rendered"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faq = self.service.faq_items.first()
+            faq.question = "Новый вопрос"
+            faq.save()
+
+        self.assertEqual(self.export(), {"rendered": 1, "skipped": 4, "removed": 0})
+        self.assertIn("Новый вопрос", (self.root / f"service/{self.service.slug}/index.html").read_text())
+
+    def test_deactivated_service_is_removed(self):
+        self.export()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.is_active = False
+            self.other.save()
+
+        stats = self.export()
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse((self.root / "service" / self.other.slug).exists())
+
+
+@skipUnless(connection.vendor == "postgresql", "планы запросов проверяются только на PostgreSQL")
+class QueryPlanTests(TestCase):
+    """
+    На каталоге реального размера каждый запрос публичных страниц к
+    таблицам услуг должен идти по индексу, а не полным перебором.
+    """
+    CATEGORIES = 30
+    SERVICES_PER_CATEGORY = 20
+    ITEMS_PER_SECTION = 6
+    SEQ_SCAN = re.compile(r"Seq Scan on (cms_service\w*)")
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = cms_models.CategoryOrganization.objects.bulk_create([
+            cms_models.CategoryOrganization(name=f"Категория {i}", order=i) for i in range(cls.CATEGORIES)
+        ])
+        services = cms_models.Service.objects.bulk_create([
+            cms_models.Service(
+                organization=category, title=f"Услуга {category.pk}-{i}", slug=f"service-{category.pk}-{i}",
+                order=i, is_active=i % 5 != 0,
+            )
+            for category in categories
+            for i in range(cls.SERVICES_PER_CATEGORY)
+        ])
+        for model, _ordering in SERVICE_SECTIONS.values():
+            model.objects.bulk_create([
+                section_item(model, service, i, is_active=i % 3 != 0)
+                for service in services
+                for i in range(cls.ITEMS_PER_SECTION)
+            ])
+        cls.category = categories[len(categories) // 2]
+        cls.service = services[len(services) // 2 + 1]
+        rebuild_snapshots()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertIndexScans(self, url):
+        # Холодный запрос: без кэша страниц и "обвязки"
+        cache.clear()
+        reset_site_chrome()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertTrue(queries.captured_queries)
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                cursor.execute("EXPLAIN " + query["sql"])
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                self.assertIsNone(self.SEQ_SCAN.search(plan), f"{query['sql']}\n{plan}")
+
+    def test_service_detail(self):
+        self.assertIndexScans(reverse("service-detail", args=[self.service.slug]))
+
+    def test_category_detail(self):
+        url = reverse("category-detail", args=[self.category.pk])
+        self.assertIndexScans(url)
+        deep = self.category.services.filter(is_active=True).order_by("order", "title", "id").values(
+            "order", "title", "id"
+        )[10]
+        self.assertIndexScans(f"{url}?after={encode_cursor(deep)}")
+
+    def test_catalog_pages(self):
+        self.assertIndexScans(reverse("index-page"))
+        self.assertIndexScans(reverse("category-page"))
+
+
+class KeysetPlanTests(TestCase):
+    """
+    Курсор должен ограничивать само чтение индекса: иначе страница N
+    перебирает все предыдущие строки (Rows Removed by Filter).
+    """
+    SERVICES = 3000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = cms_models.CategoryOrganization.objects.create(name="Большая")
+        cms_models.Service.objects.bulk_create([
+            cms_models.Service(organization=cls.category, title=f"Услуга {i:05}", slug=f"large-{i}", order=i % 7)
+            for i in range(cls.SERVICES)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def plan(self, params):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("category-detail", args=[self.category.pk]), params)
+            self.assertEqual(response.status_code, 200)
+        (sql,) = [
+            query["sql"] for query in queries.captured_queries
+            if 'FROM "cms_service" WHERE' in query["sql"] and "LIMIT" in query["sql"]
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_deep_page_reads_as_much_as_first(self):
+        services = self.category.services.order_by("order", "title", "id").values("order", "title", "id")
+        first = self.plan({})
+        deep = self.plan({"after": encode_cursor(services[self.SERVICES - 20])})
+
+        self.assertIn("cms_service_keyset_idx", deep)
+        self.assertRegex(deep, r'Index Cond: .*ROW\("order", \(?title', deep)
+        self.assertNotIn("Rows Removed by Filter", deep)
+        buffers = [int(re.search(r"shared hit=(\d+)", plan).group(1)) for plan in (first, deep)]
+        self.assertLessEqual(buffers[1], buffers[0] + 2, deep)
+
+
+@override_settings(CATALOG_PAGE_SIZE=3)
+class CategoryPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Склады")
+        # Одинаковые order и title — порядок между ними задаёт id
+        for order, title in [(0, "B"), (0, "A"), (1, "A"), (1, "A"), (0, "B"), (2, "C"), (1, "Z")]:
+            cms_models.Service.objects.create(organization=cls.organization, title=title, order=order)
+        cms_models.Service.objects.create(organization=cls.organization, title="Hidden", is_active=False)
+        cls.expected = list(
+            cls.organization.services.filter(is_active=True)
+            .order_by("order", "title", "id").values_list("slug", flat=True)
+        )
+        cls.url = reverse("category-detail", args=[cls.organization.pk])
+
+    def setUp(self):
+        cache.clear()
+        reset_site_chrome()
+        get_site_chrome()
+
+    def test_json_pages_cover_every_service_once(self):
+        slugs, cursor, pages = [], None, 0
+        while True:
+            params = {"format": "json"}
+            if cursor:
+                params["after"] = cursor
+            data = self.client.get(self.url, params).json()
+            slugs += [service["slug"] for service in data["services"]]
+            pages += 1
+            cursor = data["next"]
+            if cursor is None:
+                break
+        self.assertEqual(slugs, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_deep_page_costs_the_same_as_first(self):
+        first = self.client.get(self.url, {"format": "json"}).json()
+        with CaptureQueriesContext(connection) as page_one:
+            self.client.get(self.url, {"format": "fragment"})
+        with CaptureQueriesContext(connection) as page_two:
+            self.client.get(self.url, {"format": "fragment", "after": first["next"]})
+        self.assertEqual(len(page_one), len(page_two))
+
+    def test_fragment_renders_cards_and_next_link(self):
+        response = self.client.get(self.url, {"format": "fragment"})
+        content = response.content.decode()
+        self.assertEqual(content.count('class="service-card"'), 3)
+        self.assertIn("data-load-more", content)
+        self.assertNotIn("<html", content)
+
+    def test_full_page_with_cursor(self):
+        first = self.client.get(self.url, {"format": "json"}).json()
+        response = self.client.get(self.url, {"after": first["next"]})
+        self.assertContains(response, reverse("service-detail", args=[self.expected[3]]))
+        self.assertNotContains(response, reverse("service-detail", args=[self.expected[0]]))
+
+    def test_invalid_cursor_is_bad_request(self):
+        self.assertEqual(self.client.get(self.url, {"after": "garbage!"}).status_code, 400)
+
+    def test_inactive_category_is_hidden(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.organization.is_active = False
+            self.organization.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertNotIn(self.organization, get_site_chrome()["categories"])
+
+
+class CatalogApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Клиники")
+        cms_models.CategoryOrganization.objects.create(name="Скрытая", is_active=False)
+        cls.service = create_service(
+            cls.organization, "Clinic", items_per_section=2, cover_image="services/covers/clinic.webp"
+        )
+        cls.url = reverse("api-service", args=[cls.service.slug])
+
+    def setUp(self):
+        cache.clear()
+        reset_site_chrome()
+
+    def test_categories(self):
+        data = self.client.get(reverse("api-categories")).json()
+        self.assertEqual([c["name"] for c in data["categories"]], ["Клиники"])
+
+    def test_category_services(self):
+        response = self.client.get(reverse("api-category-services", args=[self.organization.pk]))
+        self.assertEqual(response["Content-Type"], "application/json")
+        data = response.json()
+        self.assertEqual(data["category"]["name"], "Клиники")
+        self.assertEqual([s["slug"] for s in data["services"]], [self.service.slug])
+        self.assertEqual(data["services"][0]["cover_image"]["url"],
+                         "http://testserver/media/services/covers/clinic.webp")
+        self.assertIsNone(data["next"])
+
+    def test_service_document_has_every_section(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(data["title"], "Clinic")
+        self.assertEqual(data["category"], {"id": self.organization.pk, "name": "Клиники"})
+        self.assertEqual(set(data["sections"]), set(SERVICE_SECTIONS))
+        for related_name, items in data["sections"].items():
+            self.assertEqual(len(items), 2, related_name)
+        zone = data["sections"]["zone_items"][0]
+        self.assertEqual(zone["zone_display"], dict(cms_models.ServiceZoneItem.ZONE_CHOICES)[zone["zone"]])
+        self.assertNotIn("is_active", zone)
+        self.assertEqual(data["cover_image"], {
+            "name": "services/covers/clinic.webp",
+            "url": "http://testserver/media/services/covers/clinic.webp",
+        })
+
+    def test_fields_projection(self):
+        data = self.client.get(self.url, {"fields": "title,sections.faq_items,unknown"}).json()
+        self.assertEqual(set(data), {"title", "sections"})
+        self.assertEqual(set(data["sections"]), {"faq_items"})
+
+    def test_repeat_request_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faq = self.service.faq_items.filter(is_active=True).first()
+            faq.question = "Новый вопрос"
+            faq.save()
+        data = self.client.get(self.url, {"fields": "sections.faq_items"}).json()
+        self.assertIn("Новый вопрос", [item["question"] for item in data["sections"]["faq_items"]])
+
+    def test_errors_are_json(self):
+        response = self.client.get(reverse("api-service", args=["missing"]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "Не найдено"})
+        response = self.client.get(reverse("api-category-services", args=[self.organization.pk]), {"after": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_stdlib_encoder_fallback(self):
+        expected = self.client.get(self.url).json()
+        cache.clear()
+        with mock.patch("apps.cms.api.orjson", None):
+            self.assertEqual(self.client.get(self.url).json(), expected)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Рестораны")
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.kitchen = cms_models.Service.objects.create(organization=cls.organization, title="Уборка кухни")
+            cls.zone = cms_models.ServiceZoneItem.objects.create(
+                service=cls.kitchen, zone="kitchen", text="Удаление жиров с вытяжки и плиты"
+            )
+            cls.degreasing = cms_models.Service.objects.create(organization=cls.organization, title="Удаление жира")
+            cls.windows = cms_models.Service.objects.create(organization=cls.organization, title="Мойка окон")
+        cls.url = reverse("api-search")
+
+    def search(self, q):
+        response = self.client.get(self.url, {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [service["slug"] for service in response.json()["services"]]
+
+    def test_title_match_outranks_section_match(self):
+        # "жира" и "жиров" сводятся к одной основе
+        self.assertEqual(self.search("удаление жира"), [self.degreasing.slug, self.kitchen.slug])
+
+    def test_item_changes_update_vector(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cms_models.ServiceFAQItem.objects.create(
+                service=self.windows, question="Моете ли вы фасады?", answer="Да, с промышленным альпинизмом"
+            )
+        self.assertEqual(self.search("фасад"), [self.windows.slug])
+
+        self.zone.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.zone.save()
+        self.assertEqual(self.search("вытяжка"), [])
+
+    def test_inactive_services_are_hidden(self):
+        self.degreasing.is_active = False
+        self.degreasing.save()
+        self.assertEqual(self.search("удаление жира"), [self.kitchen.slug])
+
+    def test_title_change_updates_vector_after_commit(self):
+        self.windows.title = "Мойка фасадов"
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.windows.save()
+        self.assertEqual(self.search("фасад"), [])
+        callbacks[0]()
+        self.assertEqual(self.search("фасад"), [self.windows.slug])
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            self.search("окна")
+        self.assertEqual(self.search(""), [])
+
+    def test_too_long_query(self):
+        response = self.client.get(self.url, {"q": "а" * 201})
+        self.assertEqual(response.status_code, 400)
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Ёлочные базары")
+        cms_models.Service.objects.create(organization=cls.organization, title="Удаление жира")
+        cms_models.Service.objects.create(organization=cls.organization, title="Уборка после ремонта")
+        cms_models.Service.objects.create(organization=cls.organization, title="Скрытая уборка", is_active=False)
+
+    def setUp(self):
+        cache.clear()
+        reset_autocomplete()
+
+    def titles(self, q):
+        return [item["title"] for item in suggest(q, 10)]
+
+    def test_prefix_matches_title_and_words(self):
+        self.assertEqual(self.titles("уб"), ["Уборка после ремонта"])
+        self.assertEqual(self.titles("ЖИР"), ["Удаление жира"])
+        self.assertEqual(self.titles("  удаление   ж"), ["Удаление жира"])
+        self.assertEqual(self.titles("x"), [])
+        self.assertEqual(self.titles(""), [])
+
+    def test_yo_is_folded(self):
+        self.assertEqual(self.titles("елоч"), ["Ёлочные базары"])
+        self.assertEqual(suggest("ёлоч", 10)[0]["url"], reverse("category-detail", args=[self.organization.pk]))
+
+    def test_endpoint_does_not_touch_database(self):
+        get_autocomplete_index()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("api-suggest"), {"q": "удал"})
+        self.assertEqual(response.json()["suggestions"][0]["title"], "Удаление жира")
+
+    @override_settings(SITE_CHROME_TTL=0)
+    def test_rebuilt_on_catalog_version_change(self):
+        self.assertEqual(self.titles("мой"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            cms_models.Service.objects.create(organization=self.organization, title="Мойка окон")
+        self.assertEqual(self.titles("мой"), ["Мойка окон"])
+
+
+class TelegramBotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Рестораны")
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.service = cms_models.Service.objects.create(organization=cls.organization, title="Уборка кухни")
+            cms_models.ServiceFAQItem.objects.create(
+                service=cls.service, question="Сколько сохнет пол после мойки?", answer="Около часа"
+            )
+            cms_models.ServicePriceItem.objects.create(service=cls.service, title="До 50 м²", price="5000 сом")
+        cms_models.CategoryOrganization.objects.create(name="Скрытая", is_active=False)
+
+    def setUp(self):
+        cache.clear()
+        self.catalog = build_catalog()
+
+    def test_browse_categories_and_services(self):
+        text, markup = categories_reply(self.catalog)
+        self.assertEqual([row[0].text for row in markup.keyboard], ["Рестораны"])
+
+        text, markup = callback_reply(self.catalog, markup.keyboard[0][0].callback_data)
+        self.assertEqual(text, "<b>Рестораны</b>")
+        self.assertEqual(markup.keyboard[0][0].callback_data, f"s:{self.service.slug}")
+
+        text, markup = callback_reply(self.catalog, f"s:{self.service.slug}")
+        self.assertIn("<b>Уборка кухни</b>", text)
+        self.assertEqual([b.text for b in markup.keyboard[0]], ["Цены", "Вопросы"])
+
+    def test_answers_questions_from_catalog(self):
+        with self.assertNumQueries(0):
+            price, _markup = text_reply(self.catalog, "Сколько стоит уборка кухни?")
+            faq, _markup = text_reply(self.catalog, "как долго сохнут полы после мойки")
+            unknown, _markup = text_reply(self.catalog, "Ремонт автомобиля")
+        self.assertIn("До 50 м² — 5000 сом", price)
+        self.assertIn("Около часа", faq)
+        self.assertTrue(unknown.startswith("Не нашёл ответа."))
+
+    def test_faq_item_without_answer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cms_models.ServiceFAQItem.objects.create(
+                service=self.service, question="Работаете ли вы по ночам?", answer=None
+            )
+        catalog = build_catalog()
+        text, _markup = faq_reply(catalog, self.service.slug)
+        self.assertIn("<b>Работаете ли вы по ночам?</b>", text)
+        text, _markup = text_reply(catalog, "работаете ночью?")
+        self.assertEqual(text, "<b>Работаете ли вы по ночам?</b>\n\n<i>Уборка кухни</i>")
+
+    def test_outbox_batches_messages_per_chat(self):
+        sent = []
+
+        async def send(chat_id, text, markup):
+            sent.append((chat_id, text, markup, time.monotonic()))
+
+        async def scenario():
+            outbox = Outbox(send, rate=1000, chat_interval=0.2)
+            runner = asyncio.create_task(outbox.run())
+            await outbox.put(1, "первое")
+            await asyncio.sleep(0.05)
+            for text in ("второе", "третье"):
+                await outbox.put(1, text)
+            await outbox.put(1, "с кнопками", "markup")
+            await outbox.put(1, "после кнопок")
+            await outbox.put(2, "другой чат")
+            await outbox.join()
+            runner.cancel()
+
+        asyncio.run(scenario())
+        chat_one = [(text, markup) for chat_id, text, markup, _at in sent if chat_id == 1]
+        self.assertEqual(chat_one, [
+            ("первое", None),
+            ("второе\n\nтретье\n\nс кнопками", "markup"),
+            ("после кнопок", None),
+        ])
+        times = [at for chat_id, _text, _markup, at in sent if chat_id == 1]
+        self.assertTrue(all(b - a >= 0.19 for a, b in zip(times, times[1:])))
+        self.assertIn((2, "другой чат"), [(chat_id, text) for chat_id, text, _m, _at in sent])
+
+    def test_outbox_retries_after_rate_limit(self):
+        calls = []
+
+        async def send(chat_id, text, markup):
+            calls.append(text)
+            if len(calls) == 1:
+                raise ApiTelegramException("sendMessage", None, {
+                    "error_code": 429, "description": "Too Many Requests",
+                    "parameters": {"retry_after": 0.01},
+                })
+
+        async def scenario():
+            outbox = Outbox(send, rate=1000, chat_interval=0)
+            runner = asyncio.create_task(outbox.run())
+            await outbox.put(1, "привет")
+            await outbox.join()
+            runner.cancel()
+
+        asyncio.run(scenario())
+        self.assertEqual(calls, ["привет", "привет"])
+
+    def test_bot_against_stub_api(self):
+        requests = []
+
+        async def api(request):
+            # telebot шлёт параметры формой и в GET-запросах
+            data = dict(parse_qsl(await request.text()))
+            requests.append((request.match_info["method"], data))
+            result = {"message_id": 1, "date": 0, "chat": {"id": 42, "type": "private"}}
+            return web.json_response({"ok": True, "result": result})
+
+        async def scenario():
+            app = web.Application()
+            app.router.add_route("*", "/bot{token}/{method}", api)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+
+            store = CatalogStore(loader=lambda: self.catalog)
+            with mock.patch.object(asyncio_helper, "API_URL", f"http://127.0.0.1:{port}/bot{{0}}/{{1}}"):
+                bot, outbox = create_bot("123:test", store)
+                sender = asyncio.create_task(outbox.run())
+                update = types.Update.de_json({
+                    "update_id": 1,
+                    "message": {
+                        "message_id": 1, "date": 0, "text": "/start",
+                        "chat": {"id": 42, "type": "private"},
+                        "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+                        "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+                    },
+                })
+                await bot.process_new_updates([update])
+                await outbox.join()
+                sender.cancel()
+                await bot.close_session()
+            await runner.cleanup()
+
+        asyncio.run(scenario())
+        self.assertEqual([method for method, _data in requests], ["sendMessage"])
+        self.assertEqual(requests[0][1]["chat_id"], "42")
+        self.assertIn("Выберите категорию", requests[0][1]["text"])
+        keyboard = json.loads(requests[0][1]["reply_markup"])["inline_keyboard"]
+        self.assertEqual(keyboard[0][0]["text"], "Рестораны")
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_query_budgets_match_baseline(self):
+        # Время и память сравнивает python manage.py benchmark; здесь — только
+        # число запросов, оно не зависит от машины
+        size = min(load_baseline(), key=lambda size: parse_size(size))
+        results = {size: run_benchmarks(size, repeat=1)}
+        self.assertEqual(set(results[size]), {"index", "category", "category_detail", "service_detail"})
+        self.assertEqual(compare(results, load_baseline(), margin=0, metrics=("queries",)), [])
+
+    def test_command_restores_test_db_name(self):
+        test_name = connection.settings_dict["TEST"]["NAME"]
+        with mock.patch.object(connection.creation, "create_test_db", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                call_command("benchmark", sizes="1x1x1", stdout=StringIO())
+        self.assertEqual(connection.settings_dict["TEST"]["NAME"], test_name)
+
+    def test_compare(self):
+        baseline = {"1x1x1": {"index": {"queries": 2, "wall_ms": 10.0, "peak_kb": 100}}}
+
+        def measured(**metrics):
+            return {"1x1x1": {"index": {"queries": 2, "wall_ms": 10.0, "peak_kb": 100, **metrics}}}
+
+        self.assertEqual(compare(measured(wall_ms=12.4), baseline, margin=0.25), [])
+        self.assertEqual(
+            compare(measured(wall_ms=12.6, queries=3), baseline, margin=0.25),
+            ["1x1x1 index queries: 2 -> 3", "1x1x1 index wall_ms: 10.0 -> 12.6"],
+        )
+        # Рост меньше порога шума — не регрессия даже без запаса
+        self.assertEqual(compare(measured(peak_kb=150), baseline, margin=0), [])
+        self.assertEqual(parse_size("2X3x4"), (2, 3, 4))
+        with self.assertRaises(ValueError):
+            parse_size("2x3")
+
+
+class LoadTestTests(TestCase):
+    def test_histogram(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+        self.assertEqual(histogram.total, 1000)
+        # Погрешность корзин меньше 1%, и значения не занижаются
+        for percent, expected in ((50, 500), (99, 990), (100, 1000)):
+            value = histogram.percentile(percent)
+            self.assertGreaterEqual(value, expected)
+            self.assertLess(value, expected * 1.01)
+
+        rows = histogram.distribution()
+        self.assertEqual([round(row[1], 4) for row in rows[:4]], [0, 0.5, 0.75, 0.875])
+        self.assertEqual(rows[-1][1:3], (1.0, 1000))
+
+        merged = LatencyHistogram(json.loads(json.dumps({str(k): v for k, v in histogram.counts.items()})))
+        merged.merge(histogram)
+        self.assertEqual(merged.total, 2000)
+        self.assertEqual(merged.percentile(50), histogram.percentile(50))
+
+    def test_crawl_urls(self):
+        organization = cms_models.CategoryOrganization.objects.create(name="Офисы")
+        service = create_service(organization, "Мытьё окон")
+        cms_models.CategoryOrganization.objects.create(name="Скрытая", is_active=False)
+
+        urls = crawl_urls()
+        paths = [path for _route, path in urls]
+        self.assertIn(reverse("category-detail", args=[organization.pk]), paths)
+        self.assertIn(reverse("service-detail", args=[service.slug]), paths)
+        self.assertEqual(sum(route == "category-detail" for route, _path in urls), 1)
+        self.assertNotIn(reverse("db-pool"), paths)
+        self.assertTrue(any(path.startswith(reverse("api-search") + "?q=") for path in paths))
+
+    def test_only_localhost(self):
+        check_local("http://127.0.0.1:8000")
+        check_local("http://localhost:8000")
+        with self.assertRaisesMessage(ValueError, "только на localhost"):
+            check_local("http://10.0.0.5:8000")
+
+    def test_run_stage(self):
+        async def page(request):
+            if request.path == "/missing":
+                return web.Response(status=404)
+            return web.Response(text="ok")
+
+        async def scenario():
+            app = web.Application()
+            app.router.add_get("/{tail:.*}", page)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            try:
+                return await run_stage(
+                    f"http://127.0.0.1:{port}", [("page", "/"), ("missing", "/missing")], 4, 0.3,
+                )
+            finally:
+                await runner.cleanup()
+
+        stage = asyncio.run(scenario())
+        self.assertGreater(stage["requests"], 0)
+        self.assertEqual(stage["concurrency"], 4)
+        self.assertEqual(set(stage["statuses"]), {"200", "404"})
+        self.assertEqual(set(stage["routes"]), {"page", "missing"})
+        self.assertEqual(sum(stage["histogram"].values()), stage["requests"])
+        self.assertLessEqual(stage["latency_ms"]["p50"], stage["latency_ms"]["max"])
+
+
+class SeedCatalogTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def seed(self, seed=7):
+        # workers=1: пул процессов закрывает соединения, а тест идёт в транзакции
+        return seed_catalog(seed=seed, categories=2, services=6, items=4, images=2, workers=1)
+
+    def dump(self):
+        services = cms_models.Service.objects.filter(slug__startswith=SEED_SLUG_PREFIX).order_by("slug")
+        return [
+            (service.slug, service.title, service.is_active, service.organization.name, str(service.cover_image))
+            + tuple(
+                tuple(getattr(service, related_name).order_by("order").values_list(*fields))
+                for related_name, fields in (
+                    ("faq_items", ("question", "answer", "is_active")),
+                    ("price_items", ("title", "price")),
+                    ("documents", ("doc_type", "url")),
+                )
+            )
+            for service in services
+        ]
+
+    def test_seed_catalog(self):
+        stats = self.seed()
+
+        self.assertEqual(cms_models.CategoryOrganization.objects.count(), 2)
+        self.assertEqual(cms_models.Service.objects.filter(slug__startswith=SEED_SLUG_PREFIX).count(), 6)
+        self.assertEqual(set(stats["rows"]), set(SERVICE_SECTIONS))
+        for related_name, (model, _ordering) in SERVICE_SECTIONS.items():
+            self.assertEqual(model.objects.count(), stats["rows"][related_name], related_name)
+            # 4 ± 50% пунктов на услугу
+            self.assertTrue(6 * 2 <= stats["rows"][related_name] <= 6 * 6, related_name)
+        self.assertEqual(cms_models.ServiceSnapshot.objects.count(), 6)
+        service = cms_models.Service.objects.filter(is_active=True).first()
+        self.assertTrue(service.cover_image.storage.exists(service.cover_image.name))
+        self.assertEqual(self.client.get(reverse("service-detail", args=[service.slug])).status_code, 200)
+
+    def test_same_seed_same_catalog(self):
+        self.seed()
+        first = self.dump()
+        deleted = clear_seeded()
+        self.assertEqual(deleted["service"], 6)
+        self.assertFalse(cms_models.ServiceFAQItem.objects.exists())
+        self.assertFalse(cms_models.CategoryOrganization.objects.exists())
+
+        self.seed()
+        self.assertEqual(self.dump(), first)
+        clear_seeded()
+        self.seed(seed=8)
+        self.assertNotEqual([row[1:] for row in self.dump()], [row[1:] for row in first])
+
+    def test_clear_keeps_real_services(self):
+        self.seed()
+        organization = cms_models.CategoryOrganization.objects.create(name="Офисы")
+        seeded = cms_models.Service.objects.get(slug=f"{SEED_SLUG_PREFIX}7-0")
+        real = cms_models.Service.objects.create(
+            organization=organization, title="Seed cleaning", slug="seed-cleaning", cover_image=seeded.cover_image.name
+        )
+        other_image = cms_models.Service.objects.get(slug=f"{SEED_SLUG_PREFIX}7-1").cover_image
+        seeded_category = seeded.organization
+        added = cms_models.Service.objects.create(organization=seeded_category, title="Added")
+
+        deleted = clear_seeded()
+        self.assertEqual(deleted["service"], 6)
+        self.assertEqual(deleted["categoryorganization"], 1)
+        self.assertQuerySetEqual(
+            cms_models.Service.objects.order_by("title"), [added, real], ordered=True
+        )
+        self.assertTrue(cms_models.CategoryOrganization.objects.filter(pk=seeded_category.pk).exists())
+        # Заглушку, оставшуюся у настоящей услуги, не удаляем
+        self.assertTrue(default_storage.exists(real.cover_image.name))
+        self.assertFalse(default_storage.exists(other_image.name))
+
+    def test_same_seed_requires_clear(self):
+        options = {"seed": 7, "categories": 2, "services": 6, "items": 4, "images": 2, "workers": 1}
+        call_command("seed_catalog", **options, stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "seed 7 уже сгенерирован"):
+            call_command("seed_catalog", **options, stdout=StringIO())
+        self.assertEqual(cms_models.Service.objects.count(), 6)
+
+        call_command("seed_catalog", **options, clear=True, stdout=StringIO())
+        self.assertEqual(cms_models.Service.objects.count(), 6)
+
+    def test_command_validates_sizes(self):
+        with self.assertRaises(CommandError):
+            call_command("seed_catalog", services=1, categories=0, stdout=StringIO())
+
+
+class CatalogTransferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = cms_models.CategoryOrganization.objects.create(name="Офисы", descriptions="Уборка офисов")
+        cls.service = create_service(cls.organization, "Office", items_per_section=2)
+        cls.other = create_service(cls.organization, "Other")
+
+    def setUp(self):
+        cache.clear()
+
+    def export(self, fmt="jsonl", services=None):
+        return "".join(export_lines(fmt, services, chunk_size=3))
+
+    def records(self, text):
+        return [json.loads(line) for line in text.splitlines()]
+
+    def lines(self, records):
+        return [json.dumps(record, ensure_ascii=False) + "\n" for record in records]
+
+    def wipe(self):
+        cms_models.CategoryOrganization.objects.all().delete()
+
+    def test_round_trip(self):
+        for fmt in ("jsonl", "csv"):
+            with self.subTest(fmt=fmt):
+                exported = self.export(fmt)
+                self.wipe()
+                stats = import_catalog(StringIO(exported, newline=""), fmt, batch_size=4)
+                self.assertEqual(stats["created"]["service"], 2)
+                self.assertEqual(stats["created"]["faq_items"], 3 + 2)
+                self.assertEqual(self.export(fmt), exported)
+
+        # Производные данные пересчитаны, как после правки в админке
+        service = cms_models.Service.objects.get(slug=self.service.slug)
+        self.assertEqual(cms_models.ServiceSnapshot.objects.get(service=service).payload["title"], "Office")
+        self.assertIsNotNone(service.search_vector)
+
+    def test_export_selected_services(self):
+        records = self.records(self.export(services=cms_models.Service.objects.filter(pk=self.other.pk)))
+        self.assertEqual([r["name"] for r in records if r["type"] == "category"], ["Офисы"])
+        self.assertEqual({r["service"] for r in records if "service" in r}, {self.other.slug})
+        self.assertEqual(len([r for r in records if r["type"] == "faq_items"]), 2)
+
+    def test_upsert_by_slug(self):
+        records = self.records(self.export())
+        for record in records:
+            if record["type"] == "service" and record["slug"] == self.service.slug:
+                record["title"] = "Office 2"
+        records = [
+            r for r in records
+            if not (r["type"] == "faq_items" and r["service"] == self.service.slug and r["order"] > 0)
+        ]
+
+        with self.assertRaises(CatalogImportError) as raised:
+            import_catalog(self.lines(records), "jsonl")
+        self.assertIn("уже есть", str(raised.exception))
+
+        stats = import_catalog(self.lines(records), "jsonl", upsert=True)
+        self.assertEqual(stats["updated"], {"category": 1, "service": 2})
+        self.assertEqual(cms_models.Service.objects.count(), 2)
+        self.service.refresh_from_db()
+        self.assertEqual(self.service.title, "Office 2")
+        # Раздел услуги заменён пунктами из файла
+        self.assertEqual(self.service.faq_items.count(), 1)
+        self.assertEqual(self.other.faq_items.count(), 2)
+        snapshot = cms_models.ServiceSnapshot.objects.get(service=self.service)
+        self.assertEqual(snapshot.payload["title"], "Office 2")
+        self.assertEqual(len(snapshot.payload["sections"]["faq_items"]), 1)
+
+    def test_reimport_same_file(self):
+        exported = self.export()
+        counts = {model: model.objects.count() for model, _ordering in SERVICE_SECTIONS.values()}
+        items_only = [line for line in exported.splitlines(keepends=True) if '"type": "faq_items"' in line]
+        for lines in (exported.splitlines(keepends=True), items_only):
+            with self.assertRaises(CatalogImportError) as raised:
+                import_catalog(lines, "jsonl")
+            self.assertIn("уже есть (загрузите с upsert)", str(raised.exception))
+
+        stats = import_catalog(exported.splitlines(keepends=True), "jsonl", upsert=True)
+        self.assertEqual(stats["updated"], {"category": 1, "service": 2})
+        self.assertEqual({model: model.objects.count() for model in counts}, counts)
+        self.assertEqual(self.export(), exported)
+
+    def test_upsert_keeps_fields_missing_from_record(self):
+        cms_models.Service.objects.filter(pk=self.service.pk).update(is_active=False, order=5)
+        records = [
+            {"type": "category", "name": "Офисы"},
+            {"type": "service", "slug": self.service.slug, "title": "Office 2"},
+        ]
+        stats = import_catalog(self.lines(records), "jsonl", upsert=True)
+        self.assertEqual(stats["updated"], {"category": 1, "service": 1})
+        self.service.refresh_from_db()
+        self.assertEqual(
+            (self.service.title, self.service.is_active, self.service.order, self.service.organization_id),
+            ("Office 2", False, 5, self.organization.pk),
+        )
+        self.organization.refresh_from_db()
+        self.assertEqual(self.organization.descriptions, "Уборка офисов")
+
+    def test_invalid_batch_is_not_written(self):
+        records = [
+            {"type": "category", "name": "Склады"},
+            {"type": "service", "category": "Склады", "title": "Склад", "slug": "sklad"},
+            {"type": "price_items", "service": "sklad", "title": "Цена", "price": "x" * 200},
+            {"type": "price_items", "service": "missing", "title": "Цена", "price": "1 сом"},
+        ]
+        with self.assertRaises(CatalogImportError) as raised:
+            import_catalog(self.lines(records), "jsonl")
+        self.assertEqual(len(raised.exception.errors), 2)
+        self.assertIn("строка 3: price", raised.exception.errors[0])
+        self.assertIn("строка 4: нет услуги 'missing'", raised.exception.errors[1])
+        # Предыдущие пачки остаются, пачка с ошибкой — нет
+        self.assertTrue(cms_models.Service.objects.filter(slug="sklad").exists())
+        self.assertFalse(cms_models.ServicePriceItem.objects.filter(service__slug="sklad").exists())
+
+        with self.assertRaises(CatalogImportError):
+            import_catalog(self.lines([{"type": "service", "title": "Без slug", "category": "Офисы"}]), "jsonl")
+
+    def test_duplicate_slug_in_file(self):
+        service = {"type": "service", "category": "Офисы", "title": "Склад", "slug": "sklad"}
+        for batch_size in (1000, 1):
+            with self.subTest(batch_size=batch_size):
+                with self.assertRaises(CatalogImportError) as raised:
+                    import_catalog(self.lines([service, service]), "jsonl", upsert=True, batch_size=batch_size)
+                self.assertEqual(raised.exception.errors, ["строка 2: услуга 'sklad' уже была в файле"])
+
+    def test_dry_run(self):
+        records = [
+            {"type": "service", "category": "Офисы", "title": "Новая", "slug": "new"},
+            {"type": "faq_items", "service": "new", "question": "?", "answer": "!"},
+        ]
+        stats = import_catalog(self.lines(records), "jsonl", dry_run=True)
+        self.assertEqual(stats["created"], {"service": 1, "faq_items": 1})
+        self.assertFalse(cms_models.Service.objects.filter(slug="new").exists())
+
+    def test_commands(self):
+        path = Path(tempfile.mkdtemp()) / "catalog.csv"
+        self.addCleanup(shutil.rmtree, path.parent, ignore_errors=True)
+        call_command("export_catalog", str(path), stdout=StringIO())
+        self.assertEqual(path.read_bytes().decode(), self.export("csv"))
+
+        with self.assertRaises(CommandError):
+            call_command("import_catalog", str(path), stdout=StringIO())
+        out = StringIO()
+        call_command("import_catalog", str(path), upsert=True, stdout=out)
+        self.assertIn("Обновлено: category 1, service 2", out.getvalue())
+
+    def test_admin_views(self):
+        url = reverse("admin:cms_service_export")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        admin_user = get_user_model().objects.create_superuser("admin", password="x")
+        self.client.force_login(admin_user)
+        response = self.client.get(url, {"format": "csv"})
+        self.assertTrue(response.streaming)
+        self.assertIn('filename="catalog-', response["Content-Disposition"])
+        exported = b"".join(response.streaming_content).decode()
+        self.assertEqual(exported, self.export("csv"))
+        self.assertEqual(self.client.get(url, {"format": "xml"}).status_code, 404)
+
+        import_url = reverse("admin:cms_service_import")
+        self.assertEqual(self.client.get(import_url).status_code, 200)
+        upload = SimpleUploadedFile("catalog.csv", exported.encode())
+        response = self.client.post(import_url, {"file": upload, "format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "уже есть")
+
+        upload = SimpleUploadedFile("catalog.csv", exported.encode())
+        response = self.client.post(import_url, {"file": upload, "format": "csv", "upsert": "on"})
+        self.assertRedirects(response, reverse("admin:cms_service_changelist"), fetch_redirect_response=False)
+        self.assertEqual(cms_models.Service.objects.count(), 2)
 
-# Create your tests here.
@@ -0,0 +1,433 @@
+import csv
+import json
+from collections import Counter, defaultdict
+from itertools import groupby
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.base.cache import CATALOG, CHROME, bump_on_commit, category_scope, service_scope
+from apps.base.context_processors import reset_site_chrome
+from apps.cms import models as cms_models
+from apps.cms.loaders import SERVICE_SECTIONS
+from apps.cms.search import update_search_vectors
+from apps.cms.snapshots import rebuild_snapshots
+
+# -------------------------------
+# Выгрузка и загрузка каталога
+# -------------------------------
+# Каталог целиком — поток записей: категории, затем услуги, затем пункты
+# разделов по одному типу за раз. Запись — словарь с "type" ("category",
+# "service" или related_name раздела) и полями модели; услуга ссылается на
+# категорию по названию ("category"), пункт — на услугу по slug
+# ("service"). Файлы передаются именами в хранилище, без содержимого.
+#   JSONL — запись на строку;
+#   CSV   — колонки type, category, service и объединение полей всех
+#           моделей, у записи заполнены только её поля.
+# Выгрузка читает БД .iterator(chunk_size=...), загрузка пишет пачками
+# bulk_create/bulk_update, по транзакции на пачку.
+CATEGORY = "category"
+SERVICE = "service"
+RECORD_MODELS = {
+    CATEGORY: cms_models.CategoryOrganization,
+    SERVICE: cms_models.Service,
+    **{related_name: model for related_name, (model, _ordering) in SERVICE_SECTIONS.items()},
+}
+
+# Поля, которые не переносятся: ключи и то, что пересчитывается само
+SKIP_FIELDS = {"id", "organization", "service", "created_at", "updated_at", "search_vector"}
+
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+
+# Сколько ошибок показывать, если пачка не прошла проверку
+MAX_ERRORS = 20
+
+
+class CatalogImportError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors[:MAX_ERRORS]
+        more = len(errors) - len(self.errors)
+        super().__init__("\n".join(self.errors + ([f"… и ещё {more}"] if more else [])))
+
+
+def record_fields(model):
+    return [field for field in model._meta.concrete_fields if field.name not in SKIP_FIELDS]
+
+
+CSV_COLUMNS = ["type", CATEGORY, SERVICE] + list(dict.fromkeys(
+    field.name for model in RECORD_MODELS.values() for field in record_fields(model)
+))
+
+
+# -------------------------------
+# Выгрузка
+# -------------------------------
+def _values(obj):
+    values = {}
+    for field in record_fields(type(obj)):
+        value = getattr(obj, field.attname)
+        if isinstance(field, models.FileField):
+            value = value.name or None
+        values[field.name] = value
+    return values
+
+
+def export_records(services=None, chunk_size=CHUNK_SIZE):
+    """
+    Записи каталога: всех категорий и услуг или только услуг из queryset'а
+    services (и их категорий). Читает по chunk_size строк — память не
+    зависит от размера каталога.
+    """
+    categories = cms_models.CategoryOrganization.objects.all()
+    if services is None:
+        services = cms_models.Service.objects.all()
+    else:
+        categories = categories.filter(pk__in=services.values("organization_id"))
+
+    for category in categories.order_by("order", "pk").iterator(chunk_size=chunk_size):
+        yield {"type": CATEGORY, **_values(category)}
+
+    for service in (
+        services.annotate(category_name=F("organization__name"))
+        .order_by("organization__order", "organization_id", "order", "pk")
+        .iterator(chunk_size=chunk_size)
+    ):
+        yield {"type": SERVICE, CATEGORY: service.category_name, **_values(service)}
+
+    for related_name, (model, ordering) in SERVICE_SECTIONS.items():
+        items = (
+            model.objects.filter(service__in=services.values("pk"))
+            .annotate(service_slug=F("service__slug"))
+            .order_by("service_id", *ordering)
+        )
+        for item in items.iterator(chunk_size=chunk_size):
+            yield {"type": related_name, SERVICE: item.service_slug, **_values(item)}
+
+
+class _Echo:
+    """"Файл" для csv.writer: строка возвращается, а не пишется."""
+
+    def write(self, value):
+        return value
+
+
+def jsonl_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False, cls=DjangoJSONEncoder) + "\n"
+
+
+def csv_lines(records):
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_COLUMNS)
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+# формат -> (записи в строки, Content-Type)
+FORMATS = {
+    "jsonl": (jsonl_lines, "application/x-ndjson; charset=utf-8"),
+    "csv": (csv_lines, "text/csv; charset=utf-8"),
+}
+
+
+def export_lines(fmt, services=None, chunk_size=CHUNK_SIZE):
+    """Строки выгрузки в формате fmt ("jsonl" или "csv")."""
+    to_lines, _content_type = FORMATS[fmt]
+    return to_lines(export_records(services, chunk_size))
+
+
+# -------------------------------
+# Загрузка
+# -------------------------------
+def read_records(lines, fmt):
+    """(номер строки, запись) из строк файла; пустые ячейки CSV — значения по умолчанию."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, {key: value for key, value in record.items() if key and value not in ("", None)}
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            raise CatalogImportError([f"строка {number}: не JSON ({error})"])
+        if not isinstance(record, dict):
+            raise CatalogImportError([f"строка {number}: ожидался объект"])
+        yield number, record
+
+
+class CatalogImporter:
+    """
+    Пишет записи пачками по batch_size, каждая пачка — в своей транзакции и
+    только после проверки всех её записей. Первая пачка с ошибками
+    останавливает загрузку (CatalogImportError); предыдущие остаются.
+
+    Категории сопоставляются по названию, услуги — по slug. Без upsert
+    существующая услуга (в том числе в ссылке пункта) — ошибка, с upsert
+    обновляются только поля, которые есть в записи, а пункты каждого
+    раздела, встреченного в файле, заменяются пунктами из файла.
+    Поисковый индекс, снимки и версии кэша пересчитываются в конце для
+    всех затронутых услуг.
+    """
+
+    def __init__(self, upsert=False, batch_size=BATCH_SIZE):
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.now = timezone.now()
+        # Первая по pk категория с таким названием
+        self.categories = dict(
+            cms_models.CategoryOrganization.objects.order_by("-pk").values_list("name", "pk")
+        )
+        self.seen_categories = set()
+        self.services = {}
+        # related_name -> услуги, чей раздел уже заменён в этой загрузке
+        self.cleared = defaultdict(set)
+        self.touched_categories = set()
+        self.touched_services = set()
+        self.created = Counter()
+        self.updated = Counter()
+        self.deleted = Counter()
+
+    def run(self, records, dry_run=False):
+        """records — пары (номер строки, запись), см. read_records. dry_run — проверить и откатить."""
+        if dry_run:
+            with transaction.atomic():
+                try:
+                    self.write_all(records)
+                finally:
+                    transaction.set_rollback(True)
+        else:
+            try:
+                self.write_all(records)
+            finally:
+                # Записанные пачки остаются и после ошибки в следующей
+                if self.touched_services or self.touched_categories:
+                    self.refresh()
+        return {
+            key: {record_type: count for record_type, count in counter.items() if count}
+            for key, counter in (("created", self.created), ("updated", self.updated), ("deleted", self.deleted))
+        }
+
+    def write_all(self, records):
+        for record_type, rows in groupby(records, key=lambda pair: pair[1].get("type")):
+            if record_type not in RECORD_MODELS:
+                number, _record = next(rows)
+                raise CatalogImportError([f"строка {number}: неизвестный type {record_type!r}"])
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self.write(record_type, batch)
+                    batch = []
+            if batch:
+                self.write(record_type, batch)
+
+    def write(self, record_type, rows):
+        errors = []
+        with transaction.atomic():
+            if record_type == CATEGORY:
+                self.write_categories(rows, errors)
+            elif record_type == SERVICE:
+                self.write_services(rows, errors)
+            else:
+                self.write_items(record_type, rows, errors)
+
+    def build(self, model, number, record, errors, keys=(), instance=None):
+        """
+        Экземпляр модели из записи после full_clean; None, если есть ошибки.
+        instance — существующая строка: поля, которых нет в записи, остаются как есть.
+        """
+        unknown = set(record) - {"type", *keys} - {field.name for field in record_fields(model)}
+        if unknown:
+            errors.append(f"строка {number}: неизвестные поля {', '.join(sorted(unknown))}")
+            return None
+        instance = model() if instance is None else instance
+        for field in record_fields(model):
+            if field.name in record:
+                value = record[field.name]
+                setattr(instance, field.attname, None if value == "" and field.null else value)
+        try:
+            instance.full_clean(exclude=["organization", "service"], validate_unique=False, validate_constraints=False)
+        except ValidationError as error:
+            errors.extend(
+                f"строка {number}: {field}: {' '.join(messages)}" for field, messages in error.message_dict.items()
+            )
+            return None
+        return instance
+
+    def check(self, errors):
+        if errors:
+            raise CatalogImportError(errors)
+
+    def update(self, model, updates):
+        """bulk_update пар (объект, поля) — по запросу на каждый набор полей."""
+        by_fields = defaultdict(list)
+        for obj, fields in updates:
+            by_fields[tuple(fields)].append(obj)
+        for fields, objects in by_fields.items():
+            model.objects.bulk_update(objects, fields)
+
+    def present_fields(self, model, record):
+        return [field.name for field in record_fields(model) if field.name in record]
+
+    def write_categories(self, rows, errors):
+        model = cms_models.CategoryOrganization
+        existing = {}
+        if self.upsert:
+            existing = model.objects.in_bulk(
+                [self.categories[record.get("name")] for _number, record in rows if record.get("name") in self.categories]
+            )
+        to_create, to_update = [], []
+        for number, record in rows:
+            name = record.get("name")
+            if name in self.seen_categories:
+                # Услуги ссылаются на категорию по названию, тёзки сливаются в первую
+                continue
+            pk = self.categories.get(name)
+            if pk is not None and not self.upsert:
+                self.seen_categories.add(name)
+                continue
+            category = self.build(model, number, record, errors, instance=existing.get(pk))
+            if category is None:
+                continue
+            self.seen_categories.add(name)
+            if pk is None:
+                to_create.append(category)
+            else:
+                category.updated_at = self.now
+                to_update.append((category, self.present_fields(model, record) + ["updated_at"]))
+        self.check(errors)
+
+        model.objects.bulk_create(to_create)
+        self.update(model, to_update)
+        for category in to_create:
+            self.categories[category.name] = category.pk
+        self.touched_categories.update(category.pk for category in to_create)
+        self.touched_categories.update(category.pk for category, _fields in to_update)
+        self.created[CATEGORY] += len(to_create)
+        self.updated[CATEGORY] += len(to_update)
+
+    def write_services(self, rows, errors):
+        model = cms_models.Service
+        slugs = [record.get("slug") for _number, record in rows]
+        existing = model.objects.filter(slug__in=slugs).in_bulk(field_name="slug")
+        to_create, to_update = [], []
+        batch_slugs = set()
+        for number, record in rows:
+            slug = record.get("slug")
+            # В прошлых пачках или выше в этой
+            if slug and (slug in self.services or slug in batch_slugs):
+                errors.append(f"строка {number}: услуга {slug!r} уже была в файле")
+                continue
+            if slug in existing and not self.upsert:
+                errors.append(f"строка {number}: услуга {slug!r} уже есть (загрузите с upsert)")
+                continue
+            service = self.build(model, number, record, errors, keys=[CATEGORY], instance=existing.get(slug))
+            if service is None:
+                continue
+            if not service.slug:
+                errors.append(f"строка {number}: slug: обязательное поле")
+                continue
+            batch_slugs.add(service.slug)
+            fields = self.present_fields(model, record) + ["updated_at"]
+            if CATEGORY in record or service.pk is None:
+                if service.pk is not None:
+                    # Услугу могли перенести: список прежней категории тоже меняется
+                    self.touched_categories.add(service.organization_id)
+                service.organization_id = self.categories.get(record.get(CATEGORY))
+                if service.organization_id is None:
+                    errors.append(f"строка {number}: нет категории {record.get(CATEGORY)!r}")
+                    continue
+                fields.append("organization")
+            if service.pk is None:
+                to_create.append(service)
+            else:
+                service.updated_at = self.now
+                to_update.append((service, fields))
+        self.check(errors)
+
+        model.objects.bulk_create(to_create)
+        self.update(model, to_update)
+        for service in to_create + [service for service, _fields in to_update]:
+            self.services[service.slug] = service.pk
+            self.touched_services.add(service.pk)
+        self.created[SERVICE] += len(to_create)
+        self.updated[SERVICE] += len(to_update)
+
+    def write_items(self, related_name, rows, errors):
+        model, _ordering = SERVICE_SECTIONS[related_name]
+        missing = {record.get(SERVICE) for _number, record in rows} - set(self.services)
+        service_ids = dict(self.services)
+        service_ids.update(
+            cms_models.Service.objects.filter(slug__in=missing - {None}).values_list("slug", "pk")
+        )
+        items = []
+        for number, record in rows:
+            item = self.build(model, number, record, errors, keys=[SERVICE])
+            if item is None:
+                continue
+            item.service_id = service_ids.get(record.get(SERVICE))
+            if item.service_id is None:
+                errors.append(f"строка {number}: нет услуги {record.get(SERVICE)!r}")
+                continue
+            if not self.upsert and record.get(SERVICE) not in self.services:
+                # Без upsert пункты добавились бы к уже загруженным — дубли
+                errors.append(f"строка {number}: услуга {record.get(SERVICE)!r} уже есть (загрузите с upsert)")
+                continue
+            items.append(item)
+        self.check(errors)
+
+        if self.upsert:
+            # Пункты без собственного ключа: раздел услуги заменяется целиком
+            # при первой встрече в файле, без сигналов на каждый пункт
+            replaced = {item.service_id for item in items} - self.cleared[related_name]
+            if replaced:
+                self.deleted[related_name] += model.objects.filter(service_id__in=replaced)._raw_delete(
+                    model.objects.db
+                )
+                self.cleared[related_name].update(replaced)
+        model.objects.bulk_create(items)
+        self.touched_services.update(item.service_id for item in items)
+        self.created[related_name] += len(items)
+
+    def refresh(self):
+        """То, что при правке в админке делают сигналы: индекс, снимки, версии кэша."""
+        services = cms_models.Service.objects.filter(pk__in=self.touched_services)
+        # Название категории входит в снимки всех её услуг
+        affected = cms_models.Service.objects.filter(
+            Q(pk__in=self.touched_services) | Q(organization_id__in=self.touched_categories)
+        )
+        with transaction.atomic():
+            services.update(updated_at=self.now)
+            update_search_vectors(services)
+            rebuild_snapshots(affected)
+            category_ids = self.touched_categories | set(services.values_list("organization_id", flat=True))
+            cms_models.CategoryOrganization.objects.filter(pk__in=category_ids).update(updated_at=self.now)
+            scopes = [category_scope(pk) for pk in category_ids]
+            scopes += [service_scope(slug) for slug in affected.values_list("slug", flat=True)]
+            bump_on_commit(CHROME, CATALOG, *scopes)
+            transaction.on_commit(reset_site_chrome)
+
+
+def import_catalog(lines, fmt, upsert=False, dry_run=False, batch_size=BATCH_SIZE):
+    """Загружает строки файла в формате fmt; статистика {"created", "updated", "deleted"}."""
+    importer = CatalogImporter(upsert=upsert, batch_size=batch_size)
+    return importer.run(read_records(lines, fmt), dry_run=dry_run)
+
+
+STAT_LABELS = (("created", "Создано"), ("updated", "Обновлено"), ("deleted", "Заменено пунктов"))
+
+
+def describe_stats(stats):
+    """Строки "Создано: service 3, faq_items 12" для непустых счётчиков."""
+    return [
+        f"{label}: " + ", ".join(f"{name} {count}" for name, count in stats[key].items())
+        for key, label in STAT_LABELS
+        if stats[key]
+    ]
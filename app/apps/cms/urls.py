@@ -1,7 +1,15 @@
 from django.urls import path
+from apps.cms import api as cms_api
 from apps.cms import views as cms_views
 urlpatterns = [
     path('category/', cms_views.category, name = "category-page"),
     path('category/<int:pk>/', cms_views.category_detail, name="category-detail"),
     path('service/<slug:slug>/', cms_views.service_detail, name="service-detail"),
+
+    # JSON API (только чтение)
+    path('api/categories/', cms_api.categories, name="api-categories"),
+    path('api/categories/<int:pk>/services/', cms_api.category_services, name="api-category-services"),
+    path('api/services/<slug:slug>/', cms_api.service, name="api-service"),
+    path('api/search/', cms_api.search, name="api-search"),
+    path('api/suggest/', cms_api.suggest, name="api-suggest"),
 ]
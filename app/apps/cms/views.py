@@ -1,86 +1,57 @@
+from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
-import itertools
-from apps.base import models as base_models
+from django.urls import reverse
+from apps.base.cache import cached_page, category_scope, service_scope
 from apps.cms import models as cms_models
+from apps.cms.pagination import keyset_page
+from apps.cms.snapshots import load_service_page
 # Create your views here.
+# settings, banners и categories приходят из apps.base.context_processors.site_chrome
+@cached_page()
 def category(request):
-    settings = base_models.Settings.objects.first()
-    banners = base_models.Banner.objects.all()
-    categories = cms_models.CategoryOrganization.objects.all()
-    return render(request, "pages/category.html", locals())
+    return render(request, "pages/category.html")
 
 
-def category_detail(request, pk: int):
-    settings = base_models.Settings.objects.first()
-    banners = base_models.Banner.objects.all()
-    categories = cms_models.CategoryOrganization.objects.all()
-    category = get_object_or_404(cms_models.CategoryOrganization, pk=pk)
-    services = category.services.filter(is_active=True)
-    return render(request, "pages/category.html", locals())
+# Поля, которые выводит карточка услуги (include/service_cards.html)
+SERVICE_CARD_FIELDS = ("slug", "title")
 
 
+@cached_page(lambda pk: [category_scope(pk)], query_params=("after", "format"))
+def category_detail(request, pk: int):
+    """
+    Категория и её услуги постранично: ?after=<курсор> — следующая
+    страница, ?format=fragment — только карточки для "Показать ещё",
+    ?format=json — то же в JSON.
+    """
+    category = get_object_or_404(cms_models.CategoryOrganization, pk=pk, is_active=True)
+    services, next_cursor = keyset_page(
+        category.services.filter(is_active=True),
+        request.GET.get("after"),
+        settings.CATALOG_PAGE_SIZE,
+        SERVICE_CARD_FIELDS,
+    )
+
+    response_format = request.GET.get("format")
+    if response_format == "json":
+        return JsonResponse({
+            "services": [
+                {
+                    "title": service["title"],
+                    "slug": service["slug"],
+                    "url": reverse("service-detail", args=[service["slug"]]),
+                }
+                for service in services
+            ],
+            "next": next_cursor,
+        })
+    context = {"category": category, "services": services, "next_cursor": next_cursor}
+    if response_format == "fragment":
+        return render(request, "include/service_cards.html", context)
+    return render(request, "pages/category.html", context)
+
+
+@cached_page(lambda slug: [service_scope(slug)])
 def service_detail(request, slug: str):
-    settings = base_models.Settings.objects.first()
-    banners = base_models.Banner.objects.all()
-    categories = cms_models.CategoryOrganization.objects.all()
-    service = get_object_or_404(cms_models.Service, slug=slug, is_active=True)
-    category = service.organization
-    zone_items = (
-        service.zone_items.filter(is_active=True)
-        .order_by("zone", "order", "id")
-    )
-    zone_groups = []
-    for zone, items_iter in itertools.groupby(zone_items, key=lambda x: x.zone):
-        label = dict(cms_models.ServiceZoneItem.ZONE_CHOICES).get(zone, zone)
-        zone_groups.append({"zone": zone, "label": label, "items": list(items_iter)})
-
-    chemical_items = (
-        service.chemical_items.filter(is_active=True)
-        .order_by("order", "id")
-    )
-
-    equipment_items = (
-        service.equipment_items.filter(is_active=True)
-        .order_by("order", "id")
-    )
-
-    faq_items = (
-        service.faq_items.filter(is_active=True)
-        .order_by("order", "id")
-    )
-
-    requirement_items = (
-        service.requirement_items.filter(is_active=True)
-        .order_by("order", "id")
-    )
-
-    work_condition_items = (
-        service.work_condition_items.filter(is_active=True)
-        .order_by("order", "id")
-    )
-
-    excluded_items = (
-        service.excluded_items.filter(is_active=True)
-        .order_by("order", "id")
-    )
-
-    price_items = (
-        service.price_items.filter(is_active=True)
-        .order_by("order", "id")
-    )
-
-    cases_before_after = (
-        service.cases_before_after.filter(is_active=True)
-        .order_by("order", "id")
-    )
-
-    client_companies = (
-        service.client_companies.filter(is_active=True)
-        .order_by("order", "id")
-    )
-
-    documents = (
-        service.documents.filter(is_active=True)
-        .order_by("order", "id")
-    )
-    return render(request, "pages/service.html", locals())
+    context = load_service_page(slug)
+    return render(request, "pages/service.html", context)
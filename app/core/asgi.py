@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Подсказки поиска собираются при старте, а не на первом запросе
+from apps.cms.autocomplete import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,77 @@
+"""
+Настройки gunicorn для продакшна:
+
+    gunicorn -c core/gunicorn_conf.py
+
+Всё задаётся переменными окружения GUNICORN_*; без них число воркеров
+и потоков считается от числа ядер. Сравнение режимов — в README,
+раздел "Продакшн".
+"""
+
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+cpu_count = multiprocessing.cpu_count()
+
+# -------------------------------
+# Режим
+# -------------------------------
+# sync    — по запросу на процесс (как было)
+# gthread — процессы с потоками: ожидание БД/Redis не занимает процесс целиком
+# asgi    — core/asgi.py под uvicorn-воркерами (нужен пакет uvicorn)
+mode = os.getenv('GUNICORN_MODE', 'gthread')
+
+if mode == 'asgi':
+    wsgi_app = 'core.asgi:application'
+    worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'uvicorn.workers.UvicornWorker')
+else:
+    wsgi_app = 'core.wsgi:application'
+    worker_class = os.getenv('GUNICORN_WORKER_CLASS', mode)
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Процессы: классическая формула 2 * ядра + 1. С потоками процессов нужно
+# меньше — по одному на ядро, остальное добирают потоки
+if worker_class == 'gthread':
+    workers = int(os.getenv('GUNICORN_WORKERS', cpu_count + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+else:
+    workers = int(os.getenv('GUNICORN_WORKERS', cpu_count * 2 + 1))
+    threads = 1
+
+# Приложение (Django, шаблоны, индекс подсказок) загружается один раз в
+# мастере и достаётся воркерам через fork с copy-on-write. Соединения и
+# пул БД мастера закрываются перед каждым fork (pre_fork), поэтому воркеры
+# не делят его сокеты; пул redis-py сам пересоздаётся после fork.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() in ('true', '1', 't')
+
+# Перезапуск воркеров против утечек памяти. Jitter разносит перезапуски во
+# времени, чтобы все воркеры не ушли на рестарт одновременно
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+# Запрос дольше timeout — воркер перезапускается; при остановке/перезагрузке
+# текущие запросы дорабатывают graceful_timeout секунд
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# Keep-alive к nginx на той же машине
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Служебные файлы воркеров — в памяти, а не на диске контейнера
+worker_tmp_dir = os.getenv('GUNICORN_WORKER_TMP_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def pre_fork(server, worker):
+    # Мастер не должен передать воркеру свои соединения и пул БД
+    if server.cfg.preload_app:
+        from apps.base.db import close_connections
+
+        close_connections()
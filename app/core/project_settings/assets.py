@@ -0,0 +1,26 @@
+from dotenv import load_dotenv
+from pathlib import Path
+import os
+
+load_dotenv()
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Бандлы CSS/JS (python manage.py build_assets, его же вызывает boot):
+# имя бандла -> исходники из static в порядке склейки
+ASSET_BUNDLES = {
+    'site.css': ['styles.css', 'css/footer.css'],
+    'service.css': ['css/service.css'],
+    'site.js': ['script.js'],
+}
+
+# Куда собираются бандлы (рядом со статикой, в том же volume) и откуда их отдают
+ASSET_ROOT = os.getenv('ASSET_ROOT', os.path.join(BASE_DIR, 'staticfiles', 'assets'))
+ASSET_URL = '/assets/'
+
+# Подключать собранные бандлы. По умолчанию — вне DEBUG; без сборки (или при
+# False) шаблоны подключают исходники из static по отдельности
+_debug = os.getenv('DEBUG', 'False').lower() in ('true', '1', 't')
+ASSET_BUNDLES_ENABLED = os.getenv('ASSET_BUNDLES_ENABLED', str(not _debug)).lower() in ('true', '1', 't')
+
+# Имя бандла содержит хэш содержимого, поэтому браузер хранит его год без перепроверки
+ASSET_MAX_AGE = 60 * 60 * 24 * 365
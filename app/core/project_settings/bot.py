@@ -0,0 +1,17 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# Токен бота от @BotFather (python manage.py bot)
+TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
+
+# Адрес Bot API: {0} — токен, {1} — метод. Для тестов можно указать локальную заглушку
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org/bot{0}/{1}')
+
+# Адрес сайта для ссылок "Открыть на сайте"; пусто — без ссылок
+TELEGRAM_SITE_URL = os.getenv('TELEGRAM_SITE_URL', '')
+
+# Лимиты Telegram: не больше ~30 сообщений в секунду всего и ~1 в секунду в один чат
+TELEGRAM_MESSAGES_PER_SECOND = float(os.getenv('TELEGRAM_MESSAGES_PER_SECOND', 25))
+TELEGRAM_CHAT_INTERVAL = float(os.getenv('TELEGRAM_CHAT_INTERVAL', 1))
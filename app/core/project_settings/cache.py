@@ -0,0 +1,28 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': os.getenv('PROJECT_NAME', 'catalog'),
+        }
+    }
+else:
+    # Без Redis (локально, тесты) — кэш в памяти процесса
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Сколько живёт готовая страница; актуальность обеспечивают версии контента
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Как часто процесс сверяет версию шапки/подвала/меню с общим кэшем
+SITE_CHROME_TTL = int(os.getenv('SITE_CHROME_TTL', 5))
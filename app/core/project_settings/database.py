@@ -22,3 +22,30 @@ DATABASES = {
         'PORT': os.getenv('POSTGRES_PORT', 5432),
     }
 }
+
+# Проверять соединение перед использованием: после рестарта Postgres
+# мёртвые соединения отбрасываются, а не роняют первый запрос
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Пул соединений psycopg 3 на процесс. Размер — по числу потоков воркера
+# gunicorn (GUNICORN_THREADS), больше одновременно занятых соединений не бывает
+DB_POOL = os.getenv('DB_POOL', 'True').lower() in ('true', '1', 't')
+
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', os.getenv('GUNICORN_THREADS', 4))),
+            # Сколько ждать свободного соединения, прежде чем отдать ошибку
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            # Лишние простаивающие соединения закрываются, старые — пересоздаются
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 600)),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+        },
+    }
+else:
+    # Без пула — постоянное соединение на поток на CONN_MAX_AGE секунд
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+# Сколько python manage.py boot ждёт БД при старте контейнера
+BOOT_DB_TIMEOUT = float(os.getenv('BOOT_DB_TIMEOUT', 60))
@@ -0,0 +1,31 @@
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# Ширины уменьшенных копий для srcset (шире исходника копии не делаются)
+RESPONSIVE_IMAGE_WIDTHS = [
+    int(width) for width in os.getenv('RESPONSIVE_IMAGE_WIDTHS', '320,640,960,1280,1920').split(',')
+]
+
+# Формат -> качество. AVIF используется, только если Pillow умеет его кодировать
+RESPONSIVE_IMAGE_FORMATS = {
+    'AVIF': int(os.getenv('RESPONSIVE_IMAGE_AVIF_QUALITY', 55)),
+    'WEBP': int(os.getenv('RESPONSIVE_IMAGE_WEBP_QUALITY', 75)),
+}
+
+# Загрузки сохраняются как есть и обрабатываются воркером process_images.
+# False — обрабатывать сразу в запросе (как обычный ResizedImageField)
+IMAGE_PROCESSING_DEFERRED = os.getenv('IMAGE_PROCESSING_DEFERRED', 'True').lower() in ('true', '1', 't')
+
+# Пауза воркера между проверками пустой очереди, секунды
+IMAGE_WORKER_POLL_INTERVAL = float(os.getenv('IMAGE_WORKER_POLL_INTERVAL', 2))
+
+# Сколько раз повторять задачу, прежде чем пометить её как ошибочную
+IMAGE_JOB_MAX_ATTEMPTS = int(os.getenv('IMAGE_JOB_MAX_ATTEMPTS', 5))
+
+# На сколько секунд воркер забирает задачу; после падения воркера её возьмёт другой
+IMAGE_JOB_LEASE = int(os.getenv('IMAGE_JOB_LEASE', 600))
+
+# Что показывать вместо картинки, пока она обрабатывается (путь в static)
+IMAGE_PLACEHOLDER = 'public/placeholder.svg'
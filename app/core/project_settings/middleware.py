@@ -4,6 +4,8 @@ import os
 load_dotenv()
 
 MIDDLEWARE = [
+    # /healthz и /readyz — до всего остального (apps/base/health.py)
+    'apps.base.health.HealthCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
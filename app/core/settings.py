@@ -38,6 +38,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.base.context_processors.site_chrome',
             ],
         },
     },
@@ -51,6 +52,9 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 from core.project_settings.database import *
 
+# Cache
+from core.project_settings.cache import *
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -88,9 +92,20 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'   
 MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
 
+# Готовые HTML-страницы каталога (python manage.py export_static), их отдаёт nginx
+STATIC_EXPORT_ROOT = os.getenv('STATIC_EXPORT_ROOT', os.path.join(BASE_DIR, 'export'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 from core.project_settings.ckeditor import *
+
+from core.project_settings.images import *
+
+from core.project_settings.assets import *
+
+from core.project_settings.catalog import *
+
+from core.project_settings.bot import *
@@ -153,3 +153,92 @@ if (modal) {
         }
     });
 }
+
+// "Показать ещё" на странице категории: следующая страница услуг подгружается
+// фрагментом и дописывается в сетку; без JS ссылка открывает её целиком
+document.addEventListener('click', async (e) => {
+    const more = e.target.closest('[data-load-more]');
+    if (!more) return;
+    e.preventDefault();
+
+    const grid = more.closest('.services-grid');
+    const url = new URL(more.href, window.location.href);
+    url.searchParams.set('format', 'fragment');
+    more.classList.add('loading');
+
+    try {
+        const response = await fetch(url);
+        if (!response.ok) throw new Error(response.status);
+        const template = document.createElement('template');
+        template.innerHTML = await response.text();
+        more.remove();
+        grid.append(template.content);
+    } catch (err) {
+        // Не вышло — переходим по ссылке обычным способом
+        window.location.href = more.href;
+    }
+});
+
+// Подсказки поиска в шапке: /api/suggest/ отвечает из памяти сервера,
+// поэтому запрос уходит на каждое нажатие; устаревшие ответы отбрасываются
+document.querySelectorAll('[data-suggest]').forEach((box) => {
+    const input = box.querySelector('input');
+    const list = box.querySelector('ul');
+    let lastQuery = '';
+
+    const render = (suggestions) => {
+        list.replaceChildren(...suggestions.map((item) => {
+            const li = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = item.url;
+            link.textContent = item.title;
+            if (item.type === 'category') {
+                const label = document.createElement('small');
+                label.textContent = 'категория';
+                link.append(label);
+            }
+            li.append(link);
+            return li;
+        }));
+        list.hidden = suggestions.length === 0;
+    };
+
+    input.addEventListener('input', async () => {
+        const query = input.value.trim();
+        lastQuery = query;
+        if (!query) {
+            render([]);
+            return;
+        }
+        const url = new URL(box.dataset.suggest, window.location.href);
+        url.searchParams.set('q', query);
+        try {
+            const response = await fetch(url);
+            const data = await response.json();
+            if (query === lastQuery) render(data.suggestions);
+        } catch (err) {
+            render([]);
+        }
+    });
+
+    input.addEventListener('keydown', (e) => {
+        const links = [...list.querySelectorAll('a')];
+        if (!links.length) return;
+        const current = links.findIndex((link) => link.classList.contains('active'));
+        if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+            e.preventDefault();
+            const next = e.key === 'ArrowDown'
+                ? (current + 1) % links.length
+                : (current - 1 + links.length) % links.length;
+            links.forEach((link, i) => link.classList.toggle('active', i === next));
+        } else if (e.key === 'Enter') {
+            window.location.href = links[Math.max(current, 0)].href;
+        } else if (e.key === 'Escape') {
+            render([]);
+        }
+    });
+
+    document.addEventListener('click', (e) => {
+        if (!box.contains(e.target)) list.hidden = true;
+    });
+});
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Подсказки поиска собираются при старте, а не на первом запросе
+from apps.cms.autocomplete import warm_up  # noqa: E402
+
+warm_up()
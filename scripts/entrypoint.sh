@@ -1,29 +1,9 @@
 #!/bin/sh
 set -e
 
-echo "Начало инициализации базы данных..."
-
-# Подождем некоторое время, чтобы убедиться, что сеть и база данных готовы
-echo "Подождем 10 секунд, чтобы убедиться, что сеть и база данных готовы..."
-sleep 10
-
-# Ожидание доступности базы данных
-echo "Ожидание доступности базы данных..."
-until nc -z -v -w30 $POSTGRES_HOST $POSTGRES_PORT
-do
-  echo "Waiting for PostgreSQL database connection..."
-  sleep 1
-done
-
-echo "База данных доступна. Создаём миграции..."
-python manage.py makemigrations --noinput
-
-echo "Применяем миграции..."
-python manage.py migrate --noinput
-
-echo "Собираем статические файлы..."
-python manage.py collectstatic --noinput
-
+# Ждём БД, применяем новые миграции и собираем изменившуюся статику.
+# Миграции в контейнере не создаются — они приходят из репозитория.
+python manage.py boot
 
 # Запускаем переданную команду
-exec "$@"
\ No newline at end of file
+exec "$@"